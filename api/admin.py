@@ -3,4 +3,10 @@ from django.contrib import admin
 from .models import *
 
 # registering all tables
-admin.site.register([Vendor, PurchaseOrder, HistoricalPerformance])
\ No newline at end of file
+admin.site.register([Vendor, HistoricalPerformance])
+
+@admin.register(PurchaseOrder)
+class PurchaseOrderAdmin(admin.ModelAdmin):
+    """This admin class is used for listing purchase orders with their vendor loaded in same query"""
+    list_display = ["po_number", "vendor", "status", "order_date", "expected_delivery_date"]
+    list_select_related = ["vendor"]
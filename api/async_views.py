@@ -0,0 +1,198 @@
+import time
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.urls import URLPattern
+from django.utils.http import parse_etags
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import APIException, NotAuthenticated, NotFound, AuthenticationFailed
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from .authentication import AsyncJWTAuthentication
+from .cache import aget_vendor_performance
+from .fast_serializers import get_compiled_serializer
+from .filters import PurchaseOrderFilter
+from .models import Vendor, PurchaseOrder
+from .pagination import VendorCursorPagination, PurchaseOrderCursorPagination
+from .renderers import FastJSONRenderer
+from .serializers import VendorSerializer, PurchaseOrderSerializer, VendorPerformanceSerializer
+
+# media ranges of accept header which are answered with compact json by default renderer
+JSON_MEDIA_RANGES = {"*/*", "application/*", "application/json"}
+
+renderer = FastJSONRenderer()
+
+def accepts_default_json(request):
+    """This function returns True when response of request is compact json rendered by default renderer"""
+    if request.GET.get(api_settings.URL_FORMAT_OVERRIDE, "json") != "json":
+        return False
+    media_ranges = [media_range.strip() for media_range in request.headers.get("Accept", "").split(",")]
+    return all(media_range in JSON_MEDIA_RANGES for media_range in media_ranges if media_range)
+
+def render_response(request, data, status=200, headers=None):
+    """This function is used for creating json response with same body and headers as rest framework response"""
+    start = time.perf_counter()
+    content = renderer.render(data)
+    request._render_seconds = time.perf_counter() - start
+    response = HttpResponse(content, status=status, content_type=renderer.media_type, headers=headers)
+    if not content:
+        del response["Content-Type"]
+    return response
+
+def render_exception(request, exc):
+    """This function returns response of api exception same as rest framework exception handler"""
+    headers = {}
+    if isinstance(exc, (NotAuthenticated, AuthenticationFailed)):
+        headers["WWW-Authenticate"] = AsyncJWTAuthentication().authenticate_header(request)
+    data = exc.detail if isinstance(exc.detail, (list, dict)) else {"detail": exc.detail}
+    return render_response(request, data, status=exc.status_code, headers=headers)
+
+async def authenticate(request):
+    """This function authenticates request with jwt token, it returns error response when request is not authenticated"""
+    try:
+        result = await AsyncJWTAuthentication().aauthenticate(request)
+    except APIException as exc:
+        return render_exception(request, exc)
+    if result is None:
+        return render_exception(request, NotAuthenticated())
+    return None
+
+def get_serializer(request, serializer_class):
+    """This function returns serializer limited to fields of `fields` query parameter, None for unknown fields"""
+    fields = None
+    if request.query_params.get("fields"):
+        fields = [field.strip() for field in request.query_params["fields"].split(",") if field.strip()]
+        if set(fields) - set(serializer_class.Meta.fields):
+            return None
+    return serializer_class(fields=fields, context={"request": request, "format": None, "view": None})
+
+async def list_response(request, serializer_class, queryset, pagination_class, filter_backends=()):
+    """This function returns page of rows same as list action of model view set, None when it can not be compiled"""
+    drf_request = Request(request)
+    serializer = get_serializer(drf_request, serializer_class)
+    compiled = get_compiled_serializer(serializer) if serializer is not None else None
+    if compiled is None:
+        return None
+
+    try:
+        for backend in filter_backends:
+            queryset = backend().filter_queryset(drf_request, queryset, None)
+    except APIException as exc:
+        return render_exception(request, exc)
+
+    columns, to_dict = compiled
+    paginator = pagination_class()
+    #pagination reads position of last row from ordering fields
+    ordering = [field.lstrip("-") for field in paginator.ordering]
+    rows = await paginator.apaginate_queryset(queryset.values(*columns, *set(ordering) - set(columns)), drf_request)
+    return render_response(request, paginator.get_paginated_response([to_dict(row) for row in rows]).data)
+
+async def retrieve_response(request, serializer_class, queryset, pk):
+    """This function returns single row same as retrieve action of model view set, None when it can not be compiled"""
+    drf_request = Request(request)
+    serializer = get_serializer(drf_request, serializer_class)
+    compiled = get_compiled_serializer(serializer) if serializer is not None else None
+    if compiled is None:
+        return None
+
+    columns, to_dict = compiled
+    row = await queryset.filter(pk=pk).values(*columns).afirst()
+    if row is None:
+        return render_exception(request, NotFound())
+    return render_response(request, to_dict(row))
+
+async def vendor_list(request):
+    """This async view is used for listing vendors"""
+    return await authenticate(request) or await list_response(request, VendorSerializer, Vendor.objects.all(),
+                                                              VendorCursorPagination)
+
+async def vendor_detail(request, pk):
+    """This async view is used for getting details of vendor"""
+    return await authenticate(request) or await retrieve_response(request, VendorSerializer, Vendor.objects.all(), pk)
+
+async def purchase_order_list(request):
+    """This async view is used for listing purchase orders"""
+    return await authenticate(request) or await list_response(request, PurchaseOrderSerializer,
+                                                              PurchaseOrder.objects.all(), PurchaseOrderCursorPagination,
+                                                              [PurchaseOrderFilter])
+
+async def purchase_order_detail(request, pk):
+    """This async view is used for getting details of purchase order"""
+    return await authenticate(request) or await retrieve_response(request, PurchaseOrderSerializer,
+                                                                  PurchaseOrder.objects.all(), pk)
+
+async def load_vendor_performance(vendor_id):
+    """This function returns serialized performance data of vendor read from database"""
+    columns, to_dict = get_compiled_serializer(VendorPerformanceSerializer())
+    return to_dict(await Vendor.objects.values(*columns).aget(vendor_code=vendor_id))
+
+async def vendor_performance(request, vendor_id):
+    """This async view is used for getting metric data of vendor"""
+    error = await authenticate(request)
+    if error is not None:
+        return error
+    try:
+        etag, data = await aget_vendor_performance(vendor_id, lambda: load_vendor_performance(vendor_id))
+        if etag in parse_etags(request.headers.get("If-None-Match", "")):
+            return render_response(request, None, status=304, headers={"ETag": etag})
+        return render_response(request, data, headers={"ETag": etag})
+
+    except Vendor.DoesNotExist as e:
+        return render_response(request, {"error":f"User does not exist"}, status=404)
+
+    except Exception as e:
+        return render_response(request, {"error":f"Exception occured, message: {e}"}, status=500)
+
+# async views of get requests by url name
+ASYNC_VIEWS = {
+    "vendor-list": vendor_list,
+    "vendor-detail": vendor_detail,
+    "purchaseorder-list": purchase_order_list,
+    "purchaseorder-detail": purchase_order_detail,
+    "vendors_performance": vendor_performance,
+}
+
+def get_allowed_methods(view):
+    """This function returns value of Allow header which rest framework sets for responses of sync view"""
+    actions = getattr(view, "actions", None)
+    if actions is None:
+        methods = [method for method in view.cls.http_method_names
+                   if hasattr(view.cls, method) or (method == "head" and hasattr(view.cls, "get"))]
+    else:
+        methods = [method for method in view.cls.http_method_names
+                   if method in actions or method == "options" or (method == "head" and "get" in actions)]
+    return ", ".join(method.upper() for method in methods)
+
+def hybrid_view(async_view, sync_view):
+    """This function returns async view which serves json get requests with async view and other requests with sync view
+    :params:
+        async_view: "async view function, it returns None for requests which it can not serve"
+        sync_view: "rest framework view function"
+    :return:
+        view function
+    """
+    allowed_methods = get_allowed_methods(sync_view)
+    call_sync_view = sync_to_async(sync_view)
+
+    async def view(request, *args, **kwargs):
+        response = None
+        if request.method == "GET" and accepts_default_json(request):
+            response = await async_view(request, *args, **kwargs)
+        if response is None:
+            return await call_sync_view(request, *args, **kwargs)
+        response["Allow"] = allowed_methods
+        return response
+    return csrf_exempt(view)
+
+def get_async_urlpatterns(urlpatterns):
+    """This function returns url patterns of read api's with hybrid views, patterns keep url and name of sync views
+    so they are added before sync url patterns
+    :params:
+        urlpatterns: "url patterns of sync views"
+    :return:
+        list of url patterns
+    """
+    return [URLPattern(pattern.pattern, hybrid_view(ASYNC_VIEWS[pattern.name], pattern.callback), pattern.default_args,
+                       pattern.name)
+            for pattern in urlpatterns
+            if isinstance(pattern, URLPattern) and pattern.name in ASYNC_VIEWS
+            and "format" not in pattern.pattern.regex.groupindex]
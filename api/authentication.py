@@ -0,0 +1,118 @@
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+class TokenCache:
+    """
+    This class is used for keeping validated jwt tokens with their users in memory of process, entries are removed
+    in least recently used order when cache is full and expire with token or after MAX_AGE seconds
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+
+    def get(self, raw_token):
+        """This method returns tuple of user and validated token or None when token is not cached"""
+        with self.lock:
+            entry = self.entries.get(raw_token)
+            if entry is None:
+                return None
+            if entry[2] <= time.time():
+                del self.entries[raw_token]
+                return None
+            self.entries.move_to_end(raw_token)
+            return entry[0], entry[1]
+
+    def set(self, raw_token, user, validated_token):
+        """This method keeps user of validated token until token expires or until MAX_AGE seconds"""
+        expires = min(validated_token.get("exp", 0), time.time() + settings.JWT_AUTH_CACHE["MAX_AGE"])
+        with self.lock:
+            self.entries[raw_token] = (user, validated_token, expires)
+            self.entries.move_to_end(raw_token)
+            while len(self.entries) > settings.JWT_AUTH_CACHE["MAX_SIZE"]:
+                self.entries.popitem(last=False)
+
+    def remove_user(self, user_id):
+        """This method removes all tokens of user, it is called when user is changed or deleted"""
+        with self.lock:
+            for raw_token in [raw_token for raw_token, entry in self.entries.items() if entry[0].pk == user_id]:
+                del self.entries[raw_token]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+token_cache = TokenCache()
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    This class is jwt authentication which keeps validated tokens and their users in token cache, cached token is
+    not verified again and its user is not read from database until entry expires or user is changed
+    """
+
+    def get_cached_token(self, request):
+        """This method returns raw token of request with cached user and validated token or None when not cached"""
+        header = self.get_header(request)
+        if header is None:
+            return None, None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None, None
+        #cache is looked up by complete token so only tokens with verified signature are found
+        return raw_token, token_cache.get(raw_token)
+
+    def authenticate(self, request):
+        raw_token, cached = self.get_cached_token(request)
+        if raw_token is None or cached is not None:
+            return cached
+
+        validated_token = self.get_validated_token(raw_token)
+        user = self.get_user(validated_token)
+        token_cache.set(raw_token, user, validated_token)
+        return user, validated_token
+
+class AsyncJWTAuthentication(CachedJWTAuthentication):
+    """
+    This class is jwt authentication used by async views, token is validated same as simplejwt authentication
+    and user is read from database with async query
+    """
+
+    async def aauthenticate(self, request):
+        """This method returns tuple of user and validated token or None when request has no jwt token"""
+        raw_token, cached = self.get_cached_token(request)
+        if raw_token is None or cached is not None:
+            return cached
+
+        validated_token = self.get_validated_token(raw_token)
+        user = await self.aget_user(validated_token)
+        token_cache.set(raw_token, user, validated_token)
+        return user, validated_token
+
+    async def aget_user(self, validated_token):
+        """This method returns active user of token, it raises same errors as get_user"""
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        try:
+            user = await self.user_model.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
@@ -0,0 +1,218 @@
+import json
+import math
+import platform
+import random
+import time
+from datetime import timedelta
+import django
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.client import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+from .models import Vendor, PurchaseOrder
+from .metrics import recompute_vendor_metrics
+from .items import replace_line_items
+from .po_numbers import allocate_po_numbers
+from .serializers import PurchaseOrderSerializer
+from .fast_serializers import get_compiled_serializer
+
+def seed_data(vendor_count, order_count, batch_size=5000, seed=0):
+    """This function is used for creating synthetic vendors and purchase orders for benchmarks
+    :params:
+        vendor_count: "number of vendors"
+        order_count: "number of purchase orders spread randomly over vendors"
+        batch_size: "number of rows inserted with one query"
+        seed: "seed of random generator so same data is created on each run"
+    :return:
+        list of created vendors
+    """
+    rng = random.Random(seed)
+    vendors = [Vendor(name=f"bench vendor {index}", contact_details="0000000000", address="bench address")
+               for index in range(vendor_count)]
+    Vendor.objects.bulk_create(vendors, batch_size=batch_size)
+
+    now = timezone.now()
+    for start in range(0, order_count, batch_size):
+        orders = []
+        po_numbers = allocate_po_numbers(min(batch_size, order_count - start))
+        for po_number in po_numbers:
+            expected_delivery_date = now - timedelta(days=rng.randint(-30, 365))
+            status = rng.choice(("pending", "completed", "completed", "canceled"))
+            completed = status == "completed"
+            orders.append(PurchaseOrder(
+                po_number=po_number,
+                vendor=rng.choice(vendors),
+                expected_delivery_date=expected_delivery_date,
+                delivery_date=(expected_delivery_date + timedelta(days=rng.randint(-3, 3)) if completed else None),
+                items={f"item{rng.randint(1, 50)}": {"qtn": rng.randint(1, 20)}},
+                quantity=rng.randint(1, 100),
+                status=status,
+                quality_rating=(rng.randint(1, 10) if completed else None),
+                acknowledgment_date=(now + timedelta(hours=rng.randint(1, 72)) if rng.random() < 0.7 else None),
+            ))
+        PurchaseOrder.objects.bulk_create(orders, batch_size=batch_size)
+        replace_line_items([(order.po_number, order.items) for order in orders], created=True, batch_size=batch_size)
+
+    recompute_vendor_metrics([vendor.pk for vendor in vendors])
+    return vendors
+
+def percentile(values, percent):
+    """This function returns nearest rank percentile of values"""
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, math.ceil(percent / 100 * len(ordered)) - 1))]
+
+def measure(func, iterations):
+    """This function is used for calling func many times and collecting latency and number of queries
+    :params:
+        func: "function called with iteration number, it returns response of api call"
+        iterations: "number of calls"
+    :return:
+        dict of latency percentiles in milliseconds and average queries for each call
+    """
+    latencies, queries = [], []
+    for iteration in range(iterations):
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            response = func(iteration)
+            latencies.append((time.perf_counter() - start) * 1000)
+        queries.append(len(captured))
+        if response.status_code >= 400:
+            raise RuntimeError(f"Benchmark request failed with status {response.status_code}: {response.content[:200]}")
+
+    return {
+        "iterations": iterations,
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "mean_ms": round(sum(latencies) / len(latencies), 3),
+        "queries_per_request": round(sum(queries) / len(queries), 2),
+    }
+
+def measure_serialization(row_count, repeats=3):
+    """This function is used for comparing rows per second of purchase order serializer and its compiled version,
+    time of reading rows from database is included for both versions
+    :params:
+        row_count: "number of purchase orders serialized in each run"
+        repeats: "number of runs, fastest run is reported"
+    :return:
+        dict of rows per second of serializer and compiled serializer
+    """
+    request = Request(APIRequestFactory().get("/api/purchase_orders/"))
+    queryset = PurchaseOrder.objects.order_by("-order_date", "-po_number")[:row_count]
+
+    def serialize():
+        return PurchaseOrderSerializer(list(queryset), many=True, context={"request": request}).data
+
+    def serialize_compiled():
+        columns, to_dict = get_compiled_serializer(PurchaseOrderSerializer(context={"request": request}))
+        return [to_dict(row) for row in queryset.values(*columns)]
+
+    results = {}
+    for name, func in (("serializer_rows_per_second", serialize), ("compiled_rows_per_second", serialize_compiled)):
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            rows = len(func())
+            timings.append(time.perf_counter() - start)
+        results[name] = round(rows / min(timings), 1)
+    results["rows"] = rows
+    return results
+
+def measure_po_number_inserts(vendor, row_count, batch_size=500):
+    """This function is used for comparing insert throughput of purchase orders with random numbers (old scheme) and
+    with numbers allocated from sequence in blocks, time of creating numbers is included for both schemes
+    :params:
+        vendor: "vendor of inserted orders"
+        row_count: "number of orders inserted with each scheme"
+        batch_size: "number of orders inserted with one query"
+    :return:
+        dict of rows per second of both schemes
+    """
+    rng = random.Random(0)
+    existing = set(PurchaseOrder.objects.values_list("po_number", flat=True))
+
+    def random_numbers(count):
+        numbers = []
+        while len(numbers) < count:
+            #old scheme, random number is generated again when it is already used
+            number = str(rng.randint(1000000000, 9999999999))
+            if number not in existing:
+                existing.add(number)
+                numbers.append(number)
+        return numbers
+
+    now = timezone.now()
+    results = {}
+    for name, get_numbers in (("random_rows_per_second", random_numbers), ("sequence_rows_per_second", allocate_po_numbers)):
+        start = time.perf_counter()
+        for offset in range(0, row_count, batch_size):
+            count = min(batch_size, row_count - offset)
+            PurchaseOrder.objects.bulk_create([
+                PurchaseOrder(po_number=po_number, vendor=vendor, expected_delivery_date=now, items={}, quantity=1)
+                for po_number in get_numbers(count)])
+        results[name] = round(row_count / (time.perf_counter() - start), 1)
+    results["rows"] = row_count
+    return results
+
+def run_benchmarks(vendor_count=10, order_count=1000, iterations=100, seed=0):
+    """This function seeds synthetic data and measures api calls used most often, it must run on a test database
+    :params:
+        vendor_count: "number of seeded vendors"
+        order_count: "number of seeded purchase orders"
+        iterations: "number of calls measured for each api"
+        seed: "seed of random generator"
+    :return:
+        dict with benchmark environment, scale and results of each api
+    """
+    seed_start = time.perf_counter()
+    vendors = seed_data(vendor_count, order_count, seed=seed)
+    seed_seconds = time.perf_counter() - seed_start
+
+    user = User.objects.create_user("bench", "bench@bench.com", "bench")
+    client = Client(headers={"Authorization": f"Bearer {AccessToken.for_user(user)}"})
+    pending_orders = list(PurchaseOrder.objects.filter(status="pending").values_list("po_number", flat=True)[:iterations])
+    if len(pending_orders) < iterations:
+        raise RuntimeError("Not enough pending purchase orders seeded for number of iterations, increase number of orders")
+
+    def create(iteration):
+        return client.post("/api/purchase_orders/", content_type="application/json", data={
+            "vendor": vendors[iteration % len(vendors)].pk, "expected_delivery_date": timezone.now().isoformat(),
+            "items": {"item1": {"qtn": 1}}, "quantity": 1, "status": "pending"})
+
+    def status_change(iteration):
+        return client.patch(f"/api/purchase_orders/{pending_orders[iteration]}/", content_type="application/json", data={
+            "status": "completed", "delivery_date": timezone.now().isoformat(), "quality_rating": 7})
+
+    def acknowledge(iteration):
+        return client.put(f"/api/purchase_orders/{pending_orders[iteration]}/acknowledge", content_type="application/json",
+                          data={"acknowledgment_date": timezone.now().isoformat()})
+
+    scenarios = {
+        "create_purchase_order": create,
+        "status_change": status_change,
+        "acknowledge": acknowledge,
+        "list_purchase_orders": lambda iteration: client.get("/api/purchase_orders/", {"page_size": 100}),
+        "list_vendors": lambda iteration: client.get("/api/vendors/", {"page_size": 100}),
+        "vendor_performance": lambda iteration: client.get(f"/api/vendors/{vendors[iteration % len(vendors)].pk}/performance"),
+    }
+
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+        },
+        "scale": {"vendors": vendor_count, "orders": order_count, "iterations": iterations,
+                  "seed_seconds": round(seed_seconds, 3)},
+        "results": {name: measure(func, iterations) for name, func in scenarios.items()},
+        "serialization": measure_serialization(min(order_count, 10000)),
+        #orders inserted by this benchmark are not included in metrics so it runs last
+        "po_number_inserts": measure_po_number_inserts(vendors[0], min(order_count, 10000)),
+    }
+
+def format_results(results):
+    """This function returns benchmark results as json text"""
+    return json.dumps(results, indent=2)
@@ -0,0 +1,85 @@
+import hashlib
+import json
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.utils import encoders
+
+def get_vendor_cache_version(vendor_id):
+    """This function returns current cache version of vendor, cached vendor data is stored under this version"""
+    return cache.get(f"vendor_version:{vendor_id}", 0)
+
+def bump_vendor_cache_versions(vendor_ids):
+    """This function moves vendors to new cache version so data cached with older versions is not read again"""
+    for vendor_id in vendor_ids:
+        try:
+            cache.incr(f"vendor_version:{vendor_id}")
+        except ValueError:
+            cache.set(f"vendor_version:{vendor_id}", 1, timeout=None)
+
+def invalidate_vendor_cache(vendor_ids):
+    """This function is used for invalidating cached data of vendors after their metrics or details are changed
+    :params:
+        vendor_ids: "list of vendor codes"
+    """
+    vendor_ids = list(vendor_ids)
+    bump_vendor_cache_versions(vendor_ids)
+    #data read by other requests before current transaction is committed is invalidated again after commit
+    transaction.on_commit(lambda: bump_vendor_cache_versions(vendor_ids))
+
+def get_etag(data):
+    """This function returns etag of json data, it does not depend on order of keys"""
+    encoded = json.dumps(data, cls=encoders.JSONEncoder, sort_keys=True).encode("utf-8")
+    return f'"{hashlib.sha1(encoded).hexdigest()}"'
+
+def get_vendor_performance(vendor_id, loader):
+    """This function is used for reading cached performance data of vendor with its etag
+    :params:
+        vendor_id: "vendor code"
+        loader: "function returning serialized performance data of vendor, called on cache miss"
+    :return:
+        tuple of etag and performance data
+    """
+    key = f"vendor_performance:{vendor_id}:{get_vendor_cache_version(vendor_id)}"
+    cached = cache.get(key)
+    if cached is None:
+        data = loader()
+        cached = (get_etag(data), data)
+        cache.set(key, cached, timeout=settings.VENDOR_PERFORMANCE_CACHE_TIMEOUT)
+    return cached
+
+async def aget_vendor_performance(vendor_id, loader):
+    """This function is async version of get_vendor_performance, loader is coroutine function"""
+    key = f"vendor_performance:{vendor_id}:{await cache.aget(f'vendor_version:{vendor_id}', 0)}"
+    cached = await cache.aget(key)
+    if cached is None:
+        data = await loader()
+        cached = (get_etag(data), data)
+        await cache.aset(key, cached, timeout=settings.VENDOR_PERFORMANCE_CACHE_TIMEOUT)
+    return cached
+
+def get_vendor_rows(vendor_ids, variant):
+    """This function is used for reading pre-encoded json rows of vendors from cache
+    :params:
+        vendor_ids: "list of vendor codes"
+        variant: "key of row version, rows contain urls so they are kept separately for each base url"
+    :return:
+        tuple of dict of cached json rows by vendor code and dict of cache entries by their keys used for saving rows
+    """
+    versions = cache.get_many([f"vendor_version:{vendor_id}" for vendor_id in vendor_ids])
+    keys = {vendor_id: f"vendor_row:{vendor_id}:{versions.get(f'vendor_version:{vendor_id}', 0)}"
+            for vendor_id in vendor_ids}
+    entries = cache.get_many(keys.values())
+    rows = {vendor_id: entries[key][variant] for vendor_id, key in keys.items()
+            if variant in entries.get(key, {})}
+    return rows, {key: (vendor_id, entries.get(key, {})) for vendor_id, key in keys.items()}
+
+def set_vendor_rows(entries, rows, variant):
+    """This function is used for saving pre-encoded json rows of vendors in cache
+    :params:
+        entries: "cache entries returned by get_vendor_rows, rows are saved with vendor versions read before loading them"
+        rows: "dict of json rows by vendor code"
+        variant: "key of row version"
+    """
+    cache.set_many({key: {**entry, variant: rows[vendor_id]} for key, (vendor_id, entry) in entries.items()
+                    if vendor_id in rows}, timeout=settings.VENDOR_PERFORMANCE_CACHE_TIMEOUT)
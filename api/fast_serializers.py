@@ -0,0 +1,128 @@
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+from .serializers import cached_reverse, get_url_template, ParameterisedHyperlinkedIdentityField, SAFE_URL_VALUE
+
+# compiled serializers kept for each serializer class and list of its fields
+_compiled_serializers = {}
+
+class CompiledSerializer:
+    """
+    This class is used for compiling fields of read only serializer into single function converting rows
+    returned by queryset.values() into same data as serializer.data, fields which can not be compiled make
+    serializer unsupported and such views use normal serializer
+    """
+
+    def __init__(self, serializer):
+        self.columns = []
+        self.supported = True
+        expressions = []
+        for index, (name, field) in enumerate(serializer.fields.items()):
+            if field.write_only:
+                continue
+            columns = self.get_columns(field)
+            if columns is None:
+                self.supported = False
+                return
+            for column in columns:
+                if column not in self.columns:
+                    self.columns.append(column)
+
+            arguments = ", ".join(f"row[{column!r}]" for column in columns)
+            if self.is_plain_value(field):
+                expressions.append(f"{name!r}: {arguments}")
+            else:
+                expressions.append(f"{name!r}: convert_{index}({arguments})")
+        self.source = "lambda row: {" + ", ".join(expressions) + "}"
+        self.code = compile(self.source, f"<compiled {type(serializer).__name__}>", "eval")
+
+    def get_columns(self, field):
+        """This method returns names of values() columns read by field or None when field can not be compiled"""
+        if isinstance(field, ParameterisedHyperlinkedIdentityField):
+            return [model_field.replace(".", "__") for model_field, url_param in field.lookup_fields]
+        if isinstance(field, serializers.HyperlinkedIdentityField):
+            return [field.lookup_field]
+        if isinstance(field, serializers.PrimaryKeyRelatedField):
+            return [field.source] if field.pk_field is None and "." not in field.source else None
+        if isinstance(field, (serializers.SerializerMethodField, serializers.Serializer, serializers.ManyRelatedField,
+                              serializers.RelatedField)) or field.source == "*":
+            return None
+        return [field.source.replace(".", "__")]
+
+    def is_plain_value(self, field):
+        """This method returns True when value read from database is returned by field without change"""
+        return (type(field) in (serializers.CharField, serializers.JSONField) and not getattr(field, "binary", False)
+                or isinstance(field, serializers.PrimaryKeyRelatedField))
+
+    def get_converter(self, field, context):
+        """This method returns function converting database value of field into serialized value"""
+        if isinstance(field, serializers.HyperlinkedIdentityField):
+            return self.get_url_converter(field, context)
+        if type(field) is serializers.FloatField:
+            return lambda value: None if value is None else float(value)
+        if type(field) is serializers.IntegerField:
+            return lambda value: None if value is None else int(value)
+        if type(field) is serializers.DateTimeField:
+            return self.get_datetime_converter(field)
+        if type(field) is serializers.ChoiceField:
+            choices = field.choice_strings_to_values
+            return lambda value: value if value in ("", None) else choices.get(str(value), value)
+        return lambda value: None if value is None else field.to_representation(value)
+
+    def get_url_converter(self, field, context):
+        """This method returns function building url of object from its lookup values"""
+        request = context.get("request")
+        format = context.get("format")
+        if format and field.format and field.format != format:
+            format = field.format
+        if isinstance(field, ParameterisedHyperlinkedIdentityField):
+            url_params = [url_param for model_field, url_param in field.lookup_fields]
+        else:
+            url_params = [field.lookup_url_kwarg]
+        view_name = field.view_name
+        template = get_url_template(view_name, url_params, request, format)
+        safe_value = SAFE_URL_VALUE.fullmatch
+
+        def convert(*values):
+            kwargs = dict(zip(url_params, values))
+            if template is not None and all(safe_value(str(value)) for value in values):
+                return template.format_map(kwargs)
+            return cached_reverse(view_name, kwargs=kwargs, request=request, format=format)
+        return convert
+
+    def get_datetime_converter(self, field):
+        """This method returns function formatting datetime in iso format with timezone of field"""
+        output_format = getattr(field, "format", api_settings.DATETIME_FORMAT)
+        field_timezone = field.timezone if hasattr(field, "timezone") else field.default_timezone()
+        if output_format is None or output_format.lower() != ISO_8601 or field_timezone is None:
+            return lambda value: field.to_representation(value) if value else None
+
+        def convert(value):
+            if not value:
+                return None
+            if not timezone.is_aware(value):
+                return field.to_representation(value)
+            value = value.astimezone(field_timezone).isoformat()
+            return value[:-6] + "Z" if value.endswith("+00:00") else value
+        return convert
+
+    def bind(self, serializer):
+        """This method returns row to dict function using request and timezone of current serializer context"""
+        namespace = {f"convert_{index}": self.get_converter(field, serializer.context)
+                     for index, field in enumerate(serializer.fields.values())}
+        return eval(self.code, namespace)
+
+def get_compiled_serializer(serializer):
+    """This function is used for getting compiled version of serializer instance
+    :params:
+        serializer: "serializer instance with fields and context of current request"
+    :return:
+        tuple of values() column names and row to dict function, None when serializer can not be compiled
+    """
+    key = (type(serializer), tuple(serializer.fields))
+    compiled = _compiled_serializers.get(key)
+    if compiled is None:
+        compiled = _compiled_serializers[key] = CompiledSerializer(serializer)
+    if not compiled.supported:
+        return None
+    return compiled.columns, compiled.bind(serializer)
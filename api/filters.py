@@ -0,0 +1,129 @@
+from datetime import datetime, time
+from django.db import connection
+from django.db.models import Q, F
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+from .models import PurchaseOrder, PurchaseOrderItem
+
+def get_datetime_param(request, name):
+    """This function is used for reading datetime or date value from query parameter
+    :params:
+        request: "current request object"
+        name: "query parameter name"
+    :return:
+        timezone aware datetime object or None if parameter is not passed
+    """
+    value = request.query_params.get(name)
+    if not value:
+        return None
+
+    try:
+        result = parse_datetime(value)
+        if result is None and parse_date(value) is not None:
+            result = datetime.combine(parse_date(value), time.min)
+    except ValueError:
+        result = None
+
+    if result is None:
+        raise ValidationError({name: ["Enter a valid date or datetime."]})
+    if timezone.is_naive(result):
+        result = timezone.make_aware(result)
+    return result
+
+def get_int_param(request, name, default, min_value=None, max_value=None):
+    """This function is used for reading integer value from query parameter
+    :params:
+        request: "current request object"
+        name: "query parameter name"
+        default: "value returned when parameter is not passed"
+        min_value: "smallest allowed value or None"
+        max_value: "largest allowed value or None"
+    :return:
+        int value
+    """
+    value = request.query_params.get(name)
+    if not value:
+        return default
+
+    try:
+        result = int(value)
+    except ValueError:
+        raise ValidationError({name: ["A valid integer is required."]})
+    if min_value is not None and result < min_value:
+        raise ValidationError({name: [f"Ensure this value is greater than or equal to {min_value}."]})
+    if max_value is not None and result > max_value:
+        raise ValidationError({name: [f"Ensure this value is less than or equal to {max_value}."]})
+    return result
+
+def get_bool_param(request, name):
+    """This function is used for reading true or false value from query parameter
+    :params:
+        request: "current request object"
+        name: "query parameter name"
+    :return:
+        bool value or None if parameter is not passed
+    """
+    value = request.query_params.get(name)
+    if not value:
+        return None
+    if value.lower() in ("true", "1"):
+        return True
+    if value.lower() in ("false", "0"):
+        return False
+    raise ValidationError({name: ["Must be a valid boolean."]})
+
+def get_overdue_condition(now):
+    """This function returns condition of overdue purchase orders, orders delivered late or pending past due date
+    :params:
+        now: "current datetime"
+    :return:
+        Q object
+    """
+    late = Q(delivery_date__gt=F("expected_delivery_date"))
+    past_due = Q(status="pending", expected_delivery_date__lt=now)
+    if connection.vendor == "sqlite":
+        #sqlite does not use indexes for OR of conditions comparing columns so each part is read from its own index
+        return (Q(pk__in=PurchaseOrder.objects.filter(late).values("pk"))
+                | Q(pk__in=PurchaseOrder.objects.filter(past_due).values("pk")))
+    return late | past_due
+
+class PurchaseOrderFilter(BaseFilterBackend):
+    """
+    This class is filter backend of purchase order list, it filters by `vendor`, `status` (comma separated),
+    `<date field>_from` (inclusive) and `<date field>_to` (exclusive) date ranges, `overdue` flag and `item` sku,
+    each filter is served by an index of PurchaseOrder or PurchaseOrderItem model
+    """
+    date_fields = ("order_date", "expected_delivery_date", "delivery_date", "acknowledgment_date")
+    statuses = [status for status, label in PurchaseOrder.STATUS_CONSTANTS]
+
+    def filter_queryset(self, request, queryset, view):
+        vendor = request.query_params.get("vendor")
+        if vendor:
+            queryset = queryset.filter(vendor_id=vendor)
+
+        if request.query_params.get("status"):
+            statuses = [status.strip() for status in request.query_params["status"].split(",") if status.strip()]
+            unknown_statuses = set(statuses) - set(self.statuses)
+            if unknown_statuses:
+                raise ValidationError({"status": [f"Select one of: {', '.join(self.statuses)}"]})
+            queryset = queryset.filter(status=statuses[0]) if len(statuses) == 1 else queryset.filter(status__in=statuses)
+
+        for field in self.date_fields:
+            date_from, date_to = get_datetime_param(request, f"{field}_from"), get_datetime_param(request, f"{field}_to")
+            if date_from is not None:
+                queryset = queryset.filter(**{f"{field}__gte": date_from})
+            if date_to is not None:
+                queryset = queryset.filter(**{f"{field}__lt": date_to})
+
+        item = request.query_params.get("item")
+        if item:
+            #orders are read from sku index of line items
+            queryset = queryset.filter(pk__in=PurchaseOrderItem.objects.filter(sku=item).values("purchase_order_id"))
+
+        overdue = get_bool_param(request, "overdue")
+        if overdue is not None:
+            condition = get_overdue_condition(timezone.now())
+            queryset = queryset.filter(condition) if overdue else queryset.exclude(condition)
+        return queryset
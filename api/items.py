@@ -0,0 +1,64 @@
+from numbers import Number
+from .models import PurchaseOrderItem
+
+# keys of item json which contain quantity, "qtn" is used by existing orders
+QUANTITY_KEYS = ("qtn", "qty", "quantity")
+SKU_MAX_LENGTH = PurchaseOrderItem._meta.get_field("sku").max_length
+
+def get_number(values, keys):
+    """This function returns first numeric value of keys in dict or None"""
+    for key in keys:
+        value = values.get(key)
+        if isinstance(value, Number) and not isinstance(value, bool):
+            return value
+    return None
+
+def get_item_entries(items):
+    """This function is used for reading entries of items json of purchase order, items are stored as
+    {"sku": {"qtn": 2, "price": 10}} or as list of {"sku": "sku", "qtn": 2, "price": 10}, entries without sku are skipped
+    :params:
+        items: "items json of purchase order"
+    :return:
+        list of tuples of sku text and values of item
+    """
+    if isinstance(items, dict):
+        entries = items.items()
+    elif isinstance(items, list):
+        entries = [(item.get("sku"), item) for item in items if isinstance(item, dict)]
+    else:
+        entries = []
+    return [(str(sku), values) for sku, values in entries if sku is not None and str(sku) != ""]
+
+def parse_items(items):
+    """This function is used for reading line items from items json of purchase order, values which are not dict are
+    kept as items without quantity and price
+    :params:
+        items: "items json of purchase order"
+    :return:
+        dict with sku as key and tuple of quantity and price as value
+    """
+    line_items = {}
+    for sku, values in get_item_entries(items):
+        values = values if isinstance(values, dict) else {}
+        line_items[sku] = (get_number(values, QUANTITY_KEYS), get_number(values, ("price",)))
+    return line_items
+
+def get_line_items(po_number, items):
+    """This function returns unsaved line item objects of purchase order"""
+    return [PurchaseOrderItem(purchase_order_id=po_number, sku=sku, quantity=quantity, price=price)
+            for sku, (quantity, price) in parse_items(items).items()]
+
+def replace_line_items(orders, created=False, batch_size=1000):
+    """This function is used for replacing stored line items of purchase orders with items of their json
+    :params:
+        orders: "list of tuples of purchase order number and items json"
+        created: "True for new orders which have no stored line items"
+        batch_size: "number of rows inserted in one query"
+    :return:
+        number of created line items
+    """
+    if not created:
+        PurchaseOrderItem.objects.filter(purchase_order_id__in=[po_number for po_number, items in orders]).delete()
+    line_items = [line_item for po_number, items in orders for line_item in get_line_items(po_number, items)]
+    PurchaseOrderItem.objects.bulk_create(line_items, batch_size=batch_size)
+    return len(line_items)
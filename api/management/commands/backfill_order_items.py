@@ -0,0 +1,32 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from api.models import PurchaseOrder
+from api.items import replace_line_items
+
+class Command(BaseCommand):
+    """
+    This command is used for creating line items of existing purchase orders from their items json, orders are read
+    in primary key order and line items of each batch are replaced in its own short transaction
+    """
+    help = "Create line item rows of existing purchase orders from their items json"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Number of orders processed in one transaction")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        orders = line_items = 0
+        last_po_number = ""
+        while True:
+            #keyset batches so each batch is single range read of primary key
+            batch = list(PurchaseOrder.objects.filter(po_number__gt=last_po_number).order_by("po_number")
+                         .values_list("po_number", "items")[:options["batch_size"]])
+            if not batch:
+                break
+            with transaction.atomic():
+                line_items += replace_line_items(batch, batch_size=options["batch_size"])
+            orders += len(batch)
+            last_po_number = batch[-1][0]
+
+        self.stdout.write(f"Created {line_items} line items of {orders} purchase orders in {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from api.benchmarks import run_benchmarks, format_results
+
+class Command(BaseCommand):
+    """
+    This command is used for measuring latency and number of queries of main api's on synthetic data,
+    data is created in a temporary test database which is removed after the run
+    """
+    help = "Benchmark api's on synthetic vendors and purchase orders"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--vendors", type=int, default=10, help="Number of seeded vendors")
+        parser.add_argument("--orders", type=int, default=1000, help="Number of seeded purchase orders (1000 to 1000000)")
+        parser.add_argument("--iterations", type=int, default=100, help="Number of measured calls for each api")
+        parser.add_argument("--seed", type=int, default=0, help="Seed of random data generator")
+        parser.add_argument("--output", help="Path of json file for results, results are printed when not passed")
+
+    def handle(self, *args, **options):
+        old_name = connection.settings_dict["NAME"]
+        setup_test_environment()
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            results = run_benchmarks(vendor_count=options["vendors"], order_count=options["orders"],
+                                     iterations=options["iterations"], seed=options["seed"])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                output.write(format_results(results))
+            self.stdout.write(f"Benchmark results saved to {options['output']}")
+        else:
+            self.stdout.write(format_results(results))
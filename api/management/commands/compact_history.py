@@ -0,0 +1,69 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Avg, Max, Count
+from django.db.models.functions import TruncDay, TruncWeek
+from django.utils import timezone
+from api.models import HistoricalPerformance
+from api.metrics import VENDOR_METRIC_FIELDS
+
+class Command(BaseCommand):
+    """
+    This command is used for rolling old vendor performance history into daily and weekly records based on
+    HISTORY_RETENTION setting, each batch of groups is compacted in its own short transaction
+    """
+    help = "Roll old vendor performance history into per day and per week records"
+
+    # source granularity, target granularity, bucket function, bucket length and retention setting
+    stages = (
+        ("raw", "day", TruncDay, timedelta(days=1), "RAW_DAYS"),
+        ("day", "week", TruncWeek, timedelta(weeks=1), "DAILY_DAYS"),
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100, help="Number of vendor buckets compacted in one transaction")
+        parser.add_argument("--dry-run", action="store_true", help="Only report records which would be compacted")
+
+    def get_cutoff(self, now, days, bucket_length):
+        """This method returns start of the bucket containing retention limit so only complete buckets are compacted"""
+        limit = timezone.localtime(now - timedelta(days=days)).replace(hour=0, minute=0, second=0, microsecond=0)
+        if bucket_length == timedelta(weeks=1):
+            limit -= timedelta(days=limit.weekday())
+        return limit
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        for source, target, trunc, bucket_length, setting in self.stages:
+            cutoff = self.get_cutoff(now, settings.HISTORY_RETENTION[setting], bucket_length)
+            groups = list(HistoricalPerformance.objects.filter(granularity=source, date__lt=cutoff).annotate(
+                bucket=trunc("date")).values_list("vendor_id", "bucket").distinct().order_by("vendor_id", "bucket"))
+
+            if options["dry_run"]:
+                count = HistoricalPerformance.objects.filter(granularity=source, date__lt=cutoff).count()
+                self.stdout.write(f"{count} {source} records in {len(groups)} buckets would be rolled into {target} records")
+                continue
+
+            compacted = 0
+            for start in range(0, len(groups), options["batch_size"]):
+                with transaction.atomic():
+                    for vendor_id, bucket in groups[start:start + options["batch_size"]]:
+                        compacted += self.compact_bucket(vendor_id, source, target, bucket, min(bucket + bucket_length, cutoff))
+            self.stdout.write(f"Rolled {compacted} {source} records into {len(groups)} {target} records")
+
+    def compact_bucket(self, vendor_id, source, target, date_from, date_to):
+        """This method replaces history records of vendor in given period with one summary record"""
+        records = HistoricalPerformance.objects.filter(vendor_id=vendor_id, granularity=source,
+                                                       date__gte=date_from, date__lt=date_to)
+        summary = records.aggregate(last_date=Max("date"), count=Count("id"),
+                                    **{field: Avg(field) for field in VENDOR_METRIC_FIELDS})
+        if not summary["count"]:
+            return 0
+
+        #counters are cumulative so latest counters are kept for the period
+        json_data = records.order_by("-date").values_list("json_data", flat=True).first()
+        HistoricalPerformance.objects.create(vendor_id=vendor_id, date=summary["last_date"], granularity=target,
+                                             json_data=json_data,
+                                             **{field: round(summary[field],2) for field in VENDOR_METRIC_FIELDS})
+        records.delete()
+        return summary["count"]
@@ -0,0 +1,33 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError
+from api.metrics import process_metric_events
+
+class Command(BaseCommand):
+    """This command is used for applying vendor metric changes stored in outbox table"""
+    help = "Apply vendor metric changes stored in outbox table by purchase order updates"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500, help="Maximum number of events applied in one transaction")
+        parser.add_argument("--interval", type=float, default=1.0, help="Seconds to wait when outbox is empty")
+        parser.add_argument("--once", action="store_true", help="Exit once outbox is empty")
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            try:
+                processed = process_metric_events(options["batch_size"])
+            except DatabaseError as e:
+                #batch is rolled back and events are retried in next iteration
+                self.stderr.write(f"Failed to process metric events, message: {e}")
+                processed = 0
+                time.sleep(options["interval"])
+
+            total += processed
+            if processed:
+                continue
+            if options["once"]:
+                break
+            time.sleep(options["interval"])
+
+        self.stdout.write(f"Processed {total} metric events")
@@ -0,0 +1,81 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from api.models import Vendor
+from api.metrics import recompute_vendor_metrics, diff_vendor_metrics
+from api.transactions import atomic_with_retry
+
+def setup_worker():
+    """This function is used for preparing django in worker process, it is needed when processes are spawned"""
+    django.setup()
+
+def rebuild_chunk(vendor_ids):
+    """This function is used for recalculating counters, metrics and score of chunk of vendors in one transaction"""
+    atomic_with_retry(lambda: recompute_vendor_metrics(vendor_ids))
+    return vendor_ids
+
+def verify_chunk(vendor_ids):
+    """This function is used for finding differences between stored and recalculated metrics of chunk of vendors"""
+    return diff_vendor_metrics(vendor_ids)
+
+class Command(BaseCommand):
+    """
+    This command is used for recalculating counters, metrics and score of vendors from purchase orders, each chunk of
+    vendors is recalculated with one grouped query and written with bulk updates in its own transaction, chunks are
+    processed by pool of worker processes
+    """
+    help = "Recalculate vendor metric counters, metrics and performance score from purchase orders"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--vendor", action="append", default=[], help="Vendor code, can be passed many times (default all vendors)")
+        parser.add_argument("--workers", type=int, default=1, help="Number of worker processes")
+        parser.add_argument("--chunk-size", type=int, default=500, help="Number of vendors recalculated in one transaction")
+        parser.add_argument("--verify", action="store_true", help="Only report differences between stored and recalculated values")
+
+    def get_vendor_ids(self, vendor_ids):
+        """This method returns vendor codes to rebuild, all vendors when no vendor is passed"""
+        if not vendor_ids:
+            return list(Vendor.objects.order_by("vendor_code").values_list("vendor_code", flat=True))
+        existing = set(Vendor.objects.filter(vendor_code__in=vendor_ids).values_list("vendor_code", flat=True))
+        missing = [vendor_id for vendor_id in vendor_ids if vendor_id not in existing]
+        if missing:
+            raise CommandError(f"Vendors does not exist: {', '.join(missing)}")
+        return list(dict.fromkeys(vendor_ids))
+
+    def map_chunks(self, func, chunks, workers):
+        """This method calls function for each chunk in worker processes or in current process for single worker"""
+        if workers <= 1:
+            yield from map(func, chunks)
+            return
+        #connections are not shared with forked workers, each worker opens its own connection
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=setup_worker) as executor:
+            yield from executor.map(func, chunks)
+
+    def handle(self, *args, **options):
+        if options["workers"] < 1 or options["chunk_size"] < 1:
+            raise CommandError("--workers and --chunk-size must be positive")
+        vendor_ids = self.get_vendor_ids(options["vendor"])
+        chunks = [vendor_ids[start:start + options["chunk_size"]] for start in range(0, len(vendor_ids), options["chunk_size"])]
+
+        start = time.perf_counter()
+        if options["verify"]:
+            differences = 0
+            for diffs in self.map_chunks(verify_chunk, chunks, options["workers"]):
+                for vendor_id, fields in diffs.items():
+                    changes = ", ".join(f"{field}: {stored} -> {value}" for field, (stored, value) in fields.items())
+                    self.stdout.write(f"{vendor_id}: {changes}")
+                differences += len(diffs)
+            self.stdout.write(f"{differences} of {len(vendor_ids)} vendors differ from purchase orders")
+            return
+
+        rebuilt = 0
+        for chunk in self.map_chunks(rebuild_chunk, chunks, options["workers"]):
+            rebuilt += len(chunk)
+            if options["verbosity"] > 1:
+                self.stdout.write(f"Rebuilt {rebuilt} of {len(vendor_ids)} vendors")
+        seconds = time.perf_counter() - start
+        self.stdout.write(f"Rebuilt metrics of {rebuilt} vendors in {len(chunks)} chunks in {seconds:.2f}s "
+                          f"({rebuilt / seconds if seconds else 0:.0f} vendors/s)")
@@ -0,0 +1,334 @@
+import math
+from datetime import datetime
+from django.conf import settings
+from django.db import transaction, DatabaseError
+from django.utils import timezone
+from django.db.models import Q, Count, Sum, DurationField, ExpressionWrapper, F
+from .models import Vendor, PurchaseOrder, HistoricalPerformance, VendorMetricCounter, MetricEvent
+from .cache import invalidate_vendor_cache
+
+# purchase order fields which are used for calculating vendor metrics
+METRIC_FIELDS = PurchaseOrder.METRIC_FIELDS
+
+# counter columns of VendorMetricCounter model
+COUNTER_FIELDS = ("total_orders", "completed_orders", "on_time_completed_orders", "quality_rating_sum",
+                  "quality_rating_count", "response_time_sum", "response_time_count")
+
+# metric columns of Vendor model
+VENDOR_METRIC_FIELDS = ("on_time_delivery_rate", "quality_rating_avg", "average_response_time", "fulfillment_rate")
+
+def get_metric_values(order):
+    """This function is used for reading metric related field values from purchase order object
+    :params:
+        order: "purchase order object"
+    :return:
+        dict with metric field name as key and field value as value
+    """
+    values = {field: getattr(order, field) for field in METRIC_FIELDS}
+    #vendor code of unsaved vendor may be uuid object while stored code is string
+    values["vendor_id"] = PurchaseOrder._meta.get_field("vendor").to_python(values["vendor_id"])
+    for field, value in values.items():
+        #unsaved naive datetimes are stored in default timezone by django so they are compared the same way
+        if isinstance(value, datetime) and timezone.is_naive(value):
+            values[field] = timezone.make_aware(value)
+    return values
+
+def get_metric_contribution(values):
+    """This function is used for calculating counter values contributed by a single purchase order
+    :params:
+        values: "dict of metric field values of purchase order or None for missing order"
+    :return:
+        dict with counter name as key and contribution of order as value
+    """
+    contribution = dict.fromkeys(COUNTER_FIELDS, 0)
+    if values is None:
+        return contribution
+
+    contribution["total_orders"] = 1
+    if values["status"] == "completed":
+        contribution["completed_orders"] = 1
+        if values["delivery_date"] and values["delivery_date"] <= values["expected_delivery_date"]:
+            contribution["on_time_completed_orders"] = 1
+        if values["quality_rating"] is not None:
+            contribution["quality_rating_sum"] = values["quality_rating"]
+            contribution["quality_rating_count"] = 1
+
+    #null acknowledgment dates are ignored
+    if values["acknowledgment_date"] and values["issue_date"]:
+        contribution["response_time_sum"] = (values["acknowledgment_date"] - values["issue_date"]).total_seconds()
+        contribution["response_time_count"] = 1
+    return contribution
+
+def get_metric_deltas(before, after):
+    """This function is used for calculating counter changes of vendors from before and after state of purchase order
+    :params:
+        before: "dict of metric field values before saving or None for new order"
+        after: "dict of metric field values after saving or None for deleted order"
+    :return:
+        dict with vendor code as key and dict of counter deltas as value, vendors without any change are skipped
+    """
+    deltas = {}
+    for values, sign in ((before, -1), (after, 1)):
+        if values is None:
+            continue
+        vendor_deltas = deltas.setdefault(values["vendor_id"], dict.fromkeys(COUNTER_FIELDS, 0))
+        for counter, value in get_metric_contribution(values).items():
+            vendor_deltas[counter] += sign * value
+
+    return {vendor_id: vendor_deltas for vendor_id, vendor_deltas in deltas.items() if any(vendor_deltas.values())}
+
+def get_vendor_counter_queryset(vendor_ids):
+    """This function is used for creating grouped query which calculates counters of vendors from purchase orders,
+    all used columns are part of po_vendor_metrics_idx index so rows of purchase order table are not read
+    :params:
+        vendor_ids: "list of vendor codes"
+    :return:
+        queryset of dicts with vendor code and counter values
+    """
+    completed = Q(status="completed")
+    return PurchaseOrder.objects.filter(vendor_id__in=vendor_ids).values("vendor_id").annotate(
+        total_orders=Count("vendor_id"),
+        completed_orders=Count("vendor_id", filter=completed),
+        on_time_completed_orders=Count("vendor_id", filter=completed & Q(delivery_date__lte=F("expected_delivery_date"))),
+        quality_rating_sum=Sum("quality_rating", filter=completed),
+        quality_rating_count=Count("quality_rating", filter=completed),
+        response_time_sum=Sum(ExpressionWrapper(F("acknowledgment_date") - F("issue_date"), output_field=DurationField())),
+        response_time_count=Count("acknowledgment_date"),
+    ).order_by()
+
+def aggregate_vendor_counters(vendor_ids):
+    """This function is used for calculating counters of vendors from purchase orders with single grouped query
+    :params:
+        vendor_ids: "list of vendor codes"
+    :return:
+        dict with vendor code as key and dict of counter values as value
+    """
+    rows = get_vendor_counter_queryset(vendor_ids)
+
+    counters = {str(vendor_id): dict.fromkeys(COUNTER_FIELDS, 0) for vendor_id in vendor_ids}
+    for row in rows:
+        vendor_counters = counters[row.pop("vendor_id")]
+        vendor_counters.update(row)
+        vendor_counters["quality_rating_sum"] = row["quality_rating_sum"] or 0
+        vendor_counters["response_time_sum"] = row["response_time_sum"].total_seconds() if row["response_time_sum"] else 0
+    return counters
+
+def calculate_vendor_metrics(counter):
+    """This function is used for calculating vendor metrics from metric counters
+    :params:
+        counter: "vendor metric counter object"
+    :return:
+        dict with vendor metric field name as key and metric as value
+    """
+    return {
+        "on_time_delivery_rate": (round(counter.on_time_completed_orders/counter.completed_orders,2)
+                                  if counter.completed_orders else 0),
+        "quality_rating_avg": (round(counter.quality_rating_sum/counter.quality_rating_count,2)
+                               if counter.quality_rating_count else 0),
+        "average_response_time": (round(counter.response_time_sum/counter.response_time_count/(60*60),2)
+                                  if counter.response_time_count else 0),
+        "fulfillment_rate": (round(counter.completed_orders/counter.total_orders,2)
+                             if counter.total_orders else 0),
+    }
+
+def calculate_performance_score(metrics, response_time_count):
+    """This function is used for calculating weighted performance score of vendor used by vendor rankings
+    :params:
+        metrics: "dict of vendor metrics"
+        response_time_count: "number of acknowledged orders, vendors without them get no response time score"
+    :return:
+        score from 0 to 100
+    """
+    weights, response_time_hours = settings.VENDOR_SCORE["WEIGHTS"], settings.VENDOR_SCORE["RESPONSE_TIME_HOURS"]
+    scaled = {
+        "on_time_delivery_rate": metrics["on_time_delivery_rate"],
+        "quality_rating_avg": metrics["quality_rating_avg"] / settings.DEFAULT_QUALITY_RATING_MAX_VALUE,
+        "average_response_time": (response_time_hours / (response_time_hours + metrics["average_response_time"])
+                                  if response_time_count else 0),
+        "fulfillment_rate": metrics["fulfillment_rate"],
+    }
+    return round(100 * sum(weight * scaled[field] for field, weight in weights.items()) / sum(weights.values()), 2)
+
+def get_history_json_data(counter):
+    """This function is used for creating json data of historical performance record from metric counters"""
+    return {
+        "on_time_completed_count": counter.on_time_completed_orders,
+        "on_time_total_completed_order": counter.completed_orders,
+        "qtn_rate_avg_sum_of_all": counter.quality_rating_sum,
+        "qtn_rate_avg_total_count": counter.quality_rating_count,
+        "avrage_response_time_sum_of_all": round(counter.response_time_sum/(60*60),2),
+        "avrage_response_time_total_count": counter.response_time_count,
+        "fullfilment_rate_total_orders": counter.total_orders,
+        "fullfilment_rate_total_completed_order": counter.completed_orders,
+    }
+
+def apply_metric_deltas(vendor_id, deltas):
+    """This function is used for updating metric counters of vendor with atomic deltas and refreshing vendor metrics
+    :params:
+        vendor_id: "vendor code"
+        deltas: "dict with counter name as key and change as value"
+    :return:
+        dict of new vendor metrics
+    """
+    with transaction.atomic(savepoint=False):
+        changes = {counter: F(counter) + value for counter, value in deltas.items() if value}
+
+        def update_counter():
+            counters = VendorMetricCounter.objects.filter(vendor_id=vendor_id)
+            #update locks counter row so other writers of same vendor wait until this transaction ends, without changes
+            #only existence of counter is checked
+            return counters.update(**changes) if changes else counters.exists()
+
+        updated = update_counter()
+        if not updated:
+            #vendor row is locked so missing counter is created by only one writer
+            list(Vendor.objects.select_for_update().filter(vendor_code=vendor_id).values_list("pk"))
+            updated = update_counter()
+        if not updated:
+            #vendor has no counter yet so creating it from purchase orders which already includes current change
+            VendorMetricCounter.objects.create(vendor_id=vendor_id, **aggregate_vendor_counters([vendor_id])[vendor_id])
+        return refresh_vendor_metrics(vendor_id)
+
+def refresh_vendor_metrics(vendor_id):
+    """This function is used for saving vendor metrics calculated from metric counters along with history record,
+    it is called inside transaction and counter row stays locked until the transaction ends
+    :params:
+        vendor_id: "vendor code"
+    :return:
+        dict of new vendor metrics
+    """
+    counter = VendorMetricCounter.objects.select_for_update(of=("self",)).select_related("vendor").only(
+        *COUNTER_FIELDS, *[f"vendor__{field}" for field in (*VENDOR_METRIC_FIELDS, "performance_score")]
+    ).get(vendor_id=vendor_id)
+    metrics = calculate_vendor_metrics(counter)
+    performance_score = calculate_performance_score(metrics, counter.response_time_count)
+    #vendor and history are not written when change in counters does not change any metric or score
+    if {**metrics, "performance_score": performance_score} != {
+            field: getattr(counter.vendor, field) for field in (*VENDOR_METRIC_FIELDS, "performance_score")}:
+        Vendor.objects.filter(vendor_code=vendor_id).update(performance_score=performance_score, **metrics)
+        HistoricalPerformance.objects.create(vendor_id=vendor_id, json_data=get_history_json_data(counter), **metrics)
+        invalidate_vendor_cache([vendor_id])
+    return metrics
+
+def recompute_vendor_metrics(vendor_ids):
+    """This function is used for recalculating counters and metrics of vendors from purchase orders with set based
+    queries, it is used after bulk writes which do not send signals
+    :params:
+        vendor_ids: "list of existing vendor codes"
+    :return:
+        dict with vendor code as key and dict of new vendor metrics as value
+    """
+    vendor_ids = list({str(vendor_id) for vendor_id in vendor_ids})
+    if not vendor_ids:
+        return {}
+
+    with transaction.atomic():
+        if settings.VENDOR_METRICS_MODE == "outbox":
+            #vendors are locked so outbox changes of orders can not be committed until orders are aggregated, otherwise
+            #change committed after deleting events would be counted by aggregation and again by metrics worker
+            list(Vendor.objects.select_for_update().filter(vendor_code__in=vendor_ids).order_by("pk").values_list("pk"))
+        #pending outbox changes of these vendors are already part of recalculated counters
+        MetricEvent.objects.filter(vendor_id__in=vendor_ids).delete()
+
+        #counters are locked before reading orders so deltas of concurrent order saves are applied after this update
+        existing_counters = VendorMetricCounter.objects.select_for_update().order_by("pk").in_bulk(vendor_ids)
+        counters = []
+        for vendor_id, values in aggregate_vendor_counters(vendor_ids).items():
+            counter = existing_counters.get(vendor_id, VendorMetricCounter(vendor_id=vendor_id))
+            for field, value in values.items():
+                setattr(counter, field, value)
+            counters.append(counter)
+        VendorMetricCounter.objects.bulk_update([counter for counter in counters if counter.pk in existing_counters],
+                                                COUNTER_FIELDS, batch_size=500)
+        VendorMetricCounter.objects.bulk_create([counter for counter in counters if counter.pk not in existing_counters],
+                                                batch_size=500)
+
+        metrics = {counter.vendor_id: calculate_vendor_metrics(counter) for counter in counters}
+        scores = {counter.vendor_id: calculate_performance_score(metrics[counter.vendor_id], counter.response_time_count)
+                  for counter in counters}
+        stored_metrics = {row.pop("vendor_code"): row for row in Vendor.objects.filter(vendor_code__in=vendor_ids).values(
+            "vendor_code", *VENDOR_METRIC_FIELDS, "performance_score")}
+        #vendor and history are only written for vendors with changed metrics or score
+        changed = [counter for counter in counters if {**metrics[counter.vendor_id], "performance_score": scores[counter.vendor_id]}
+                   != stored_metrics.get(counter.vendor_id)]
+        Vendor.objects.bulk_update([Vendor(vendor_code=counter.vendor_id, performance_score=scores[counter.vendor_id],
+                                           **metrics[counter.vendor_id]) for counter in changed],
+                                   (*VENDOR_METRIC_FIELDS, "performance_score"), batch_size=500)
+        HistoricalPerformance.objects.bulk_create([
+            HistoricalPerformance(vendor_id=counter.vendor_id, json_data=get_history_json_data(counter), **metrics[counter.vendor_id])
+            for counter in changed], batch_size=500)
+        invalidate_vendor_cache([counter.vendor_id for counter in changed])
+    return metrics
+
+def diff_vendor_metrics(vendor_ids):
+    """This function is used for comparing stored counters, metrics and score of vendors with values recalculated from
+    purchase orders, nothing is written
+    :params:
+        vendor_ids: "list of existing vendor codes"
+    :return:
+        dict with vendor code as key and dict of field name with tuple of stored and recalculated value as value,
+        vendors without differences are skipped
+    """
+    vendor_ids = [str(vendor_id) for vendor_id in vendor_ids]
+    stored_counters = {row.pop("vendor_id"): row for row in
+                       VendorMetricCounter.objects.filter(vendor_id__in=vendor_ids).values("vendor_id", *COUNTER_FIELDS)}
+    stored_metrics = {row.pop("vendor_code"): row for row in Vendor.objects.filter(vendor_code__in=vendor_ids).values(
+        "vendor_code", *VENDOR_METRIC_FIELDS, "performance_score")}
+
+    diffs = {}
+    for vendor_id, values in aggregate_vendor_counters(vendor_ids).items():
+        counter = VendorMetricCounter(vendor_id=vendor_id, **values)
+        metrics = calculate_vendor_metrics(counter)
+        expected = {**values, **metrics, "performance_score": calculate_performance_score(metrics, counter.response_time_count)}
+        #missing counter is reported with None values
+        stored = {**stored_counters.get(vendor_id, dict.fromkeys(COUNTER_FIELDS)), **stored_metrics[vendor_id]}
+        vendor_diffs = {field: (stored[field], value) for field, value in expected.items()
+                        if stored[field] is None or not math.isclose(stored[field], value, rel_tol=1e-9, abs_tol=1e-6)}
+        if vendor_diffs:
+            diffs[vendor_id] = vendor_diffs
+    return diffs
+
+def handle_metric_deltas(po_number, changed_fields, vendor_deltas):
+    """This function is used for applying counter deltas directly or storing them in outbox based on metrics mode
+    :params:
+        po_number: "purchase order number which made the changes"
+        changed_fields: "list of changed metric fields of purchase order"
+        vendor_deltas: "dict with vendor code as key and dict of counter deltas as value"
+    """
+    if settings.VENDOR_METRICS_MODE == "outbox":
+        MetricEvent.objects.bulk_create([
+            MetricEvent(vendor_id=vendor_id, po_number=po_number, changed_fields=sorted(changed_fields), deltas=deltas)
+            for vendor_id, deltas in vendor_deltas.items()])
+    else:
+        #counters are locked in same order by all writers so order moved between vendors can not deadlock
+        for vendor_id in sorted(vendor_deltas):
+            apply_metric_deltas(vendor_id, vendor_deltas[vendor_id])
+
+def process_metric_events(batch_size=500):
+    """This function is used for applying a batch of outbox events, events of same vendor are combined into one update
+    and events are deleted in the same transaction so each event is applied only once
+    :params:
+        batch_size: "maximum number of events processed in one transaction"
+    :return:
+        number of processed events
+    """
+    with transaction.atomic():
+        events = list(MetricEvent.objects.select_for_update(skip_locked=True).order_by("id")
+                      .values("id", "vendor_id", "deltas")[:batch_size])
+        if not events:
+            return 0
+
+        deleted, _ = MetricEvent.objects.filter(pk__in=[event["id"] for event in events]).delete()
+        if deleted != len(events):
+            raise DatabaseError("metric events were processed by another worker")
+
+        vendor_deltas = {}
+        for event in events:
+            deltas = vendor_deltas.setdefault(event["vendor_id"], dict.fromkeys(COUNTER_FIELDS, 0))
+            for counter, value in event["deltas"].items():
+                deltas[counter] += value
+
+        #changes of vendor may cancel each other out (for example order created and deleted)
+        for vendor_id in sorted(vendor_id for vendor_id, deltas in vendor_deltas.items() if any(deltas.values())):
+            apply_metric_deltas(vendor_id, vendor_deltas[vendor_id])
+    return len(events)
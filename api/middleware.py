@@ -0,0 +1,179 @@
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+logger = logging.getLogger("api.slow_requests")
+
+# histogram buckets for seconds and number of queries
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+# name, help text and buckets of each recorded histogram
+HISTOGRAMS = {
+    "api_request_duration_seconds": ("Total time of request", SECONDS_BUCKETS),
+    "api_request_db_queries": ("Number of database queries run by request", QUERY_BUCKETS),
+    "api_request_db_duration_seconds": ("Time spent in database queries by request", SECONDS_BUCKETS),
+    "api_request_render_seconds": ("Time spent rendering response data by renderer", SECONDS_BUCKETS),
+}
+
+class Histogram:
+    """This class is used for counting observed values in cumulative buckets like prometheus histograms"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0
+
+    def observe(self, value):
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+
+class MetricsRegistry:
+    """This class is used for keeping in process histograms of requests labeled by view name and method"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+
+    def observe(self, name, labels, value):
+        """This method records value in histogram of given metric name and labels"""
+        with self.lock:
+            histogram = self.histograms.get((name, labels))
+            if histogram is None:
+                histogram = self.histograms[(name, labels)] = Histogram(HISTOGRAMS[name][1])
+            histogram.observe(value)
+
+    def clear(self):
+        with self.lock:
+            self.histograms.clear()
+
+    def render(self):
+        """This method returns all histograms in prometheus text format"""
+        lines = []
+        with self.lock:
+            for name, (help_text, buckets) in HISTOGRAMS.items():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} histogram")
+                for (metric_name, labels), histogram in sorted(self.histograms.items()):
+                    if metric_name != name:
+                        continue
+                    label_text = ",".join(f'{key}="{value}"' for key, value in labels)
+                    for bound, count in zip(buckets, histogram.counts):
+                        lines.append(f'{name}_bucket{{{label_text},le="{bound}"}} {count}')
+                    lines.append(f'{name}_bucket{{{label_text},le="+Inf"}} {histogram.count}')
+                    lines.append(f"{name}_sum{{{label_text}}} {histogram.sum}")
+                    lines.append(f"{name}_count{{{label_text}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+registry = MetricsRegistry()
+
+class QueryTracker:
+    """This class is database execute wrapper used for counting queries and their time, sql is kept when needed"""
+
+    def __init__(self, keep_sql=False):
+        self.keep_sql = keep_sql
+        self.count = 0
+        self.duration = 0
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.count += 1
+            self.duration += duration
+            if self.keep_sql:
+                self.queries.append((duration, sql))
+
+# tracker of current request, context is copied to threads running sync code of async requests so queries run by
+# orm in those threads are passed to same tracker
+current_tracker = ContextVar("query_tracker", default=None)
+
+def track_queries(execute, sql, params, many, context):
+    """This function is execute wrapper of each database connection, it passes queries to tracker of current request"""
+    tracker = current_tracker.get()
+    if tracker is None:
+        return execute(sql, params, many, context)
+    return tracker(execute, sql, params, many, context)
+
+def install_query_tracking(connection):
+    """This function is used for adding track_queries wrapper to database connection of any thread once"""
+    if track_queries not in connection.execute_wrappers:
+        #first wrapper so wrappers added and removed by connection.execute_wrapper() keep their order
+        connection.execute_wrappers.insert(0, track_queries)
+
+class QueryMetricsMiddleware:
+    """
+    This middleware is used for recording number of database queries, database time, render time and
+    total time of each request in histograms labeled by view name, they are served by /api/_metrics api
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        tracker = QueryTracker(keep_sql=settings.SLOW_REQUEST_THRESHOLD_MS is not None)
+        start = time.perf_counter()
+        token = current_tracker.set(tracker)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_tracker.reset(token)
+        self.record(request, tracker, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        """
+        Async requests are measured same way so async views are not moved to thread by this middleware, queries
+        are run by orm in other threads so tracker is passed to them with context instead of connection of this thread
+        """
+        tracker = QueryTracker(keep_sql=settings.SLOW_REQUEST_THRESHOLD_MS is not None)
+        start = time.perf_counter()
+        token = current_tracker.set(tracker)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_tracker.reset(token)
+        self.record(request, tracker, time.perf_counter() - start)
+        return response
+
+    def record(self, request, tracker, duration):
+        """This method records measured request in histograms and logs slow request"""
+        slow_request_threshold = settings.SLOW_REQUEST_THRESHOLD_MS
+        view_name = request.resolver_match.view_name if request.resolver_match else "unmatched"
+        labels = (("view", view_name), ("method", request.method))
+        registry.observe("api_request_duration_seconds", labels, duration)
+        registry.observe("api_request_db_queries", labels, tracker.count)
+        registry.observe("api_request_db_duration_seconds", labels, tracker.duration)
+        registry.observe("api_request_render_seconds", labels, getattr(request, "_render_seconds", 0))
+
+        if slow_request_threshold is not None and duration * 1000 >= slow_request_threshold:
+            logger.warning("Slow request %s %s (%s) took %.1f ms with %d queries in %.1f ms:\n%s",
+                           request.method, request.path, view_name, duration * 1000, tracker.count,
+                           tracker.duration * 1000,
+                           "\n".join(f"[{query_duration * 1000:.1f} ms] {sql}" for query_duration, sql in tracker.queries))
+
+    def process_template_response(self, request, response):
+        """Api responses are rendered after this hook so rendering time is recorded with post render callback"""
+        start = time.perf_counter()
+
+        def record_render_time(rendered_response):
+            request._render_seconds = time.perf_counter() - start
+        response.add_post_render_callback(record_render_time)
+        return response
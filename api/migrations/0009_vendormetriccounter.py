@@ -0,0 +1,69 @@
+# Generated by Django 5.0 on 2026-10-18 15:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Q, Sum
+
+
+def populate_metric_counters(apps, schema_editor):
+    """This function is used for creating metric counters of existing vendors from their purchase orders"""
+    Vendor = apps.get_model("api", "Vendor")
+    PurchaseOrder = apps.get_model("api", "PurchaseOrder")
+    VendorMetricCounter = apps.get_model("api", "VendorMetricCounter")
+
+    completed = Q(status="completed")
+    rows = PurchaseOrder.objects.values("vendor_id").annotate(
+        total_orders=Count("pk"),
+        completed_orders=Count("pk", filter=completed),
+        on_time_completed_orders=Count("pk", filter=completed & Q(delivery_date__lte=F("expected_delivery_date"))),
+        quality_rating_sum=Sum("quality_rating", filter=completed),
+        quality_rating_count=Count("quality_rating", filter=completed),
+        response_time_sum=Sum(ExpressionWrapper(F("acknowledgment_date") - F("issue_date"), output_field=DurationField())),
+        response_time_count=Count("acknowledgment_date"),
+    ).order_by()
+    counters = {row.pop("vendor_id"): row for row in rows}
+
+    new_counters = []
+    for vendor_code in Vendor.objects.values_list("vendor_code", flat=True):
+        values = counters.get(vendor_code, {})
+        response_time_sum = values.get("response_time_sum")
+        new_counters.append(VendorMetricCounter(
+            vendor_id=vendor_code,
+            total_orders=values.get("total_orders", 0),
+            completed_orders=values.get("completed_orders", 0),
+            on_time_completed_orders=values.get("on_time_completed_orders", 0),
+            quality_rating_sum=values.get("quality_rating_sum") or 0,
+            quality_rating_count=values.get("quality_rating_count", 0),
+            response_time_sum=response_time_sum.total_seconds() if response_time_sum else 0,
+            response_time_count=values.get("response_time_count", 0),
+        ))
+    VendorMetricCounter.objects.bulk_create(new_counters, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_historicalperformance_json_data_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VendorMetricCounter',
+            fields=[
+                ('vendor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='metric_counter', serialize=False, to='api.vendor')),
+                ('total_orders', models.IntegerField(default=0)),
+                ('completed_orders', models.IntegerField(default=0)),
+                ('on_time_completed_orders', models.IntegerField(default=0)),
+                ('quality_rating_sum', models.FloatField(default=0)),
+                ('quality_rating_count', models.IntegerField(default=0)),
+                ('response_time_sum', models.FloatField(default=0)),
+                ('response_time_count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='historicalperformance',
+            name='date',
+            field=models.DateTimeField(auto_now_add=True),
+        ),
+        migrations.RunPython(populate_metric_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.0 on 2026-10-18 15:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_vendormetriccounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MetricEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('po_number', models.CharField(max_length=10)),
+                ('changed_fields', models.JSONField(default=list)),
+                ('deltas', models.JSONField()),
+                ('created_date', models.DateTimeField(auto_now_add=True)),
+                ('vendor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='api.vendor')),
+            ],
+        ),
+    ]
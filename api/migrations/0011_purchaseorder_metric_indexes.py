@@ -0,0 +1,25 @@
+# Generated by Django 5.0 on 2026-10-18 15:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_metricevent'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='historicalperformance',
+            index=models.Index(fields=['vendor', '-date'], name='hp_vendor_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchaseorder',
+            index=models.Index(fields=['vendor', 'status', 'modified_date'], name='po_vendor_status_modified_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchaseorder',
+            index=models.Index(fields=['vendor', 'status', 'delivery_date', 'expected_delivery_date', 'quality_rating', 'acknowledgment_date', 'issue_date'], name='po_vendor_metrics_idx'),
+        ),
+    ]
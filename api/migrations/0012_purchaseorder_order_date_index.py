@@ -0,0 +1,17 @@
+# Generated by Django 5.0 on 2026-10-18 15:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_purchaseorder_metric_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='purchaseorder',
+            index=models.Index(fields=['order_date', 'po_number'], name='po_order_date_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.0 on 2026-10-18 15:23
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_purchaseorder_order_date_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='historicalperformance',
+            name='granularity',
+            field=models.CharField(choices=[('raw', 'raw'), ('day', 'day'), ('week', 'week')], default='raw', max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='historicalperformance',
+            name='date',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddIndex(
+            model_name='historicalperformance',
+            index=models.Index(fields=['granularity', 'date'], name='hp_granularity_date_idx'),
+        ),
+    ]
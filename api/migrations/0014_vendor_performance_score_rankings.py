@@ -0,0 +1,72 @@
+# Generated by Django 5.0 on 2026-10-18 15:56
+
+from django.db import migrations, models
+
+
+# score formula and settings of this migration are copied here so later changes of api.metrics do not change it
+SCORE_WEIGHTS = {
+    "on_time_delivery_rate": 0.3,
+    "quality_rating_avg": 0.3,
+    "average_response_time": 0.1,
+    "fulfillment_rate": 0.3,
+}
+RESPONSE_TIME_HOURS = 24
+QUALITY_RATING_MAX_VALUE = 10
+
+
+def calculate_performance_score(vendor, response_time_count):
+    """This function returns weighted performance score from 0 to 100 of stored vendor metrics"""
+    scaled = {
+        "on_time_delivery_rate": vendor.on_time_delivery_rate,
+        "quality_rating_avg": vendor.quality_rating_avg / QUALITY_RATING_MAX_VALUE,
+        "average_response_time": (RESPONSE_TIME_HOURS / (RESPONSE_TIME_HOURS + vendor.average_response_time)
+                                  if response_time_count else 0),
+        "fulfillment_rate": vendor.fulfillment_rate,
+    }
+    return round(100 * sum(weight * scaled[field] for field, weight in SCORE_WEIGHTS.items()) / sum(SCORE_WEIGHTS.values()), 2)
+
+
+def populate_performance_scores(apps, schema_editor):
+    """This function is used for calculating performance scores of existing vendors from their stored metrics"""
+    Vendor = apps.get_model("api", "Vendor")
+
+    vendors = list(Vendor.objects.select_related("metric_counter"))
+    for vendor in vendors:
+        response_time_count = vendor.metric_counter.response_time_count if hasattr(vendor, "metric_counter") else 0
+        vendor.performance_score = calculate_performance_score(vendor, response_time_count)
+    Vendor.objects.bulk_update(vendors, ["performance_score"], batch_size=500)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_historicalperformance_granularity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vendor',
+            name='performance_score',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='vendor',
+            index=models.Index(fields=['on_time_delivery_rate', 'vendor_code'], name='vendor_on_time_rank_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vendor',
+            index=models.Index(fields=['quality_rating_avg', 'vendor_code'], name='vendor_quality_rank_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vendor',
+            index=models.Index(fields=['average_response_time', 'vendor_code'], name='vendor_response_rank_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vendor',
+            index=models.Index(fields=['fulfillment_rate', 'vendor_code'], name='vendor_fulfillment_rank_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vendor',
+            index=models.Index(fields=['performance_score', 'vendor_code'], name='vendor_score_rank_idx'),
+        ),
+        migrations.RunPython(populate_performance_scores, migrations.RunPython.noop),
+    ]
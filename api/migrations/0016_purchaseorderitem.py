@@ -0,0 +1,31 @@
+# Generated by Django 5.0 on 2026-10-18 16:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_purchaseorder_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PurchaseOrderItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sku', models.CharField(max_length=200)),
+                ('quantity', models.FloatField(blank=True, null=True)),
+                ('price', models.FloatField(blank=True, null=True)),
+                ('purchase_order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='line_items', to='api.purchaseorder')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['sku', 'purchase_order'], name='po_item_sku_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='purchaseorderitem',
+            constraint=models.UniqueConstraint(fields=('purchase_order', 'sku'), name='po_item_order_sku_unique'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.0 on 2026-10-18 16:09
+
+from django.db import migrations, models
+
+
+# name of sequence row and first value of new sequence, copied from api.po_numbers so later changes do not change them
+PO_NUMBER_SEQUENCE = "purchase_order"
+INITIAL_VALUE = 1
+
+
+def create_po_number_sequence(apps, schema_editor):
+    """Creating sequence row of purchase order numbers, numbers of existing orders allocated from sequence are skipped"""
+    PurchaseOrder = apps.get_model("api", "PurchaseOrder")
+    PurchaseOrderSequence = apps.get_model("api", "PurchaseOrderSequence")
+    last = (PurchaseOrder.objects.filter(po_number__gte="0", po_number__lt="1").order_by("-po_number")
+            .values_list("po_number", flat=True).first())
+    PurchaseOrderSequence.objects.get_or_create(name=PO_NUMBER_SEQUENCE,
+                                                defaults={"next_value": int(last) + 1 if last and last.isdigit() else INITIAL_VALUE})
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_purchaseorderitem'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PurchaseOrderSequence',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('next_value', models.BigIntegerField(default=1)),
+            ],
+        ),
+        migrations.RunPython(create_po_number_sequence, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.0 on 2026-10-18 16:28
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_purchaseordersequence'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='purchaseorder',
+            name='po_vendor_status_modified_idx',
+        ),
+    ]
@@ -1,10 +1,15 @@
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
+import json
 import uuid
-import random
+from .transactions import atomic_with_retry, ConcurrentUpdateError
 
 def create_new_odr_number():
-      """This function is used for generating random string number"""
-      return str(random.randint(1000000000, 9999999999))
+      """This function is used for generating new purchase order number from purchase order number sequence"""
+      #allocator module uses models of this module so it is imported on first call
+      from .po_numbers import po_number_allocator
+      return po_number_allocator.get_number()
 
 class Vendor(models.Model):
     """This models is used for storing data related to vendors"""
@@ -16,6 +21,17 @@ class Vendor(models.Model):
     quality_rating_avg = models.FloatField(default=0)
     average_response_time = models.FloatField(default=0)
     fulfillment_rate = models.FloatField(default=0)
+    performance_score = models.FloatField(default=0) # weighted score of all metrics from 0 to 100
+
+    class Meta:
+        # vendor rankings are read from these indexes in metric order, vendor code orders vendors with same value
+        indexes = [
+            models.Index(fields=["on_time_delivery_rate", "vendor_code"], name="vendor_on_time_rank_idx"),
+            models.Index(fields=["quality_rating_avg", "vendor_code"], name="vendor_quality_rank_idx"),
+            models.Index(fields=["average_response_time", "vendor_code"], name="vendor_response_rank_idx"),
+            models.Index(fields=["fulfillment_rate", "vendor_code"], name="vendor_fulfillment_rank_idx"),
+            models.Index(fields=["performance_score", "vendor_code"], name="vendor_score_rank_idx"),
+        ]
     
     def __str__(self):
          return f"{self.name}: ({self.vendor_code})"
@@ -23,6 +39,9 @@ class Vendor(models.Model):
 class PurchaseOrder(models.Model):
     """This model is used for storing data related to purchase orders"""
     STATUS_CONSTANTS = [("pending","pending"),("completed","completed"),("canceled","canceled")]
+    # fields used for calculating vendor metrics, their loaded values are tracked for finding changes on save
+    METRIC_FIELDS = ("vendor_id", "status", "delivery_date", "expected_delivery_date", "quality_rating",
+                     "issue_date", "acknowledgment_date")
     po_number = models.CharField(primary_key=True, max_length=10, unique=True, default=create_new_odr_number)
     vendor = models.ForeignKey(Vendor, on_delete=models.CASCADE)
     order_date = models.DateTimeField(auto_now_add = True)
@@ -36,15 +55,203 @@ class PurchaseOrder(models.Model):
     acknowledgment_date = models.DateTimeField(null=True, blank=True)
     modified_date = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # keyset pagination of orders with latest orders first
+            models.Index(fields=["order_date", "po_number"], name="po_order_date_idx"),
+            # covering index for calculating vendor metric counters without reading table rows
+            models.Index(fields=["vendor", "status", "delivery_date", "expected_delivery_date", "quality_rating",
+                                 "acknowledgment_date", "issue_date"], name="po_vendor_metrics_idx"),
+            # list filtered by vendor or by status in pagination order
+            models.Index(fields=["vendor", "order_date", "po_number"], name="po_vendor_order_date_idx"),
+            models.Index(fields=["status", "order_date", "po_number"], name="po_status_order_date_idx"),
+            # date range filters of list, pending orders past due are read from expected delivery date range
+            models.Index(fields=["expected_delivery_date"], name="po_expected_delivery_idx"),
+            models.Index(fields=["delivery_date"], name="po_delivery_date_idx"),
+            models.Index(fields=["acknowledgment_date"], name="po_acknowledgment_date_idx"),
+            # orders delivered after expected delivery date in pagination order
+            models.Index(fields=["order_date", "po_number"], condition=models.Q(delivery_date__gt=models.F("expected_delivery_date")),
+                         name="po_late_delivery_idx"),
+        ]
+
     def __str__(self):
          return f"{self.vendor.name}: ({self.po_number})"
 
+    def save(self, *args, **kwargs):
+        """
+        Saving order inside transaction so metric changes made by signals are stored along with the order, transaction
+        is started again when it fails on lock of other writer or when other writer changed metric fields of the order
+        after it was loaded
+        """
+        adding = self._state.adding
+        #metric fields which were not loaded with the instance (for example deferred fields) are read from stored order
+        load_stored = not adding and self.get_loaded_values() is None
+
+        attempts = settings.TRANSACTION_RETRIES["ATTEMPTS"]
+        for attempt in range(1, attempts + 1):
+            loaded_values, loaded_items = getattr(self, "_loaded_values", None), getattr(self, "_loaded_items_json", None)
+
+            def save_order():
+                #state changed by failed attempt is restored so each attempt saves order same way
+                self._state.adding = adding
+                if loaded_values is not None:
+                    self.set_loaded_values(loaded_values)
+                if loaded_items is not None:
+                    self._loaded_items_json = loaded_items
+                if load_stored:
+                    self.load_stored_values()
+                super(PurchaseOrder, self).save(*args, **kwargs)
+            try:
+                return atomic_with_retry(save_order)
+            except ConcurrentUpdateError:
+                if attempt == attempts:
+                    raise
+                #changes are calculated again from values saved by other writer
+                load_stored = True
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        """
+        Updating order only when its metric fields still have loaded values, so metric changes calculated from loaded
+        values are applied once even when other writer saved same order, stored order is read only after conflict
+        """
+        loaded_values = self.get_loaded_values()
+        if loaded_values is None:
+            return super()._do_update(base_qs, using, pk_val, values, update_fields, forced_update)
+        updated = super()._do_update(base_qs.filter(**loaded_values), using, pk_val, values, update_fields, forced_update)
+        if not updated and base_qs.filter(pk=pk_val).exists():
+            raise ConcurrentUpdateError(f"Purchase order {pk_val} was changed by other writer")
+        return updated
+
+    def load_stored_values(self):
+        """This method keeps metric fields and items of stored order as loaded values without changing the instance"""
+        stored = PurchaseOrder.objects.filter(pk=self.pk).values(*self.METRIC_FIELDS, "items").first()
+        if stored is not None:
+            self._loaded_items_json = self.dump_items(stored.pop("items"))
+            self.set_loaded_values(stored)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Storing values of metric fields loaded from database for finding changes without fetching record again"""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = {name: value for name, value in zip(field_names, values)
+                                   if name in cls.METRIC_FIELDS and value is not models.DEFERRED}
+        #loaded items are kept as json text for skipping line item updates when items are not changed, text is
+        #cheaper to create than copy of items and it is not changed by changing items of instance in place
+        if "items" in field_names and values[field_names.index("items")] is not models.DEFERRED:
+            instance._loaded_items_json = cls.dump_items(values[field_names.index("items")])
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None):
+        """Storing refreshed values of metric fields and items as loaded values so next save compares with them"""
+        super().refresh_from_db(using=using, fields=fields)
+        deferred_fields = self.get_deferred_fields()
+        refreshed_fields = None if fields is None else {getattr(self._meta.get_field(name), "attname", name) for name in fields}
+
+        def is_refreshed(name):
+            return name not in deferred_fields and (refreshed_fields is None or name in refreshed_fields)
+        loaded_values = getattr(self, "_loaded_values", {})
+        loaded_values.update({name: getattr(self, name) for name in self.METRIC_FIELDS if is_refreshed(name)})
+        self.set_loaded_values(loaded_values)
+        if is_refreshed("items"):
+            self._loaded_items_json = self.dump_items(self.items)
+
+    @staticmethod
+    def dump_items(items):
+        """This method returns items json as text, keys are not sorted so items with reordered keys only replace same
+        line items again"""
+        return json.dumps(items)
+
+    def get_loaded_values(self):
+        """This method returns stored values of metric fields or None if any of them was not loaded"""
+        loaded_values = getattr(self, "_loaded_values", {})
+        if self._state.adding or len(loaded_values) != len(self.METRIC_FIELDS):
+            return None
+        return dict(loaded_values)
+
+    def set_loaded_values(self, values):
+        """This method replaces stored values of metric fields, it is called once record is saved"""
+        self._loaded_values = dict(values)
+
+    def get_changed_fields(self):
+        """This method returns set of metric fields changed since record was loaded, all fields for new records"""
+        loaded_values = self.get_loaded_values()
+        if loaded_values is None:
+            return set(self.METRIC_FIELDS)
+        return {field for field, value in loaded_values.items() if getattr(self, field) != value}
+
+class PurchaseOrderItem(models.Model):
+    """
+    This model is used for storing each item of purchase order items json as separate row, rows are replaced on each
+    change of items so orders can be searched and totalled by item with indexed queries
+    """
+    purchase_order = models.ForeignKey(PurchaseOrder, on_delete=models.CASCADE, related_name="line_items")
+    sku = models.CharField(max_length=200)
+    quantity = models.FloatField(null=True, blank=True)
+    price = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            # items json has one entry for each sku, also used as index of items of order
+            models.UniqueConstraint(fields=["purchase_order", "sku"], name="po_item_order_sku_unique"),
+        ]
+        indexes = [
+            # orders containing sku and totals of sku
+            models.Index(fields=["sku", "purchase_order"], name="po_item_sku_idx"),
+        ]
+
+    def __str__(self):
+         return f"{self.purchase_order_id}: ({self.sku})"
+
+class PurchaseOrderSequence(models.Model):
+    """This model is used for storing next free value of number sequences, purchase order numbers are allocated from it"""
+    name = models.CharField(primary_key=True, max_length=50)
+    next_value = models.BigIntegerField(default=1)
+
+    def __str__(self):
+         return f"{self.name}: ({self.next_value})"
+
 class HistoricalPerformance(models.Model):
     """This model is used for storing historical data related to vendor performance"""
+    GRANULARITY_CONSTANTS = [("raw","raw"),("day","day"),("week","week")]
     vendor = models.ForeignKey(Vendor, on_delete=models.CASCADE)
-    date = models.DateTimeField(auto_now_add=True)
+    date = models.DateTimeField(default=timezone.now)
+    granularity = models.CharField(max_length=10, default="raw", choices=GRANULARITY_CONSTANTS) # records rolled up by compact_history command
     on_time_delivery_rate = models.FloatField()
     quality_rating_avg = models.FloatField()
     average_response_time = models.FloatField()
     fulfillment_rate = models.FloatField()
-    json_data = models.JSONField()
\ No newline at end of file
+    json_data = models.JSONField()
+
+    class Meta:
+        indexes = [
+            # latest history records of vendor
+            models.Index(fields=["vendor", "-date"], name="hp_vendor_date_idx"),
+            # old records selected for compaction
+            models.Index(fields=["granularity", "date"], name="hp_granularity_date_idx"),
+        ]
+
+class VendorMetricCounter(models.Model):
+    """This model is used for storing running counters of a vendor which are used for calculating vendor performance metrics"""
+    vendor = models.OneToOneField(Vendor, primary_key=True, on_delete=models.CASCADE, related_name="metric_counter")
+    total_orders = models.IntegerField(default=0)
+    completed_orders = models.IntegerField(default=0)
+    on_time_completed_orders = models.IntegerField(default=0)
+    quality_rating_sum = models.FloatField(default=0)
+    quality_rating_count = models.IntegerField(default=0)
+    response_time_sum = models.FloatField(default=0) # total acknowledgment latency in seconds
+    response_time_count = models.IntegerField(default=0)
+
+    def __str__(self):
+         return f"{self.vendor_id}: ({self.total_orders} orders)"
+
+
+class MetricEvent(models.Model):
+    """This model is used as outbox for storing vendor metric changes which are applied later by metrics worker"""
+    vendor = models.ForeignKey(Vendor, on_delete=models.CASCADE)
+    po_number = models.CharField(max_length=10)
+    changed_fields = models.JSONField(default=list)
+    deltas = models.JSONField()
+    created_date = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+         return f"{self.vendor_id}: ({self.po_number})"
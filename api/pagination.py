@@ -0,0 +1,86 @@
+from rest_framework.pagination import CursorPagination, _reverse_ordering
+
+class AsyncCursorPaginationMixin:
+    """
+    This class is used for reading page of cursor pagination with async queryset iteration, cursor handling
+    is same as rest framework paginate_queryset so next and previous links are same for sync and async views
+    """
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """This method returns rows of current page, request is rest framework request"""
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            (offset, reverse, current_position) = (0, False, None)
+        else:
+            (offset, reverse, current_position) = self.cursor
+
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        #rows after position of cursor
+        if current_position is not None:
+            order = self.ordering[0]
+            is_reversed = order.startswith("-")
+            order_attr = order.lstrip("-")
+            if self.cursor.reverse != is_reversed:
+                queryset = queryset.filter(**{order_attr + "__lt": current_position})
+            else:
+                queryset = queryset.filter(**{order_attr + "__gt": current_position})
+
+        #one more row is read for finding if there is following page
+        results = [row async for row in queryset[offset:offset + self.page_size + 1]]
+        self.page = list(results[:self.page_size])
+        if len(results) > len(self.page):
+            has_following_position = True
+            following_position = self._get_position_from_instance(results[-1], self.ordering)
+        else:
+            has_following_position = False
+            following_position = None
+
+        if reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = (current_position is not None) or (offset > 0)
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = (current_position is not None) or (offset > 0)
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+class VendorCursorPagination(AsyncCursorPaginationMixin, CursorPagination):
+    """
+    This class is used for keyset pagination of vendors, pages are read by vendor code position instead of offset
+    so deep pages cost the same as first page
+    """
+    page_size = 100
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+    ordering = ("vendor_code",)
+
+class PurchaseOrderCursorPagination(AsyncCursorPaginationMixin, CursorPagination):
+    """
+    This class is used for keyset pagination of purchase orders with latest orders first, ordering matches
+    po_order_date_idx index so each page is a single index range read
+    """
+    page_size = 100
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+    ordering = ("-order_date", "-po_number")
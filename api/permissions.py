@@ -0,0 +1,18 @@
+import ipaddress
+from django.conf import settings
+from rest_framework.permissions import BasePermission
+
+class IsAuthenticatedOrMetricsNetwork(BasePermission):
+    """
+    This class is permission of request metrics api, requests from REQUEST_METRICS_ALLOWED_NETWORKS are allowed
+    without token so prometheus can scrape metrics, requests from other addresses need valid token
+    """
+
+    def has_permission(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return True
+        try:
+            address = ipaddress.ip_address(request.META.get("REMOTE_ADDR", ""))
+        except ValueError:
+            return False
+        return any(address in ipaddress.ip_network(network) for network in settings.REQUEST_METRICS_ALLOWED_NETWORKS)
@@ -0,0 +1,88 @@
+import threading
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from .models import PurchaseOrder, PurchaseOrderSequence
+from .transactions import atomic_with_retry
+
+# name of sequence row used for purchase order numbers
+PO_NUMBER_SEQUENCE = "purchase_order"
+
+# numbers are allocated below smallest random number of old orders (1000000000) so they never collide with them
+MAX_PO_NUMBER = 10 ** 9
+
+def format_po_number(value):
+    """This function returns number zero padded to 10 digits so string order of numbers is same as allocation order
+    and new orders are appended at end of primary key index"""
+    return f"{value:010d}"
+
+def get_initial_value():
+    """This function returns first value of new sequence, numbers of existing orders allocated from sequence are skipped"""
+    #all allocated numbers start with zero and old random numbers never do
+    last = (PurchaseOrder.objects.filter(po_number__gte="0", po_number__lt="1").order_by("-po_number")
+            .values_list("po_number", flat=True).first())
+    return int(last) + 1 if last and last.isdigit() else 1
+
+def reserve_po_numbers(count):
+    """This function is used for reserving block of consecutive purchase order numbers from sequence table
+    :params:
+        count: "number of reserved numbers"
+    :return:
+        first reserved value
+    """
+    def reserve():
+        sequences = PurchaseOrderSequence.objects.filter(name=PO_NUMBER_SEQUENCE)
+        #update locks sequence row until end of transaction so blocks reserved by other writers do not overlap
+        if not sequences.update(next_value=F("next_value") + count):
+            PurchaseOrderSequence.objects.get_or_create(name=PO_NUMBER_SEQUENCE, defaults={"next_value": get_initial_value})
+            sequences.update(next_value=F("next_value") + count)
+        return sequences.values_list("next_value", flat=True).get() - count
+
+    start = atomic_with_retry(reserve)
+    if start + count > MAX_PO_NUMBER:
+        raise OverflowError("Purchase order number sequence is exhausted")
+    return start
+
+def allocate_po_numbers(count):
+    """This function is used for allocating purchase order numbers of bulk creates with one sequence update
+    :params:
+        count: "number of purchase orders"
+    :return:
+        list of purchase order numbers in increasing order
+    """
+    if count <= 0:
+        return []
+    start = reserve_po_numbers(count)
+    return [format_po_number(value) for value in range(start, start + count)]
+
+class PONumberAllocator:
+    """
+    This class is used for returning purchase order numbers from block of numbers reserved by process, new block
+    is reserved when block is used up so sequence row is updated once for each PO_NUMBER_BLOCK_SIZE orders,
+    numbers of unused blocks are skipped when process ends
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.next_value = self.end = 0
+
+    def get_number(self):
+        """This method returns next free purchase order number"""
+        if transaction.get_connection().in_atomic_block:
+            #block reserved in open transaction is returned to sequence on rollback so it can not be kept for later
+            return allocate_po_numbers(1)[0]
+
+        with self.lock:
+            if self.next_value >= self.end:
+                self.next_value = reserve_po_numbers(settings.PO_NUMBER_BLOCK_SIZE)
+                self.end = self.next_value + settings.PO_NUMBER_BLOCK_SIZE
+            value = self.next_value
+            self.next_value += 1
+        return format_po_number(value)
+
+    def clear(self):
+        """This method drops reserved block, it is called when sequence table may have been reset"""
+        with self.lock:
+            self.next_value = self.end = 0
+
+po_number_allocator = PONumberAllocator()
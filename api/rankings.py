@@ -0,0 +1,62 @@
+from .models import Vendor
+
+# metrics vendors can be ranked by, with True for metrics where higher value is better
+RANKING_METRICS = {
+    "performance_score": True,
+    "on_time_delivery_rate": True,
+    "quality_rating_avg": True,
+    "average_response_time": False,
+    "fulfillment_rate": True,
+}
+
+# filters of vendors which have value of metric, vendors without acknowledged orders have no response time
+RANKED_VENDOR_FILTERS = {
+    "average_response_time": {"metric_counter__response_time_count__gt": 0},
+}
+
+def get_ranked_vendors(metric, min_orders=0):
+    """This function is used for creating queryset of vendors which take part in rankings of metric
+    :params:
+        metric: "name of ranking metric"
+        min_orders: "vendors with less purchase orders are not ranked"
+    :return:
+        queryset of vendors
+    """
+    queryset = Vendor.objects.filter(**RANKED_VENDOR_FILTERS.get(metric, {}))
+    if min_orders:
+        queryset = queryset.filter(metric_counter__total_orders__gte=min_orders)
+    return queryset
+
+def get_ranking_order(metric, best_first=True):
+    """This function returns ordering of vendors by metric, vendor code orders vendors with same value so both
+    directions read rank index of metric forwards or backwards without sorting
+    :params:
+        metric: "name of ranking metric"
+        best_first: "False for ordering from worst vendor"
+    :return:
+        tuple of order_by fields
+    """
+    descending = RANKING_METRICS[metric] == best_first
+    return (f"-{metric}", "-vendor_code") if descending else (metric, "vendor_code")
+
+def get_vendor_rank(metric, value, vendor_code, min_orders=0):
+    """This function is used for calculating rank of vendor by counting better vendors in range of rank index,
+    so no vendors are sorted
+    :params:
+        metric: "name of ranking metric"
+        value: "metric value of vendor"
+        vendor_code: "vendor code of vendor"
+        min_orders: "vendors with less purchase orders are not ranked"
+    :return:
+        rank of vendor starting from 1
+    """
+    better = "gt" if RANKING_METRICS[metric] else "lt"
+    queryset = get_ranked_vendors(metric, min_orders)
+    return (1 + queryset.filter(**{f"{metric}__{better}": value}).count()
+            + queryset.filter(**{metric: value, f"vendor_code__{better}": vendor_code}).count())
+
+def get_percentile(rank, total):
+    """This function returns percentage of other ranked vendors which vendor is better than or equal to"""
+    if total <= 1:
+        return 100.0
+    return round(100 * (total - rank) / (total - 1), 2)
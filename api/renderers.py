@@ -0,0 +1,156 @@
+import csv
+import datetime
+import decimal
+import io
+import json
+import secrets
+import uuid
+from rest_framework.compat import INDENT_SEPARATORS, LONG_SEPARATORS, SHORT_SEPARATORS
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils import encoders
+
+class StreamingRowRenderer(BaseRenderer):
+    """
+    This class is base renderer for export api's, rows are converted to bytes in small chunks
+    so response can be streamed without keeping full result in memory
+    """
+    rows_per_chunk = 500
+
+    def render_rows(self, columns, rows):
+        """This method yields encoded chunks for an iterable of row tuples"""
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= self.rows_per_chunk:
+                yield self.render_chunk(columns, chunk)
+                chunk = []
+        if chunk:
+            yield self.render_chunk(columns, chunk)
+
+    def render_chunk(self, columns, rows):
+        raise NotImplementedError("Renderer class requires .render_chunk() to be implemented")
+
+class NDJSONRenderer(StreamingRowRenderer):
+    """This class is used for rendering rows as newline delimited json objects"""
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Error responses are rendered as single json line"""
+        return (json.dumps(data, cls=encoders.JSONEncoder, ensure_ascii=False) + "\n").encode("utf-8")
+
+    def render_chunk(self, columns, rows):
+        return "".join(json.dumps(dict(zip(columns, row)), cls=encoders.JSONEncoder, ensure_ascii=False,
+                                  separators=(",", ":")) + "\n" for row in rows).encode("utf-8")
+
+class CSVRenderer(StreamingRowRenderer):
+    """This class is used for rendering rows as csv with header line, json values are written as json text"""
+    media_type = "text/csv"
+    format = "csv"
+    encoder = encoders.JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Error responses are rendered as csv with keys as header"""
+        data = data if isinstance(data, dict) else {"detail": data}
+        return self.render_chunk(list(data), [list(data.values())], header=True)
+
+    def render_rows(self, columns, rows):
+        yield self.render_chunk(columns, [], header=True)
+        yield from super().render_rows(columns, rows)
+
+    def render_chunk(self, columns, rows, header=False):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if header:
+            writer.writerow(columns)
+        writer.writerows([self.format_value(value) for value in row] for row in rows)
+        return buffer.getvalue().encode("utf-8")
+
+    def format_value(self, value):
+        """This method converts single value to csv text"""
+        if value is None or isinstance(value, (str, int, float)):
+            return value
+        if isinstance(value, (dict, list)):
+            return json.dumps(value, cls=encoders.JSONEncoder, ensure_ascii=False, separators=(",", ":"))
+        return self.encoder.default(value)
+
+
+def encode_datetime(value):
+    """This function returns datetime in iso format with Z suffix for utc same as rest framework encoder"""
+    value = value.isoformat()
+    return value[:-6] + "Z" if value.endswith("+00:00") else value
+
+class EncodedJSON:
+    """This class is used for keeping json text of value which is spliced into response without encoding it again"""
+    __slots__ = ("encoded",)
+
+    def __init__(self, encoded):
+        self.encoded = encoded
+
+    def decode(self):
+        return json.loads(self.encoded)
+
+class FastJSONEncoder(encoders.JSONEncoder):
+    """
+    This class is json encoder which converts most common types with single lookup by type, other types are
+    converted by rest framework encoder, pre-encoded values are replaced with placeholders when `fragments`
+    list is passed and are decoded otherwise
+    """
+    converters = {
+        datetime.datetime: encode_datetime,
+        datetime.date: datetime.date.isoformat,
+        uuid.UUID: str,
+        decimal.Decimal: float,
+    }
+
+    def __init__(self, *args, fragments=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fragments = fragments
+
+    def default(self, obj):
+        converter = self.converters.get(type(obj))
+        if converter is not None:
+            return converter(obj)
+        if isinstance(obj, EncodedJSON):
+            if self.fragments is None:
+                return obj.decode()
+            self.fragments.append(obj.encoded)
+            return f"{FastJSONRenderer.fragment_token}{len(self.fragments) - 1}"
+        return super().default(obj)
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    This class is json renderer returning same bytes as rest framework json renderer, it converts common types
+    faster and splices pre-encoded json values into compact responses
+    """
+    encoder_class = FastJSONEncoder
+    #prefix of placeholder strings replaced with pre-encoded json, random so it can not be sent in request data
+    fragment_token = f"fragment-{secrets.token_hex(16)}-"
+
+    def encode(self, data):
+        """This method returns compact json text of data, it is used for creating pre-encoded json values"""
+        return self.dumps(data, separators=SHORT_SEPARATORS)
+
+    def dumps(self, data, fragments=None, **kwargs):
+        """This method returns json text of data with same options as rest framework json renderer"""
+        text = json.dumps(data, cls=self.encoder_class, ensure_ascii=self.ensure_ascii, allow_nan=not self.strict,
+                          fragments=fragments, **kwargs)
+        return text.replace("\u2028", "\\u2028").replace("\u2029", "\\u2029")
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if indent is not None or not self.compact:
+            #pre-encoded values are compact json so they are decoded for other formats
+            separators = INDENT_SEPARATORS if indent is not None else LONG_SEPARATORS
+            return self.dumps(data, indent=indent, separators=separators).encode()
+
+        fragments = []
+        text = self.dumps(data, fragments=fragments, separators=SHORT_SEPARATORS)
+        if fragments:
+            parts = text.split(f'"{self.fragment_token}')
+            text = parts[0] + "".join(fragments[int(index)] + rest
+                                      for index, rest in (part.split('"', 1) for part in parts[1:]))
+        return text.encode()
@@ -1,9 +1,76 @@
+import re
 from rest_framework import serializers
 from .models import Vendor, PurchaseOrder
+from .items import get_item_entries, SKU_MAX_LENGTH
 from rest_framework.reverse import reverse
 from django.conf import settings
+from django.urls import NoReverseMatch
 
-class ParameterisedHyperlinkedIdentityField(serializers.HyperlinkedIdentityField):
+#url values which are not changed by quoting while reversing url, other values are reversed without template
+SAFE_URL_VALUE = re.compile(r"[A-Za-z0-9_-]+")
+
+def get_url_template(viewname, url_params, request, format=None):
+    """This function is used for getting url template of route, route is reversed once per request with
+    placeholder values and template is kept on request
+    :params:
+        viewname: "name of url"
+        url_params: "names of url parameters"
+        request: "request used for building absolute url and keeping url templates"
+        format: "format suffix of url"
+    :return:
+        url template for str.format_map, None when urls of route can not be built from template
+    """
+    if request is None or getattr(request, "versioning_scheme", None) is not None:
+        return None
+
+    templates = getattr(request, "_url_templates", None)
+    if templates is None:
+        templates = request._url_templates = {}
+    key = (viewname, format, tuple(sorted(url_params)))
+    if key not in templates:
+        placeholders = {name: f"urltemplate{index}placeholder" for index, name in enumerate(url_params)}
+        try:
+            url = reverse(viewname, kwargs=placeholders, request=request, format=format)
+        except NoReverseMatch:
+            #url parameter does not accept placeholder value so urls of this route are always reversed
+            url = ""
+        template = None
+        if all(url.count(placeholder) == 1 for placeholder in placeholders.values()):
+            template = url.replace("{", "{{").replace("}", "}}")
+            for name, placeholder in placeholders.items():
+                template = template.replace(placeholder, f"{{{name}}}")
+        templates[key] = template
+    return templates[key]
+
+def cached_reverse(viewname, args=None, kwargs=None, request=None, format=None, **extra):
+    """This function returns same url as rest framework reverse, values of object are formatted into
+    url template of route when they are not changed by url quoting
+    :params:
+        viewname: "name of url"
+        kwargs: "url parameters"
+        request: "request used for building absolute url and keeping url templates"
+        format: "format suffix of url"
+    :return:
+        url of view
+    """
+    template = None
+    if not args and not extra and kwargs and all(SAFE_URL_VALUE.fullmatch(str(value)) for value in kwargs.values()):
+        template = get_url_template(viewname, kwargs, request, format)
+    if template is None:
+        return reverse(viewname, args=args, kwargs=kwargs, request=request, format=format, **extra)
+    return template.format_map(kwargs)
+
+class CachedReverseMixin:
+    """This class is used for reversing urls of hyperlinked fields with url templates kept for request"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.reverse = cached_reverse
+
+class CachedHyperlinkedIdentityField(CachedReverseMixin, serializers.HyperlinkedIdentityField):
+    """This class is hyperlinked identity field which reverses url once for each request"""
+
+class ParameterisedHyperlinkedIdentityField(CachedReverseMixin, serializers.HyperlinkedIdentityField):
     """
     This class is used for creating url for performance of a vendor.
     lookup_fields is a tuple of tuples of the form:
@@ -26,38 +93,73 @@ class ParameterisedHyperlinkedIdentityField(serializers.HyperlinkedIdentityField
                 attr = getattr(attr,field)
             kwargs[url_param] = attr
 
-        return reverse(view_name, kwargs=kwargs, request=request, format=format)
+        return self.reverse(view_name, kwargs=kwargs, request=request, format=format)
 
-class VendorSerializer(serializers.ModelSerializer):
+class DynamicFieldsMixin:
+    """
+    This class is used for limiting serializer to fields passed with `fields` argument and for finding
+    model fields needed by those serializer fields
+    """
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop("fields", None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for field_name in set(self.fields) - set(fields):
+                self.fields.pop(field_name)
+
+    def get_model_field_names(self):
+        """This method returns set of model field names which are read by serializer fields"""
+        model_fields = set()
+        for field in self.fields.values():
+            if isinstance(field, ParameterisedHyperlinkedIdentityField):
+                model_fields.update(model_field.split(".")[0] for model_field, url_param in field.lookup_fields)
+            elif isinstance(field, serializers.HyperlinkedIdentityField):
+                model_fields.add(field.lookup_field)
+            elif field.source != "*":
+                model_fields.add(field.source.split(".")[0])
+        return model_fields
+
+class QualityRatingValidationMixin:
+    """This class is used for adding quality rating validation to purchase order serializers"""
+
+    def validate_quality_rating(self, value):
+        """Adding custom validaton"""
+        if value != None and value > settings.DEFAULT_QUALITY_RATING_MAX_VALUE:
+            raise serializers.ValidationError("maximum rating value is 10")
+        return value
+
+class VendorSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     This class is model serializer for converting vendor model object to json data
     its used for converting vendor data to json data
     """
     vendor_code = serializers.CharField(read_only=True)
-    url = serializers.HyperlinkedIdentityField(view_name='vendor-detail', read_only=True)
+    url = CachedHyperlinkedIdentityField(view_name='vendor-detail', read_only=True)
     performance_url = ParameterisedHyperlinkedIdentityField(view_name='vendors_performance', lookup_fields = (("vendor_code","vendor_id"),), read_only=True)
     class Meta:
         model = Vendor
         fields = ["vendor_code", "url", "performance_url", "name", "contact_details", "address", "on_time_delivery_rate", 
                   "quality_rating_avg", "average_response_time", "fulfillment_rate"]
         
-class PurchaseOrderSerializer(serializers.ModelSerializer):
+class PurchaseOrderSerializer(DynamicFieldsMixin, QualityRatingValidationMixin, serializers.ModelSerializer):
     """
     This class is model serializer for converting purchase order model object to json data
     its used to convert purchace order data to json
     """
     po_number = serializers.CharField(read_only=True)
-    url = serializers.HyperlinkedIdentityField(view_name='purchaseorder-detail', read_only=True)
+    url = CachedHyperlinkedIdentityField(view_name='purchaseorder-detail', read_only=True)
     acknowledge_url = ParameterisedHyperlinkedIdentityField(view_name='purchase_order_ack', read_only=True)
     class Meta:
         model = PurchaseOrder
         fields = ["po_number", "url", "acknowledge_url", "vendor", "order_date", "delivery_date", "expected_delivery_date", "items", 
                   "quantity", "status", "quality_rating", "issue_date", "acknowledgment_date"]
-    
-    def validate_quality_rating(self, value):
-        """Adding custom validaton"""
-        if value != None and value > settings.DEFAULT_QUALITY_RATING_MAX_VALUE:
-            raise serializers.ValidationError("maximum rating value is 10")
+
+    def validate_items(self, value):
+        """Rejecting items with sku longer than sku of line items, so different skus are not stored as same line item"""
+        long_skus = [sku for sku, values in get_item_entries(value) if len(sku) > SKU_MAX_LENGTH]
+        if long_skus:
+            raise serializers.ValidationError(f"maximum sku length is {SKU_MAX_LENGTH}")
         return value
 
 class VendorPerformanceSerializer(serializers.ModelSerializer):
@@ -79,4 +181,14 @@ class PurchaseOrderUpdateSerializer(serializers.ModelSerializer):
     po_number = serializers.CharField(read_only=True)
     class Meta:
         model = PurchaseOrder
-        fields = ["po_number", "acknowledgment_date"]
\ No newline at end of file
+        fields = ["po_number", "acknowledgment_date"]
+
+class PurchaseOrderBulkUpdateSerializer(QualityRatingValidationMixin, serializers.ModelSerializer):
+    """
+    This class is model serializer for converting bulk status and acknowledgment changes from json data
+    its used for validating each item of bulk purchase order update
+    """
+    po_number = serializers.CharField(max_length=10)
+    class Meta:
+        model = PurchaseOrder
+        fields = ["po_number", "status", "quality_rating", "delivery_date", "acknowledgment_date"]
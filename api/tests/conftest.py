@@ -0,0 +1,9 @@
+from django.conf import settings
+from vendor_management_sys.caches import get_cache_settings
+
+def pytest_configure(config):
+    """
+    This function will keep cache of test run in memory before test database is created, so tests do not write files
+    of shared cache or clear cache used by running server
+    """
+    settings.CACHES = {"default": get_cache_settings({"CACHE_BACKEND": "locmem"}, settings.BASE_DIR)}
@@ -0,0 +1,149 @@
+import pytest
+from datetime import timedelta
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+from django.urls import path, include
+from django.utils import timezone
+from django.contrib.auth.models import User
+from api.models import *
+from api.views import PurchaseOrderViewSet
+from api import urls as api_urls
+from api.async_views import get_async_urlpatterns
+from api.tests.test_purchaseorder_api import get_token, client
+
+#url conf of tests with async views in front of sync views
+urlpatterns = [
+    path("api/", include(get_async_urlpatterns(api_urls.router.urls + api_urls.urlpatterns) + api_urls.urlpatterns)),
+]
+
+@pytest.mark.django_db
+@pytest.mark.urls("api.tests.test_async_views")
+class TestAsyncViews:
+    """
+    This class is created for testing async views return same responses as sync views
+    """
+    client = client
+
+    def create_data(self):
+        """
+        This method will create vendors with purchase orders
+        """
+        vendors = [Vendor.objects.create(name=f"test {index}", contact_details="87123656123", address="test address")
+                   for index in range(3)]
+        now = timezone.now()
+        for index in range(7):
+            PurchaseOrder(vendor=vendors[index % 3], expected_delivery_date=now + timedelta(days=index),
+                          delivery_date=now if index % 2 else None, items={"item": {"qtn": index}}, quantity=index,
+                          status="completed" if index % 2 else "pending", quality_rating=index if index % 2 else None).save()
+        return vendors
+
+    def get(self, settings, url, params=None, **kwargs):
+        """
+        This method will return responses of async and sync views for same get request
+        """
+        responses = []
+        for urlconf in ("api.tests.test_async_views", "vendor_management_sys.urls"):
+            settings.ROOT_URLCONF = urlconf
+            responses.append(self.client.get(url, params or {}, **kwargs))
+        return responses
+
+    def assert_same(self, async_response, sync_response):
+        """
+        This method will check status, body and headers of responses are same
+        """
+        assert async_response.status_code == sync_response.status_code
+        assert async_response.content == sync_response.content
+        for header in ("Content-Type", "Allow", "ETag", "WWW-Authenticate"):
+            assert async_response.get(header) == sync_response.get(header)
+
+    def test_views_are_async(self):
+        """
+        This method will test read api's are served by async views
+        """
+        for name in ("vendor-list", "vendor-detail", "purchaseorder-list", "purchaseorder-detail", "vendors_performance"):
+            patterns = [pattern for pattern in urlpatterns[0].url_patterns if getattr(pattern, "name", None) == name]
+            assert patterns[0].callback.__name__ == "view"
+            assert not hasattr(patterns[0].callback, "cls")
+
+    @pytest.mark.parametrize("params", [{}, {"page_size": 2}, {"fields": "status,url"}, {"fields": "unknown"},
+                                        {"format": "json"}, {"status": "completed", "page_size": 2}, {"overdue": "true"},
+                                        {"status": "unknown"}])
+    def test_list_responses(self, settings, params):
+        """
+        This method will test vendor and purchase order lists and all their pages are same for async and sync views
+        """
+        token = get_token()
+        self.create_data()
+        headers = {"Authorization":f"Bearer {token}"}
+        for url in ("/api/vendors/", "/api/purchase_orders/"):
+            async_response, sync_response = self.get(settings, url, params, headers=headers)
+            self.assert_same(async_response, sync_response)
+            while async_response.status_code == 200 and async_response.json()["next"]:
+                async_response, sync_response = self.get(settings, async_response.json()["next"], headers=headers)
+                self.assert_same(async_response, sync_response)
+                previous_async, previous_sync = self.get(settings, async_response.json()["previous"], headers=headers)
+                self.assert_same(previous_async, previous_sync)
+
+    def test_detail_responses(self, settings):
+        """
+        This method will test vendor and purchase order details are same for async and sync views
+        """
+        token = get_token()
+        vendor = self.create_data()[0]
+        order = PurchaseOrder.objects.filter(status="completed").first()
+        headers = {"Authorization":f"Bearer {token}"}
+        for url in (f"/api/vendors/{vendor.pk}/", f"/api/purchase_orders/{order.pk}/", "/api/purchase_orders/missing/"):
+            self.assert_same(*self.get(settings, url, headers=headers))
+
+    def test_performance_responses(self, settings):
+        """
+        This method will test vendor performance responses and etag are same for async and sync views
+        """
+        token = get_token()
+        vendor = self.create_data()[1]
+        headers = {"Authorization":f"Bearer {token}"}
+        async_response, sync_response = self.get(settings, f"/api/vendors/{vendor.pk}/performance", headers=headers)
+        self.assert_same(async_response, sync_response)
+
+        headers["If-None-Match"] = async_response["ETag"]
+        self.assert_same(*self.get(settings, f"/api/vendors/{vendor.pk}/performance", headers=headers))
+        self.assert_same(*self.get(settings, "/api/vendors/missing/performance", headers=headers))
+
+    def test_authentication_errors(self, settings):
+        """
+        This method will test responses without token and with invalid token are same for async and sync views
+        """
+        self.assert_same(*self.get(settings, "/api/vendors/"))
+        self.assert_same(*self.get(settings, "/api/vendors/", headers={"Authorization": "Bearer invalid"}))
+
+        token = get_token()
+        User.objects.filter(username="admin").update(is_active=False)
+        self.assert_same(*self.get(settings, "/api/purchase_orders/", headers={"Authorization":f"Bearer {token}"}))
+
+    def test_write_requests_use_sync_views(self):
+        """
+        This method will test other methods of same urls are passed to sync views
+        """
+        token = get_token()
+        response = self.client.post("/api/vendors/", content_type="application/json",
+                                    data={"name": "test", "contact_details": "1234", "address": "address"},
+                                    headers={"Authorization":f"Bearer {token}"})
+        assert response.status_code == 201
+        vendor_code = response.json()["vendor_code"]
+        response = self.client.patch(f"/api/vendors/{vendor_code}/", content_type="application/json",
+                                     data={"name": "changed"}, headers={"Authorization":f"Bearer {token}"})
+        assert response.json()["name"] == "changed"
+
+    def test_asgi_request(self, monkeypatch):
+        """
+        This method will test async view with asgi request handler, sync view is not called
+        """
+        def sync_list(*args, **kwargs):
+            raise AssertionError("sync view called")
+        monkeypatch.setattr(PurchaseOrderViewSet, "list", sync_list)
+        token = get_token()
+        self.create_data()
+        response = async_to_sync(AsyncClient().get)("/api/purchase_orders/", {"page_size": 3},
+                                                     headers={"Authorization":f"Bearer {token}"})
+        assert response.status_code == 200
+        assert len(response.json()["results"]) == 3
@@ -0,0 +1,76 @@
+import pytest
+import time
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import AccessToken
+from api.authentication import token_cache
+from api.tests.test_purchaseorder_api import get_token, client
+
+@pytest.mark.django_db
+class TestCachedJWTAuthentication:
+    """
+    This class is created for testing cache of validated jwt tokens
+    """
+    client = client
+    url = "/api/_metrics"
+
+    def get(self, token):
+        """
+        This method will call api with token and return response and number of queries
+        """
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(self.url, headers={"Authorization":f"Bearer {token}"})
+        return response, len(captured)
+
+    def test_user_is_not_read_for_cached_token(self):
+        """
+        This method will test user is read from database only for first request with token
+        """
+        token_cache.clear()
+        token = get_token()
+        response, queries = self.get(token)
+        assert response.status_code == 200
+        assert queries == 1
+
+        response, queries = self.get(token)
+        assert response.status_code == 200
+        assert queries == 0
+
+    def test_deactivated_user_is_rejected(self):
+        """
+        This method will test cached tokens of user are removed when user is deactivated
+        """
+        token = get_token()
+        assert self.get(token)[0].status_code == 200
+
+        user = User.objects.get(username="admin")
+        user.is_active = False
+        user.save()
+        assert self.get(token)[0].status_code == 401
+
+    def test_invalid_token_is_rejected(self):
+        """
+        This method will test token with changed signature is not found in cache
+        """
+        token = get_token()
+        assert self.get(token)[0].status_code == 200
+        assert self.get(token[:-2] + ("aa" if not token.endswith("aa") else "bb"))[0].status_code == 401
+
+    def test_cache_size_and_expiry(self, settings):
+        """
+        This method will test least recently used tokens are removed when cache is full and tokens expire
+        """
+        settings.JWT_AUTH_CACHE = {"MAX_SIZE": 2, "MAX_AGE": 60}
+        token_cache.clear()
+        user = User.objects.create_user("cache", "cache@cache.com", "cache")
+        tokens = [AccessToken.for_user(user) for _ in range(3)]
+        for token in tokens:
+            token_cache.set(str(token).encode(), user, token)
+        assert token_cache.get(str(tokens[0]).encode()) is None
+        assert token_cache.get(str(tokens[2]).encode())[0] == user
+
+        expired = AccessToken.for_user(user)
+        expired["exp"] = int(time.time()) - 1
+        token_cache.set(b"expired", user, expired)
+        assert token_cache.get(b"expired") is None
@@ -0,0 +1,36 @@
+import pytest
+from api.models import *
+from api.benchmarks import run_benchmarks, percentile
+
+@pytest.mark.django_db
+class TestBenchmarks:
+    """
+    This class is created for testing benchmark suite on small scale
+    """
+
+    def test_percentile(self):
+        """
+        This method will test nearest rank percentile
+        """
+        values = list(range(1, 101))
+        assert percentile(values, 50) == 50
+        assert percentile(values, 99) == 99
+        assert percentile([5], 99) == 5
+
+    def test_run_benchmarks(self):
+        """
+        This method will test benchmark results for each measured api
+        """
+        results = run_benchmarks(vendor_count=2, order_count=40, iterations=3)
+        assert results["scale"]["orders"] == 40
+        assert set(results["results"]) == {"create_purchase_order", "status_change", "acknowledge",
+                                           "list_purchase_orders", "list_vendors", "vendor_performance"}
+        for result in results["results"].values():
+            assert result["iterations"] == 3
+            assert result["p99_ms"] >= result["p50_ms"] > 0
+        assert results["results"]["status_change"]["queries_per_request"] > 0
+        assert PurchaseOrder.objects.count() == 43 + 2 * 40
+        assert results["serialization"]["rows"] == 40
+        assert results["serialization"]["compiled_rows_per_second"] > 0
+        assert results["po_number_inserts"]["rows"] == 40
+        assert results["po_number_inserts"]["sequence_rows_per_second"] > 0
@@ -0,0 +1,111 @@
+import pytest
+import threading
+import time
+from pathlib import Path
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, transaction
+from api.models import Vendor
+from api.transactions import atomic_with_retry
+from vendor_management_sys.database import get_database_settings, get_sqlite_pragmas
+from vendor_management_sys.caches import get_cache_settings
+
+class TestDatabaseSettings:
+    """
+    This class is created for testing database profiles selected with environment variables
+    """
+
+    def test_sqlite_profile(self):
+        """
+        This method will test sqlite is default database with tuned pragmas
+        """
+        database = get_database_settings({}, Path("/project"))
+        assert database["ENGINE"] == "django.db.backends.sqlite3"
+        assert database["NAME"] == Path("/project/db.sqlite3")
+        assert get_sqlite_pragmas({})["journal_mode"] == "WAL"
+        assert get_sqlite_pragmas({"DB_SQLITE_BUSY_TIMEOUT": "100"})["busy_timeout"] == 100
+        assert get_sqlite_pragmas({"DB_SQLITE_TUNED": "0"}) == {}
+
+    def test_postgres_profile(self):
+        """
+        This method will test postgresql database uses persistent connections with health checks
+        """
+        database = get_database_settings({"DB_ENGINE": "postgres", "DB_NAME": "vendors", "DB_HOST": "db",
+                                          "DB_CONN_MAX_AGE": "300", "DB_POOLER": "pgbouncer"}, Path("/project"))
+        assert database["ENGINE"] == "django.db.backends.postgresql"
+        assert (database["NAME"], database["HOST"], database["PORT"]) == ("vendors", "db", "5432")
+        assert database["CONN_MAX_AGE"] == 300
+        assert database["CONN_HEALTH_CHECKS"] is True
+        assert database["DISABLE_SERVER_SIDE_CURSORS"] is True
+
+    def test_unknown_engine(self):
+        """
+        This method will test unknown database engine is rejected
+        """
+        with pytest.raises(ImproperlyConfigured):
+            get_database_settings({"DB_ENGINE": "oracle"}, Path("/project"))
+
+class TestCacheSettings:
+    """
+    This class is created for testing cache profiles selected with environment variables
+    """
+
+    def test_shared_cache_is_default(self):
+        """
+        This method will test default cache is file cache shared by processes
+        """
+        cache = get_cache_settings({}, Path("/project"))
+        assert cache["BACKEND"] == "django.core.cache.backends.filebased.FileBasedCache"
+        assert cache["LOCATION"] == Path("/project/cache")
+
+    def test_other_profiles(self):
+        """
+        This method will test redis and in memory cache profiles and unknown backend
+        """
+        cache = get_cache_settings({"CACHE_BACKEND": "redis", "CACHE_LOCATION": "redis://cache:6379/0"}, Path("/project"))
+        assert (cache["BACKEND"], cache["LOCATION"]) == ("django.core.cache.backends.redis.RedisCache", "redis://cache:6379/0")
+        assert get_cache_settings({"CACHE_BACKEND": "locmem"}, Path("/project"))["BACKEND"].endswith("LocMemCache")
+        with pytest.raises(ImproperlyConfigured):
+            get_cache_settings({"CACHE_BACKEND": "memcached"}, Path("/project"))
+
+@pytest.mark.django_db
+def test_sqlite_pragmas_are_applied(settings):
+    """
+    This function will test pragmas are applied to new sqlite connections
+    """
+    if connection.vendor != "sqlite":
+        pytest.skip("sqlite only")
+    with connection.cursor() as cursor:
+        assert cursor.execute("PRAGMA synchronous").fetchone()[0] == 1
+        assert cursor.execute("PRAGMA busy_timeout").fetchone()[0] == settings.SQLITE_PRAGMAS["busy_timeout"]
+
+@pytest.mark.django_db(transaction=True)
+def test_locked_transaction_is_retried(settings):
+    """
+    This function will test transaction failing on lock of other transaction (postgresql lock not available error,
+    sqlite locked table) is started again after lock is released
+    """
+    settings.TRANSACTION_RETRIES = {"ATTEMPTS": 50, "BACKOFF": 0.005, "MAX_BACKOFF": 0.05}
+    vendor = Vendor.objects.create(name="test", contact_details="87123656123", address="test address")
+    attempts = []
+
+    def rename():
+        attempts.append(1)
+        list(Vendor.objects.select_for_update(nowait=True).filter(pk=vendor.pk))
+        Vendor.objects.filter(pk=vendor.pk).update(name="renamed")
+
+    def run():
+        try:
+            atomic_with_retry(rename)
+        finally:
+            connection.close()
+
+    with transaction.atomic():
+        Vendor.objects.filter(pk=vendor.pk).update(name="locked")
+        thread = threading.Thread(target=run)
+        thread.start()
+        deadline = time.monotonic() + 5
+        while len(attempts) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    thread.join()
+    assert len(attempts) >= 2
+    assert Vendor.objects.get(pk=vendor.pk).name == "renamed"
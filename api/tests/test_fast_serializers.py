@@ -0,0 +1,94 @@
+import pytest
+from datetime import datetime, timedelta
+from django.utils import timezone
+from rest_framework import serializers
+from api.models import *
+from api.views import VendorViewSet, PurchaseOrderViewSet, VendorPerformance
+from api.serializers import PurchaseOrderSerializer, VendorSerializer, VendorPerformanceSerializer
+from api.fast_serializers import get_compiled_serializer
+from api.tests.test_purchaseorder_api import get_token, client
+
+@pytest.mark.django_db
+class TestCompiledSerializer:
+    """
+    This class is created for testing compiled serializers return same response as rest framework serializers
+    """
+    client = client
+
+    def create_data(self):
+        """
+        This method will create vendors and purchase orders with empty and filled optional fields
+        """
+        vendors = [Vendor.objects.create(name=f"test {index}", contact_details="87123656123", address="test address")
+                   for index in range(2)]
+        now = timezone.now()
+        for index in range(5):
+            PurchaseOrder(vendor=vendors[index % 2], expected_delivery_date=now + timedelta(days=index, microseconds=index),
+                          items={"item": {"qtn": index}}, quantity=index, status="pending").save()
+        order = PurchaseOrder.objects.first()
+        order.status = "completed"
+        order.delivery_date = now
+        order.quality_rating = 7.5
+        order.acknowledgment_date = datetime(2024, 1, 1, 10, 0)
+        order.save()
+        return vendors
+
+    def get_responses(self, monkeypatch, view_class, url, params=None):
+        """
+        This method will return response bodies of same request with compiled serializer and with rest framework serializer
+        """
+        token = get_token()
+        responses = []
+        for compiled in (True, False):
+            monkeypatch.setattr(view_class, "compiled_serializer", compiled)
+            response = self.client.get(url, params or {}, headers={"Authorization":f"Bearer {token}"})
+            assert response.status_code == 200
+            responses.append(response.content)
+        return responses
+
+    @pytest.mark.parametrize("view_class, url, params", [
+        (PurchaseOrderViewSet, "/api/purchase_orders/", {}),
+        (PurchaseOrderViewSet, "/api/purchase_orders/", {"page_size": 2}),
+        (PurchaseOrderViewSet, "/api/purchase_orders/", {"fields": "status,acknowledge_url,delivery_date"}),
+        (VendorViewSet, "/api/vendors/", {}),
+        (VendorViewSet, "/api/vendors/", {"fields": "name,performance_url", "page_size": 1}),
+    ])
+    def test_list_response_is_identical(self, monkeypatch, view_class, url, params):
+        """
+        This method will test list api's return same bytes with compiled serializer
+        """
+        self.create_data()
+        compiled, serialized = self.get_responses(monkeypatch, view_class, url, params)
+        assert compiled == serialized
+
+    def test_performance_response_is_identical(self, monkeypatch, settings):
+        """
+        This method will test vendor performance api returns same bytes with compiled serializer
+        """
+        settings.VENDOR_PERFORMANCE_CACHE_TIMEOUT = 0
+        vendor = self.create_data()[0]
+        compiled, serialized = self.get_responses(monkeypatch, VendorPerformance, f"/api/vendors/{vendor.pk}/performance")
+        assert compiled == serialized
+
+    def test_unsupported_serializer(self):
+        """
+        This method will test serializers with fields which can not be compiled are not compiled
+        """
+        class OrderWithVendorNameSerializer(PurchaseOrderSerializer):
+            vendor_name = serializers.SerializerMethodField()
+
+            def get_vendor_name(self, obj):
+                return obj.vendor.name
+
+            class Meta(PurchaseOrderSerializer.Meta):
+                fields = ["po_number", "vendor_name"]
+
+        assert get_compiled_serializer(OrderWithVendorNameSerializer()) is None
+
+    def test_supported_serializers(self):
+        """
+        This method will test serializers of list and performance api's are compiled
+        """
+        for serializer in (PurchaseOrderSerializer(), VendorSerializer(), VendorPerformanceSerializer()):
+            columns, to_dict = get_compiled_serializer(serializer)
+            assert columns
@@ -0,0 +1,149 @@
+import pytest
+from io import StringIO
+from datetime import datetime
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from api.models import *
+from api.items import parse_items
+from api.tests.test_purchaseorder_api import get_token, client
+
+def test_parse_items():
+    """
+    This function will test line items are read from dict and list items json
+    """
+    assert parse_items({"item1": {"qtn": 2, "price": 1.5}, "item2": "test item", "item3": {"qtn": "2"}}) == {
+        "item1": (2, 1.5), "item2": (None, None), "item3": (None, None)}
+    assert parse_items([{"sku": "item1", "qty": 3}, {"name": "no sku"}, "item2"]) == {"item1": (3, None)}
+    assert parse_items("item") == {}
+    assert parse_items(None) == {}
+
+@pytest.mark.django_db
+class TestOrderItems:
+    """
+    This class is created for testing line items of purchase orders and API's using them
+    """
+    client = client
+    purchase_order_url_path = "/api/purchase_orders/"
+
+    def create_vendor(self):
+        """
+        This method will create new vendor in database
+        """
+        return Vendor.objects.create(name="test", contact_details="87123656123", address="test address")
+
+    def create_purchase_order(self, vendor, items):
+        """
+        This method will create new purchase order with items in database
+        """
+        order = PurchaseOrder(vendor=vendor, expected_delivery_date=datetime.now(), items=items, quantity=1)
+        order.save()
+        return order
+
+    def get_line_items(self, order):
+        """
+        This method will return stored line items of order as dict
+        """
+        return {item.sku: (item.quantity, item.price) for item in PurchaseOrderItem.objects.filter(purchase_order=order)}
+
+    def get(self, url, params=None):
+        """
+        This method will call get api with token, token is created on first call
+        """
+        if not hasattr(self, "token"):
+            self.token = get_token()
+        return self.client.get(url, params or {}, headers={"Authorization":f"Bearer {self.token}"})
+
+    def test_line_items_follow_order_changes(self):
+        """
+        This method will test line items are created, replaced and deleted with purchase order
+        """
+        order = self.create_purchase_order(self.create_vendor(), {"item1": {"qtn": 2, "price": 3}, "item2": {"qtn": 1}})
+        assert self.get_line_items(order) == {"item1": (2, 3), "item2": (1, None)}
+
+        order = PurchaseOrder.objects.get(pk=order.pk)
+        order.items["item3"] = {"qtn": 4}
+        del order.items["item1"]
+        order.save()
+        assert self.get_line_items(order) == {"item2": (1, None), "item3": (4, None)}
+
+        order.status = "completed"
+        with CaptureQueriesContext(connection) as queries:
+            order.save()
+        assert not [query for query in queries.captured_queries if "api_purchaseorderitem" in query["sql"]]
+
+        order.delete()
+        assert not PurchaseOrderItem.objects.exists()
+
+    def test_bulk_create_line_items(self):
+        """
+        This method will test line items are created for orders of bulk create api
+        """
+        token = get_token()
+        vendor = self.create_vendor()
+        data = [{"vendor": vendor.pk, "expected_delivery_date": "2023-12-12T16:52:41.061Z", "items": {f"item{index}": {"qtn": index}},
+                 "quantity": 1} for index in range(3)]
+        response = self.client.post(f"{self.purchase_order_url_path}bulk", data=data, content_type="application/json",
+                                    headers={"Authorization":f"Bearer {token}"})
+        assert response.status_code == 201
+        assert sorted(PurchaseOrderItem.objects.values_list("sku", "quantity")) == [("item0", 0), ("item1", 1), ("item2", 2)]
+
+    def test_long_sku_is_rejected(self):
+        """
+        This method will test orders with sku longer than sku of line item are rejected by create and bulk create api
+        """
+        token = get_token()
+        vendor = self.create_vendor()
+        data = {"vendor": vendor.pk, "expected_delivery_date": "2023-12-12T16:52:41.061Z", "quantity": 1,
+                "items": {"a" * 200 + "1": {"qtn": 1}, "a" * 200 + "2": {"qtn": 2}}}
+        for url, body in ((self.purchase_order_url_path, data), (f"{self.purchase_order_url_path}bulk", [data])):
+            response = self.client.post(url, data=body, content_type="application/json",
+                                        headers={"Authorization":f"Bearer {token}"})
+            assert response.status_code == 400
+            assert "maximum sku length is 200" in str(response.json())
+        assert not PurchaseOrder.objects.exists()
+
+        data["items"] = [{"sku": "a" * 200, "qtn": 1}]
+        response = self.client.post(self.purchase_order_url_path, data=data, content_type="application/json",
+                                    headers={"Authorization":f"Bearer {token}"})
+        assert response.status_code == 201
+        assert PurchaseOrderItem.objects.get().sku == "a" * 200
+
+    def test_item_filter_and_totals(self):
+        """
+        This method will test orders are filtered by item and item totals are grouped by sku
+        """
+        vendors = [self.create_vendor(), self.create_vendor()]
+        first = self.create_purchase_order(vendors[0], {"bolt": {"qtn": 10, "price": 0.5}, "nut": {"qtn": 4}})
+        second = self.create_purchase_order(vendors[1], {"bolt": {"qtn": 6, "price": 1}})
+        self.create_purchase_order(vendors[1], {"screw": {"qtn": 1}})
+
+        results = self.get(self.purchase_order_url_path, {"item": "bolt"}).json()["results"]
+        assert sorted(row["po_number"] for row in results) == sorted([first.po_number, second.po_number])
+        assert self.get(f"{self.purchase_order_url_path}count", {"item": "nut"}).json() == {"count": 1}
+        assert self.get(f"{self.purchase_order_url_path}count", {"item": "bolt", "vendor": vendors[1].pk}).json() == {"count": 1}
+
+        results = self.get(f"{self.purchase_order_url_path}items").json()["results"]
+        assert results == [
+            {"sku": "bolt", "orders": 2, "vendors": 2, "total_quantity": 16, "total_value": 11},
+            {"sku": "nut", "orders": 1, "vendors": 1, "total_quantity": 4, "total_value": None},
+            {"sku": "screw", "orders": 1, "vendors": 1, "total_quantity": 1, "total_value": None},
+        ]
+        results = self.get(f"{self.purchase_order_url_path}items", {"vendor": vendors[0].pk, "sku": "bolt"}).json()["results"]
+        assert results == [{"sku": "bolt", "orders": 1, "vendors": 1, "total_quantity": 10, "total_value": 5}]
+        assert self.get(f"{self.purchase_order_url_path}items", {"limit": 0}).status_code == 400
+
+    def test_backfill_order_items(self):
+        """
+        This method will test backfill command creates line items of orders saved without them
+        """
+        vendor = self.create_vendor()
+        orders = [self.create_purchase_order(vendor, {"item1": {"qtn": index}, "item2": {}}) for index in range(5)]
+        PurchaseOrderItem.objects.filter(purchase_order=orders[0]).delete()
+        PurchaseOrderItem.objects.filter(purchase_order=orders[1]).update(quantity=100)
+
+        out = StringIO()
+        call_command("backfill_order_items", "--batch-size", "2", stdout=out)
+        assert "Created 10 line items of 5 purchase orders" in out.getvalue()
+        for index, order in enumerate(orders):
+            assert self.get_line_items(order) == {"item1": (index, None), "item2": (None, None)}
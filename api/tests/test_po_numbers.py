@@ -0,0 +1,123 @@
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from django.db import connection
+from api.models import *
+from api.po_numbers import (PO_NUMBER_SEQUENCE, MAX_PO_NUMBER, format_po_number, allocate_po_numbers,
+                            po_number_allocator)
+
+def test_format_po_number():
+    """
+    This function will test numbers are zero padded to length of po_number field in allocation order
+    """
+    assert format_po_number(1) == "0000000001"
+    assert format_po_number(MAX_PO_NUMBER - 1) == "0999999999"
+    assert format_po_number(9) < format_po_number(10) < format_po_number(100)
+
+@pytest.mark.django_db
+class TestPONumbers:
+    """
+    This class is created for testing purchase order numbers allocated from sequence table
+    """
+
+    def create_vendor(self):
+        """
+        This method will create new vendor in database
+        """
+        return Vendor.objects.create(name="test", contact_details="87123656123", address="test address")
+
+    def create_purchase_order(self, vendor, **kwargs):
+        """
+        This method will create new purchase order in database
+        """
+        order = PurchaseOrder(vendor=vendor, expected_delivery_date=datetime.now(), items={}, quantity=1, **kwargs)
+        order.save()
+        return order
+
+    def test_orders_get_sequential_numbers(self):
+        """
+        This method will test new orders get increasing numbers of 10 digits
+        """
+        vendor = self.create_vendor()
+        orders = [self.create_purchase_order(vendor) for _ in range(3)]
+        po_numbers = [order.po_number for order in orders]
+        assert all(len(po_number) == 10 for po_number in po_numbers)
+        assert po_numbers == sorted(po_numbers)
+        assert len(set(po_numbers)) == 3
+
+    def test_allocated_blocks_do_not_overlap(self):
+        """
+        This method will test each allocation returns consecutive numbers not returned by other allocations
+        """
+        first, second = allocate_po_numbers(5), allocate_po_numbers(3)
+        assert [int(po_number) for po_number in first] == list(range(int(first[0]), int(first[0]) + 5))
+        assert int(second[0]) == int(first[-1]) + 1
+        assert allocate_po_numbers(0) == []
+
+    def test_sequence_skips_existing_numbers(self):
+        """
+        This method will test new sequence starts after existing sequence numbers and ignores old random numbers
+        """
+        vendor = self.create_vendor()
+        PurchaseOrderSequence.objects.all().delete()
+        self.create_purchase_order(vendor, po_number="0000000041")
+        self.create_purchase_order(vendor, po_number="4812345678")
+        assert allocate_po_numbers(1) == ["0000000042"]
+        assert PurchaseOrderSequence.objects.get(name=PO_NUMBER_SEQUENCE).next_value == 43
+
+    def test_sequence_exhausted(self):
+        """
+        This method will test error is raised when numbers would reach range of old random numbers
+        """
+        PurchaseOrderSequence.objects.update_or_create(name=PO_NUMBER_SEQUENCE, defaults={"next_value": MAX_PO_NUMBER - 1})
+        assert allocate_po_numbers(1) == ["0999999999"]
+        with pytest.raises(OverflowError):
+            allocate_po_numbers(1)
+
+@pytest.mark.django_db(transaction=True)
+class TestPONumberBlocks:
+    """
+    This class is created for testing purchase order numbers served from block reserved by process
+    """
+    create_vendor = TestPONumbers.create_vendor
+    create_purchase_order = TestPONumbers.create_purchase_order
+
+    @pytest.fixture(autouse=True)
+    def clear_allocator(self):
+        """
+        This method will drop block of allocator before and after each test
+        """
+        po_number_allocator.clear()
+        yield
+        po_number_allocator.clear()
+
+    def test_block_reserved_once(self, settings):
+        """
+        This method will test sequence row is updated once for each block of numbers
+        """
+        settings.PO_NUMBER_BLOCK_SIZE = 10
+        vendor = self.create_vendor()
+        po_numbers = [self.create_purchase_order(vendor).po_number for _ in range(12)]
+        assert [int(po_number) for po_number in po_numbers] == list(range(int(po_numbers[0]), int(po_numbers[0]) + 12))
+        #second block is reserved after first 10 numbers
+        assert PurchaseOrderSequence.objects.get(name=PO_NUMBER_SEQUENCE).next_value == int(po_numbers[0]) + 20
+
+    def test_concurrent_creates_get_unique_numbers(self, settings):
+        """
+        This method will test parallel creates of orders get unique numbers without retrying on collisions
+        """
+        #in memory test database reports locked tables at once instead of waiting for busy timeout
+        settings.TRANSACTION_RETRIES = {"ATTEMPTS": 50, "BACKOFF": 0.005, "MAX_BACKOFF": 0.05}
+        settings.PO_NUMBER_BLOCK_SIZE = 5
+        vendor = Vendor.objects.get(pk=self.create_vendor().pk)
+
+        def create(index):
+            try:
+                return self.create_purchase_order(vendor).po_number
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            po_numbers = list(executor.map(create, range(40)))
+        assert len(set(po_numbers)) == 40
+        assert PurchaseOrder.objects.filter(vendor=vendor).count() == 40
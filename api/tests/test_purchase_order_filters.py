@@ -0,0 +1,97 @@
+import pytest
+from datetime import timedelta
+from django.utils import timezone
+from api.models import *
+from api.tests.test_purchaseorder_api import get_token, client
+
+@pytest.mark.django_db
+class TestPurchaseOrderFilters:
+    """
+    This class is created for testing filters of purchase order list and count API's
+    """
+    client = client
+    purchase_order_url_path = "/api/purchase_orders/"
+    count_url_path = "/api/purchase_orders/count"
+
+    def create_orders(self):
+        """
+        This method will create orders of two vendors, pending past due, pending, delivered on time and delivered late
+        """
+        now = timezone.now()
+        vendors = [Vendor.objects.create(name=f"test {index}", contact_details="87123656123", address="test address")
+                   for index in range(2)]
+        orders = {}
+        for vendor in vendors:
+            orders[vendor.pk] = [
+                PurchaseOrder(vendor=vendor, expected_delivery_date=now - timedelta(days=2), items={}, quantity=1),
+                PurchaseOrder(vendor=vendor, expected_delivery_date=now + timedelta(days=3), items={}, quantity=1),
+                PurchaseOrder(vendor=vendor, expected_delivery_date=now - timedelta(days=5), delivery_date=now - timedelta(days=6),
+                              acknowledgment_date=now - timedelta(days=7), items={}, quantity=1, status="completed"),
+                PurchaseOrder(vendor=vendor, expected_delivery_date=now - timedelta(days=5), delivery_date=now - timedelta(days=1),
+                              items={}, quantity=1, status="completed"),
+            ]
+            for order in orders[vendor.pk]:
+                order.save()
+        return vendors, orders
+
+    def get(self, url, params):
+        """
+        This method will call get api with token, token is created on first call
+        """
+        if not hasattr(self, "token"):
+            self.token = get_token()
+        return self.client.get(url, params, headers={"Authorization":f"Bearer {self.token}"})
+
+    def assert_orders(self, params, expected):
+        """
+        This method will check list and count api's return expected orders for filters
+        """
+        response = self.get(self.purchase_order_url_path, params)
+        assert response.status_code == 200
+        assert sorted(row["po_number"] for row in response.json()["results"]) == sorted(order.po_number for order in expected)
+        assert self.get(self.count_url_path, params).json() == {"count": len(expected)}
+
+    def test_filters(self):
+        """
+        This method will test vendor, status, date range and overdue filters
+        """
+        vendors, orders = self.create_orders()
+        now = timezone.now()
+        first = orders[vendors[0].pk]
+        all_orders = [order for vendor_orders in orders.values() for order in vendor_orders]
+
+        self.assert_orders({}, all_orders)
+        self.assert_orders({"vendor": vendors[0].pk}, first)
+        self.assert_orders({"vendor": vendors[0].pk, "status": "pending"}, first[:2])
+        self.assert_orders({"status": "completed,canceled"}, [order for order in all_orders if order.status == "completed"])
+        self.assert_orders({"vendor": vendors[0].pk, "expected_delivery_date_from": (now - timedelta(days=3)).isoformat()},
+                           first[:2])
+        self.assert_orders({"vendor": vendors[0].pk, "expected_delivery_date_to": (now + timedelta(days=3)).date().isoformat()},
+                           [first[0], first[2], first[3]])
+        self.assert_orders({"vendor": vendors[0].pk, "delivery_date_from": (now - timedelta(days=2)).isoformat()}, first[3:])
+        self.assert_orders({"vendor": vendors[0].pk, "acknowledgment_date_to": now.isoformat()}, first[2:3])
+        self.assert_orders({"vendor": vendors[0].pk, "order_date_from": (now - timedelta(days=1)).isoformat(),
+                            "order_date_to": (now + timedelta(days=1)).isoformat()}, first)
+        self.assert_orders({"vendor": vendors[0].pk, "overdue": "true"}, [first[0], first[3]])
+        self.assert_orders({"vendor": vendors[0].pk, "overdue": "false"}, first[1:3])
+
+    def test_filters_with_pagination(self):
+        """
+        This method will test filtered list is paginated with same filters on next pages
+        """
+        self.create_orders()
+        response = self.get(self.purchase_order_url_path, {"overdue": "true", "page_size": 3})
+        assert len(response.json()["results"]) == 3
+        response = self.client.get(response.json()["next"], headers={"Authorization":f"Bearer {self.token}"})
+        assert len(response.json()["results"]) == 1
+        assert response.json()["next"] is None
+
+    @pytest.mark.parametrize("params", [{"status": "unknown"}, {"overdue": "maybe"}, {"delivery_date_from": "yesterday"}])
+    def test_invalid_filters(self, params):
+        """
+        This method will test invalid filter values are rejected by list and count api's
+        """
+        for url in (self.purchase_order_url_path, self.count_url_path):
+            response = self.get(url, params)
+            assert response.status_code == 400
+            assert list(response.json()) == list(params)
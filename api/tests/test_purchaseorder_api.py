@@ -4,6 +4,9 @@ from django.contrib.auth.models import User
 from django.urls import reverse
 from django.test.client import Client
 from datetime import datetime
+import csv
+import io
+import json
 
 client = Client()
 
@@ -143,3 +146,155 @@ class TestOrderApi:
         response = self.client.put(self.purchase_order_url_path + f"{order.pk}/acknowledge" , data = body, 
                                     content_type="application/json",  headers={"Authorization":f"Bearer {token}"})
         assert response.status_code == 200
+
+    def test_bulk_create_purchase_orders(self):
+        """
+        This method will test bulk create purchase orders api
+        """
+        token = get_token()
+        vendor = self.create_vendor()
+        body = [{
+            "vendor": vendor.pk,
+            "expected_delivery_date": "2023-12-12T16:52:41.061Z",
+            "delivery_date": "2023-12-11T16:52:41.061Z",
+            "items": {"item1": {"qtn": index}},
+            "quantity": index,
+            "status": ("completed" if index % 2 else "pending"),
+            "quality_rating": 5,
+            } for index in range(1, 5)]
+
+        response = self.client.post(self.purchase_order_url_path + "bulk", data = body,
+                                    content_type="application/json",  headers={"Authorization":f"Bearer {token}"})
+        assert response.status_code == 201
+        assert len(response.json()) == 4
+        assert PurchaseOrder.objects.filter(vendor=vendor).count() == 4
+        #numbers of bulk create are allocated as one consecutive block
+        po_numbers = [int(order["po_number"]) for order in response.json()]
+        assert po_numbers == list(range(po_numbers[0], po_numbers[0] + 4))
+
+        vendor.refresh_from_db()
+        assert vendor.fulfillment_rate == 0.5
+        assert vendor.on_time_delivery_rate == 1
+        assert vendor.quality_rating_avg == 5
+
+    def test_bulk_create_purchase_orders_validation(self):
+        """
+        This method will test bulk create purchase orders api with invalid data
+        """
+        token = get_token()
+        vendor = self.create_vendor()
+        body = [{"vendor": vendor.pk, "expected_delivery_date": "2023-12-12T16:52:41.061Z",
+                 "items": {}, "quantity": 1, "quality_rating": 11}]
+
+        response = self.client.post(self.purchase_order_url_path + "bulk", data = body,
+                                    content_type="application/json",  headers={"Authorization":f"Bearer {token}"})
+        assert response.status_code == 400
+        assert not PurchaseOrder.objects.exists()
+
+    def test_bulk_update_purchase_orders(self):
+        """
+        This method will test bulk status and acknowledgment update api
+        """
+        token = get_token()
+        first = self.create_purchase_order()
+        second = PurchaseOrder(vendor=first.vendor, expected_delivery_date=datetime.now(), items={}, quantity=1)
+        second.save()
+        body = [{"po_number": first.pk, "status": "completed", "quality_rating": 8},
+                {"po_number": second.pk, "acknowledgment_date": "2030-12-16T02:12:19.839Z"}]
+
+        response = self.client.patch(self.purchase_order_url_path + "bulk", data = body,
+                                     content_type="application/json",  headers={"Authorization":f"Bearer {token}"})
+        assert response.status_code == 200
+        first.refresh_from_db()
+        assert first.status == "completed"
+
+        vendor = Vendor.objects.get(pk=first.vendor.pk)
+        assert vendor.fulfillment_rate == 0.5
+        assert vendor.quality_rating_avg == 8
+        assert vendor.average_response_time > 0
+
+        body = [{"po_number": "missing", "status": "completed"}]
+        response = self.client.patch(self.purchase_order_url_path + "bulk", data = body,
+                                     content_type="application/json",  headers={"Authorization":f"Bearer {token}"})
+        assert response.status_code == 404
+
+        #repeated order is rejected instead of applying only its last change
+        body = [{"po_number": second.pk, "status": "completed"}, {"po_number": second.pk, "status": "canceled"}]
+        response = self.client.patch(self.purchase_order_url_path + "bulk", data = body,
+                                     content_type="application/json",  headers={"Authorization":f"Bearer {token}"})
+        assert response.status_code == 400
+        assert second.pk in response.json()["error"]
+        second.refresh_from_db()
+        assert second.status == "pending"
+
+    def test_get_purchase_order_pagination(self):
+        """
+        This method will test cursor pagination of purchase orders list api
+        """
+        token = get_token()
+        vendor = self.create_vendor()
+        for _ in range(3):
+            PurchaseOrder(vendor=vendor, expected_delivery_date=datetime.now(), items={}, quantity=1).save()
+
+        response = self.client.get(self.purchase_order_url_path, {"page_size": 2}, headers={"Authorization":f"Bearer {token}"})
+        assert response.status_code == 200
+        first_page = response.json()
+        assert len(first_page["results"]) == 2
+        assert first_page["previous"] is None
+
+        response = self.client.get(first_page["next"], headers={"Authorization":f"Bearer {token}"})
+        second_page = response.json()
+        assert len(second_page["results"]) == 1
+        assert second_page["next"] is None
+        po_numbers = {order["po_number"] for order in first_page["results"] + second_page["results"]}
+        assert po_numbers == set(PurchaseOrder.objects.values_list("po_number", flat=True))
+
+    def test_get_purchase_order_fields(self):
+        """
+        This method will test field projection of purchase orders list and detail api
+        """
+        token = get_token()
+        order = self.create_purchase_order()
+
+        response = self.client.get(self.purchase_order_url_path, {"fields": "po_number,status,acknowledge_url"},
+                                   headers={"Authorization":f"Bearer {token}"})
+        assert response.status_code == 200
+        assert response.json()["results"] == [{
+            "po_number": order.po_number,
+            "acknowledge_url": f"http://testserver/api/purchase_orders/{order.po_number}/acknowledge",
+            "status": "pending"}]
+
+        response = self.client.get(self.purchase_order_url_path + f"{order.po_number}/", {"fields": "vendor"},
+                                   headers={"Authorization":f"Bearer {token}"})
+        assert response.json() == {"vendor": str(order.vendor.pk)}
+
+        response = self.client.get(self.purchase_order_url_path, {"fields": "po_number,unknown"},
+                                   headers={"Authorization":f"Bearer {token}"})
+        assert response.status_code == 400
+
+    def test_export_purchase_orders(self):
+        """
+        This method will test streaming export of purchase orders as ndjson and csv
+        """
+        token = get_token()
+        order = self.create_purchase_order()
+        PurchaseOrder(vendor=self.create_vendor(), expected_delivery_date=datetime.now(), items={}, quantity=1).save()
+
+        response = self.client.get(self.purchase_order_url_path + "export", {"format": "ndjson", "vendor": order.vendor.pk},
+                                   headers={"Authorization":f"Bearer {token}"})
+        assert response.status_code == 200
+        assert response["Content-Type"].startswith("application/x-ndjson")
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).decode().splitlines()]
+        assert len(rows) == 1
+        assert rows[0]["po_number"] == order.po_number
+        assert rows[0]["items"] == {"test":"test item"}
+
+        response = self.client.get(self.purchase_order_url_path + "export", {"format": "csv", "since": "2000-01-01"},
+                                   headers={"Authorization":f"Bearer {token}"})
+        rows = list(csv.DictReader(io.StringIO(b"".join(response.streaming_content).decode())))
+        assert len(rows) == 2
+        assert json.loads(next(row for row in rows if row["po_number"] == order.po_number)["items"]) == {"test":"test item"}
+
+        response = self.client.get(self.purchase_order_url_path + "export", {"format": "ndjson", "since": "invalid"},
+                                   headers={"Authorization":f"Bearer {token}"})
+        assert response.status_code == 400
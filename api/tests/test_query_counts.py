@@ -0,0 +1,99 @@
+import pytest
+from datetime import datetime
+from django.contrib.auth.models import User
+from django.contrib.admin import site
+from django.core.cache import cache
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from api.models import *
+from api.views import PurchaseOrderViewSet
+from api.authentication import token_cache
+from api.tests.test_purchaseorder_api import get_token, client
+
+@pytest.mark.django_db
+class TestListQueryCounts:
+    """
+    This class is created for testing number of queries of list api's does not depend on number of returned rows
+    """
+    client = client
+
+    def create_purchase_orders(self, count):
+        """
+        This method will create purchase orders spread over two vendors
+        """
+        vendors = [Vendor.objects.create(name=f"test {index}", contact_details="87123656123", address="test address")
+                   for index in range(2)]
+        for index in range(count):
+            PurchaseOrder(vendor=vendors[index % 2], expected_delivery_date=datetime.now(), items={"item": {"qtn": 1}},
+                          quantity=1).save()
+
+    def count_queries(self, url, params, headers=None):
+        """
+        This method will return number of queries run by get request and check request was successful
+        """
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(url, params, headers=headers or {})
+        assert response.status_code == 200
+        return len(captured)
+
+    @pytest.mark.parametrize("url", ["/api/purchase_orders/", "/api/vendors/"])
+    def test_list_query_count_is_constant(self, url):
+        """
+        This method will test list api's run same number of queries for small and large pages
+        """
+        token = get_token()
+        self.create_purchase_orders(30)
+        headers = {"Authorization":f"Bearer {token}"}
+
+        #cached vendor rows and tokens are cleared so both pages are read from database
+        cache.clear()
+        token_cache.clear()
+        small_page = self.count_queries(url, {"page_size": 2}, headers)
+        cache.clear()
+        token_cache.clear()
+        large_page = self.count_queries(url, {"page_size": 30}, headers)
+        assert small_page == large_page
+
+    def test_purchase_order_serializer_query_count_is_constant(self, monkeypatch):
+        """
+        This method will test purchase order list with serializer reads vendor code without join or query for each row
+        and skips items when they are not requested
+        """
+        #serializer is used instead of compiled serializer
+        monkeypatch.setattr(PurchaseOrderViewSet, "compiled_serializer", False)
+        token = get_token()
+        self.create_purchase_orders(30)
+        headers = {"Authorization":f"Bearer {token}"}
+        params = {"fields": "po_number,vendor"}
+
+        #cached token is cleared so both requests read user of token
+        small_page = self.count_queries("/api/purchase_orders/", {**params, "page_size": 2}, headers)
+        token_cache.clear()
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get("/api/purchase_orders/", {**params, "page_size": 30}, headers=headers)
+        assert response.status_code == 200
+        assert len(response.json()["results"]) == 30
+        assert len(captured) == small_page
+        list_query = [query["sql"] for query in captured if 'FROM "api_purchaseorder"' in query["sql"]][0]
+        assert 'JOIN "api_vendor"' not in list_query
+        assert '"api_purchaseorder"."items"' not in list_query
+
+    def test_admin_purchase_order_changelist_query_count_is_constant(self):
+        """
+        This method will test admin list of purchase orders does not run query for vendor of each row
+        """
+        request = RequestFactory().get("/admin/api/purchaseorder/")
+        request.user = User.objects.create_superuser("superuser", "superuser@admin.com", "superuser")
+        model_admin = site._registry[PurchaseOrder]
+
+        def count_changelist_queries():
+            with CaptureQueriesContext(connection) as captured:
+                changelist = model_admin.get_changelist_instance(request)
+                [str(order) for order in changelist.get_queryset(request)]
+            return len(captured)
+
+        self.create_purchase_orders(2)
+        few_rows = count_changelist_queries()
+        self.create_purchase_orders(20)
+        assert count_changelist_queries() == few_rows
@@ -0,0 +1,170 @@
+import pytest
+from api.models import *
+from api.metrics import get_vendor_counter_queryset
+from api.rankings import get_ranking_order
+from api.filters import PurchaseOrderFilter
+from django.test import RequestFactory
+from rest_framework.request import Request
+from datetime import timedelta
+from django.db import connection
+from django.db.models import F
+from django.utils import timezone
+
+def get_query_plan(queryset):
+    """
+    This function will return query plan of queryset, on postgresql sequential scans are disabled so small test
+    tables are read same way as large production tables
+    """
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SET enable_seqscan = off")
+    return queryset.explain()
+
+def assert_uses_index(queryset, index_name, covering=False, ordered_scan=False):
+    """
+    This function will check query plan of queryset uses given index and does not scan or sort the table,
+    with ordered_scan reading whole index in index order is allowed (queries which stop after limit)
+    """
+    plan = get_query_plan(queryset)
+    assert index_name in plan, plan
+    if connection.vendor == "postgresql":
+        assert "Seq Scan" not in plan, plan
+        assert "Sort" not in plan, plan
+        if covering:
+            assert f"Index Only Scan using {index_name}" in plan, plan
+    else:
+        assert "SCAN api_" not in plan or (ordered_scan and f"INDEX {index_name}" in plan), plan
+        assert "TEMP B-TREE" not in plan, plan
+        if covering:
+            assert f"COVERING INDEX {index_name}" in plan, plan
+
+@pytest.mark.django_db(transaction=True)
+class TestQueryPlans:
+    """
+    This class is created for testing metric and listing queries are served by indexes
+    """
+
+    @pytest.fixture(autouse=True)
+    def table_statistics(self):
+        """
+        This method will fill tables and collect their statistics on postgresql, its planner estimates empty tables
+        which were never analyzed as small tables and reads them differently than production tables, vacuum runs
+        outside of transaction so tests of this class do not run in transaction
+        """
+        if connection.vendor != "postgresql":
+            return
+        now = timezone.now()
+        vendors = Vendor.objects.bulk_create([Vendor(name=f"vendor {index}", contact_details="87123656123", address="test",
+                                                     quality_rating_avg=index % 10, average_response_time=index % 48,
+                                                     performance_score=index % 100) for index in range(100)])
+        orders = []
+        for index in range(1000):
+            expected = now - timedelta(days=index % 365)
+            status = ("pending", "completed", "canceled")[index % 3]
+            orders.append(PurchaseOrder(
+                po_number=f"T{index:09d}", vendor=vendors[index % len(vendors)], expected_delivery_date=expected, items={},
+                quantity=1, status=status, delivery_date=expected + timedelta(days=index % 5 - 3) if status == "completed" else None,
+                quality_rating=index % 10 if status == "completed" else None,
+                acknowledgment_date=expected - timedelta(days=5) if index % 2 else None))
+        PurchaseOrder.objects.bulk_create(orders, batch_size=1000)
+        PurchaseOrder.objects.update(order_date=F("expected_delivery_date") - timedelta(days=7))
+        PurchaseOrderItem.objects.bulk_create([PurchaseOrderItem(purchase_order=order, sku=f"sku{index % 200}", quantity=1)
+                                               for index, order in enumerate(orders)], batch_size=1000)
+        HistoricalPerformance.objects.bulk_create([
+            HistoricalPerformance(vendor=vendors[index % len(vendors)], date=now - timedelta(hours=index), on_time_delivery_rate=0,
+                                  quality_rating_avg=0, average_response_time=0, fulfillment_rate=0, json_data={})
+            for index in range(500)], batch_size=1000)
+        with connection.cursor() as cursor:
+            cursor.execute("VACUUM ANALYZE %s" % ", ".join(model._meta.db_table for model in (
+                Vendor, PurchaseOrder, PurchaseOrderItem, HistoricalPerformance)))
+
+    def create_vendor(self):
+        """
+        This method will create new vendor in database
+        """
+        vendor = Vendor(name="test",contact_details="87123656123", address="test address")
+        vendor.save()
+        return vendor
+
+    def test_vendor_counter_query_plan(self):
+        """
+        This method will test vendor counters are calculated from covering index
+        """
+        vendor = self.create_vendor()
+        plan = get_query_plan(get_vendor_counter_queryset([vendor.pk]))
+        assert "po_vendor_metrics_idx" in plan, plan
+        assert ("Index Only Scan" if connection.vendor == "postgresql" else "COVERING INDEX") in plan, plan
+
+    def test_latest_history_query_plan(self):
+        """
+        This method will test latest history record of vendor is read from index
+        """
+        vendor = self.create_vendor()
+        queryset = HistoricalPerformance.objects.filter(vendor=vendor).order_by("-date")[:1]
+        assert_uses_index(queryset, "hp_vendor_date_idx")
+
+    def test_purchase_order_page_query_plan(self):
+        """
+        This method will test cursor page of purchase orders is read from index without sorting
+        """
+        queryset = PurchaseOrder.objects.order_by("-order_date", "-po_number").filter(order_date__lt=timezone.now())[:101]
+        assert_uses_index(queryset, "po_order_date_idx")
+
+    @pytest.mark.parametrize("best_first", [True, False])
+    def test_vendor_rankings_query_plan(self, best_first):
+        """
+        This method will test top and bottom vendors by metric are read from rank index without sorting
+        """
+        for metric, index_name in (("performance_score", "vendor_score_rank_idx"),
+                                   ("average_response_time", "vendor_response_rank_idx")):
+            queryset = Vendor.objects.order_by(*get_ranking_order(metric, best_first)).values("vendor_code", metric)[:10]
+            assert_uses_index(queryset, index_name, ordered_scan=True)
+
+    def test_vendor_rank_query_plan(self):
+        """
+        This method will test vendors better than vendor are counted in rank index
+        """
+        queryset = Vendor.objects.filter(quality_rating_avg=5, vendor_code__gt="abc").values("vendor_code")
+        assert_uses_index(queryset, "vendor_quality_rank_idx", covering=True)
+        queryset = Vendor.objects.filter(quality_rating_avg__gt=5).values("vendor_code")
+        assert_uses_index(queryset, "vendor_quality_rank_idx", covering=True)
+
+    @pytest.mark.parametrize("params, index_name", [
+        ({"vendor": "test"}, "po_vendor_order_date_idx"),
+        ({"status": "pending"}, "po_status_order_date_idx"),
+        ({"expected_delivery_date_from": "2024-01-01", "expected_delivery_date_to": "2024-02-01"}, "po_expected_delivery_idx"),
+        ({"delivery_date_from": "2024-01-01"}, "po_delivery_date_idx"),
+        ({"acknowledgment_date_to": "2024-01-01"}, "po_acknowledgment_date_idx"),
+        ({"order_date_from": "2024-01-01"}, "po_order_date_idx"),
+    ])
+    def test_purchase_order_filter_query_plan(self, params, index_name):
+        """
+        This method will test purchase orders matching each filter are counted from index
+        """
+        request = Request(RequestFactory().get("/api/purchase_orders/", params))
+        queryset = PurchaseOrderFilter().filter_queryset(request, PurchaseOrder.objects.all(), None)
+        assert_uses_index(queryset.values("pk"), index_name)
+
+    def test_overdue_filter_query_plan(self):
+        """
+        This method will test late and pending past due orders are read from their indexes
+        """
+        request = Request(RequestFactory().get("/api/purchase_orders/", {"overdue": "true"}))
+        queryset = PurchaseOrderFilter().filter_queryset(request, PurchaseOrder.objects.all(), None)
+        plan = get_query_plan(queryset.values("pk"))
+        assert "po_late_delivery_idx" in plan, plan
+        if connection.vendor == "postgresql":
+            assert "Seq Scan" not in plan, plan
+        else:
+            assert "SCAN api_purchaseorder\n" not in plan + "\n", plan
+
+    def test_item_filter_query_plan(self):
+        """
+        This method will test orders containing item are found from sku index of line items
+        """
+        request = Request(RequestFactory().get("/api/purchase_orders/", {"item": "bolt"}))
+        queryset = PurchaseOrderFilter().filter_queryset(request, PurchaseOrder.objects.all(), None)
+        plan = get_query_plan(queryset.values("pk"))
+        assert "po_item_sku_idx" in plan, plan
+        assert_uses_index(PurchaseOrderItem.objects.filter(sku="bolt").values("purchase_order_id"), "po_item_sku_idx",
+                          covering=True)
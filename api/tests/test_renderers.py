@@ -0,0 +1,90 @@
+import pytest
+import decimal
+import uuid
+from datetime import datetime, date, timezone as dt_timezone
+from rest_framework.renderers import JSONRenderer
+from django.utils import timezone
+from api.models import *
+from api.renderers import FastJSONRenderer, EncodedJSON
+from api.tests.test_purchaseorder_api import get_token, client
+
+DATA = {
+    "datetime": datetime(2024, 1, 2, 3, 4, 5, 600, tzinfo=dt_timezone.utc),
+    "naive_datetime": datetime(2024, 1, 2, 3, 4, 5),
+    "date": date(2024, 1, 2),
+    "uuid": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+    "decimal": decimal.Decimal("1.25"),
+    "float": 0.1,
+    "text": "\u00fcn\u00efcode \u2028 line \u2029 \"quoted\"",
+    "nested": [{"items": {"item1": {"qtn": 1}}, "empty": None, "flag": True}],
+}
+
+class TestFastJSONRenderer:
+    """
+    This class is created for testing fast json renderer returns same bytes as rest framework json renderer
+    """
+
+    @pytest.mark.parametrize("accepted_media_type", [None, "application/json; indent=4"])
+    def test_same_bytes_as_json_renderer(self, accepted_media_type):
+        """
+        This method will test common types are rendered same as rest framework renderer
+        """
+        assert FastJSONRenderer().render(DATA, accepted_media_type) == JSONRenderer().render(DATA, accepted_media_type)
+        assert FastJSONRenderer().render(None) == b""
+
+    @pytest.mark.parametrize("accepted_media_type", [None, "application/json; indent=4"])
+    def test_encoded_fragments(self, accepted_media_type):
+        """
+        This method will test pre-encoded json values are rendered same as values they contain
+        """
+        renderer = FastJSONRenderer()
+        rows = [DATA, {"name": "second", "value": [1, 2]}]
+        data = {"next": None, "results": [EncodedJSON(renderer.encode(row)) for row in rows]}
+        expected = JSONRenderer().render({"next": None, "results": rows}, accepted_media_type)
+        assert renderer.render(data, accepted_media_type) == expected
+
+    def test_placeholder_text_is_not_replaced(self):
+        """
+        This method will test strings looking like placeholders are not replaced when they do not contain token
+        """
+        data = {"text": "fragment-0", "rows": [EncodedJSON("[1]")]}
+        assert FastJSONRenderer().render(data) == b'{"text":"fragment-0","rows":[[1]]}'
+
+@pytest.mark.django_db
+class TestVendorRowCache:
+    """
+    This class is created for testing cached vendor rows of vendor list api
+    """
+    client = client
+
+    def test_cached_rows_are_invalidated(self):
+        """
+        This method will test vendor list returns changed vendor details after vendor and its metrics are updated
+        """
+        token = get_token()
+        headers = {"Authorization":f"Bearer {token}"}
+        vendor = Vendor.objects.create(name="test", contact_details="87123656123", address="test address")
+        assert self.client.get("/api/vendors/", headers=headers).json()["results"][0]["name"] == "test"
+
+        vendor.name = "changed"
+        vendor.save()
+        assert self.client.get("/api/vendors/", headers=headers).json()["results"][0]["name"] == "changed"
+
+        PurchaseOrder(vendor=vendor, expected_delivery_date=timezone.now(), delivery_date=timezone.now(), items={},
+                      quantity=1, status="completed", quality_rating=8).save()
+        result = self.client.get("/api/vendors/", headers=headers).json()["results"][0]
+        assert result["quality_rating_avg"] == 8
+        assert result["fulfillment_rate"] == 1
+
+    def test_cached_rows_use_request_host(self, settings):
+        """
+        This method will test cached vendor rows are kept separately for each base url
+        """
+        settings.ALLOWED_HOSTS = ["testserver", "example.com"]
+        token = get_token()
+        headers = {"Authorization":f"Bearer {token}"}
+        Vendor.objects.create(name="test", contact_details="87123656123", address="test address")
+        first = self.client.get("/api/vendors/", headers=headers).json()["results"][0]
+        second = self.client.get("/api/vendors/", headers=headers, HTTP_HOST="example.com").json()["results"][0]
+        assert first["url"].startswith("http://testserver/")
+        assert second["url"].startswith("http://example.com/")
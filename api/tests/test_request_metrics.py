@@ -0,0 +1,99 @@
+import pytest
+import logging
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+from api.models import *
+from api.middleware import registry, Histogram
+from api.tests.test_purchaseorder_api import get_token, client
+
+@pytest.mark.django_db
+class TestRequestMetrics:
+    """
+    This class is created for testing request metrics middleware and metrics api
+    """
+    client = client
+    metrics_url = "/api/_metrics"
+
+    def test_histogram_buckets(self):
+        """
+        This method will test values are counted in cumulative buckets
+        """
+        histogram = Histogram((1, 5, 10))
+        for value in (0, 3, 7, 20):
+            histogram.observe(value)
+        assert histogram.counts == [1, 2, 3]
+        assert histogram.count == 4
+        assert histogram.sum == 30
+
+    def test_metrics_api(self):
+        """
+        This method will test request metrics are recorded with view name and method and returned in prometheus format
+        """
+        registry.clear()
+        token = get_token()
+        vendor = Vendor(name="test",contact_details="87123656123", address="test address")
+        vendor.save()
+        headers = {"Authorization":f"Bearer {token}"}
+        assert self.client.get("/api/vendors/", headers=headers).status_code == 200
+        assert self.client.get(f"/api/vendors/{vendor.pk}/performance", headers=headers).status_code == 200
+
+        response = self.client.get(self.metrics_url, headers=headers)
+        assert response.status_code == 200
+        assert response["Content-Type"].startswith("text/plain")
+        text = response.content.decode()
+        assert "# TYPE api_request_duration_seconds histogram" in text
+        assert 'api_request_db_queries_count{view="vendor-list",method="GET"} 1' in text
+        assert 'api_request_render_seconds_count{view="vendors_performance",method="GET"} 1' in text
+        assert 'api_request_duration_seconds_bucket{view="vendor-list",method="GET",le="+Inf"} 1' in text
+
+        #query count of vendor list is recorded in histogram sum
+        queries = [line for line in text.splitlines()
+                   if line.startswith('api_request_db_queries_sum{view="vendor-list",method="GET"}')]
+        assert float(queries[0].split()[-1]) >= 1
+
+    def test_metrics_api_requires_authentication(self):
+        """
+        This method will test metrics api is not returned without token to address outside of allowed networks
+        """
+        response = self.client.get(self.metrics_url, REMOTE_ADDR="10.1.2.3")
+        assert response.status_code == 401
+
+    def test_metrics_api_allowed_network(self, settings):
+        """
+        This method will test metrics api is returned without token to address of allowed networks for scraping
+        """
+        settings.REQUEST_METRICS_ALLOWED_NETWORKS = ["10.1.0.0/16"]
+        response = self.client.get(self.metrics_url, REMOTE_ADDR="10.1.2.3")
+        assert response.status_code == 200
+        assert response["Content-Type"].startswith("text/plain")
+
+    def test_slow_request_logging(self, settings, caplog):
+        """
+        This method will test requests slower than threshold are logged with their sql
+        """
+        settings.SLOW_REQUEST_THRESHOLD_MS = 0
+        token = get_token()
+        with caplog.at_level(logging.WARNING, logger="api.slow_requests"):
+            self.client.get("/api/vendors/", headers={"Authorization":f"Bearer {token}"})
+        assert any("vendor-list" in record.getMessage() and "api_vendor" in record.getMessage()
+                   for record in caplog.records)
+
+    @pytest.mark.parametrize("urlconf", ["vendor_management_sys.urls", "api.tests.test_async_views"])
+    def test_asgi_request_queries_are_counted(self, settings, urlconf):
+        """
+        This method will test queries of asgi requests run by orm in other threads are counted for sync and async views
+        """
+        settings.ROOT_URLCONF = urlconf
+        registry.clear()
+        token = get_token()
+        Vendor(name="test",contact_details="87123656123", address="test address").save()
+        response = async_to_sync(AsyncClient().get)("/api/vendors/", headers={"Authorization":f"Bearer {token}"})
+        assert response.status_code == 200
+
+        text = registry.render()
+        queries = [line for line in text.splitlines()
+                   if line.startswith('api_request_db_queries_sum{view="vendor-list",method="GET"}')]
+        assert float(queries[0].split()[-1]) >= 1
+        durations = [line for line in text.splitlines()
+                     if line.startswith('api_request_db_duration_seconds_sum{view="vendor-list",method="GET"}')]
+        assert float(durations[0].split()[-1]) > 0
@@ -0,0 +1,56 @@
+import pytest
+from datetime import datetime
+from rest_framework.request import Request
+from rest_framework.reverse import reverse
+from rest_framework.test import APIRequestFactory
+from api.models import *
+from api.serializers import cached_reverse, VendorSerializer, PurchaseOrderSerializer
+
+def get_request(path="/api/vendors/", **params):
+    """
+    This function will create rest framework request used for building absolute urls
+    """
+    return Request(APIRequestFactory().get(path, params))
+
+@pytest.mark.django_db
+class TestCachedReverse:
+    """
+    This class is created for testing urls reversed with url templates are same as urls from reverse
+    """
+
+    @pytest.mark.parametrize("params", [{}, {"format": "json"}])
+    def test_serializer_urls_are_same_as_reverse(self, params):
+        """
+        This method will test url fields of vendor and purchase order serializers are same as reversed urls
+        """
+        vendor = Vendor.objects.create(name="test", contact_details="87123656123", address="test address")
+        orders = [PurchaseOrder.objects.create(vendor=vendor, expected_delivery_date=datetime.now(), items={}, quantity=1)
+                  for _ in range(3)]
+        request = get_request(**params)
+
+        for data in VendorSerializer(Vendor.objects.all(), many=True, context={"request": request}).data:
+            assert data["url"] == reverse("vendor-detail", kwargs={"pk": data["vendor_code"]}, request=request)
+            assert data["performance_url"] == reverse("vendors_performance", kwargs={"vendor_id": data["vendor_code"]},
+                                                      request=request)
+
+        data = PurchaseOrderSerializer(orders, many=True, context={"request": request}).data
+        for order, order_data in zip(orders, data):
+            assert order_data["url"] == reverse("purchaseorder-detail", kwargs={"pk": order.po_number}, request=request)
+            assert order_data["acknowledge_url"] == reverse("purchase_order_ack", kwargs={"pk": order.po_number},
+                                                            request=request)
+        assert ("purchase_order_ack", None, ("pk",)) in request._url_templates
+
+    def test_unsafe_values_are_reversed(self):
+        """
+        This method will test values changed by url quoting are reversed without template
+        """
+        request = get_request()
+        for value in ("abc-123", "a b", "a%2F", "ü", "{pk}", "abc_123"):
+            assert cached_reverse("vendor-detail", kwargs={"pk": value}, request=request) == \
+                reverse("vendor-detail", kwargs={"pk": value}, request=request)
+
+    def test_reverse_without_request(self):
+        """
+        This method will test relative url is returned when request is not passed
+        """
+        assert cached_reverse("vendor-detail", kwargs={"pk": "abc"}) == reverse("vendor-detail", kwargs={"pk": "abc"})
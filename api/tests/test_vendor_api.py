@@ -1,6 +1,9 @@
 import pytest
 from api.models import *
 from api.tests.test_purchaseorder_api import get_token, client
+import json
+from django.utils import timezone
+from datetime import datetime, timezone as dt_timezone
 
 @pytest.mark.django_db
 class TestVendorApi:
@@ -83,4 +86,86 @@ class TestVendorApi:
         token = get_token()
         order = self.create_vendor()
         response = self.client.get(self.vendor_url + f"{order.pk}/performance" , headers={"Authorization":f"Bearer {token}"})
-        assert response.status_code == 200
\ No newline at end of file
+        assert response.status_code == 200
+
+    def test_get_vendors_pagination_and_fields(self):
+        """
+        This method will test cursor pagination and field projection of vendors list api
+        """
+        token = get_token()
+        vendors = sorted([self.create_vendor() for _ in range(3)], key=lambda vendor: str(vendor.pk))
+        response = self.client.get(self.vendor_url, {"page_size": 2, "fields": "vendor_code,name"},
+                                   headers={"Authorization":f"Bearer {token}"})
+        assert response.status_code == 200
+        assert response.json()["results"] == [{"vendor_code": str(vendor.pk), "name": vendor.name} for vendor in vendors[:2]]
+
+        response = self.client.get(response.json()["next"], headers={"Authorization":f"Bearer {token}"})
+        assert [vendor["vendor_code"] for vendor in response.json()["results"]] == [str(vendors[2].pk)]
+
+    def test_export_vendor_performance_history(self):
+        """
+        This method will test streaming export of vendor performance history
+        """
+        token = get_token()
+        vendor = self.create_vendor()
+        HistoricalPerformance.objects.create(vendor=vendor, on_time_delivery_rate=1, quality_rating_avg=2,
+                                             average_response_time=3, fulfillment_rate=4, json_data={})
+        response = self.client.get("/api/historical_performance/export", {"format": "ndjson", "vendor": vendor.pk},
+                                   headers={"Authorization":f"Bearer {token}"})
+        assert response.status_code == 200
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).decode().splitlines()]
+        assert [row["quality_rating_avg"] for row in rows] == [2]
+
+    def test_get_vendor_performance_cache(self):
+        """
+        This method will test etag of cached vendor performance api and invalidation after metric change
+        """
+        token = get_token()
+        vendor = self.create_vendor()
+        url = self.vendor_url + f"{vendor.pk}/performance"
+        response = self.client.get(url, headers={"Authorization":f"Bearer {token}"})
+        etag = response["ETag"]
+        assert response.json()["fulfillment_rate"] == 0
+
+        response = self.client.get(url, headers={"Authorization":f"Bearer {token}", "If-None-Match": etag})
+        assert response.status_code == 304
+
+        order = PurchaseOrder(vendor=vendor, expected_delivery_date=timezone.now(), items={}, quantity=1, status="completed")
+        order.save()
+        response = self.client.get(url, headers={"Authorization":f"Bearer {token}", "If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.json()["fulfillment_rate"] == 1
+        assert response["ETag"] != etag
+
+        vendor.name = "renamed"
+        vendor.save()
+        response = self.client.get(url, headers={"Authorization":f"Bearer {token}"})
+        assert response.json()["name"] == "renamed"
+
+        response = self.client.get(self.vendor_url + "missing/performance", headers={"Authorization":f"Bearer {token}"})
+        assert response.status_code == 404
+
+    def test_get_vendor_performance_history(self):
+        """
+        This method will test vendor performance history api grouped in day buckets
+        """
+        token = get_token()
+        vendor = self.create_vendor()
+        for day, hour, rate in ((1, 1, 0.2), (1, 5, 0.4), (2, 3, 0.9)):
+            record = HistoricalPerformance.objects.create(vendor=vendor, on_time_delivery_rate=rate, quality_rating_avg=5,
+                                                          average_response_time=1, fulfillment_rate=1, json_data={})
+            HistoricalPerformance.objects.filter(pk=record.pk).update(date=datetime(2023, 12, day, hour, tzinfo=dt_timezone.utc))
+
+        url = self.vendor_url + f"{vendor.pk}/performance/history"
+        response = self.client.get(url, {"bucket": "day", "from": "2023-12-01"}, headers={"Authorization":f"Bearer {token}"})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["time"] == ["2023-12-01T00:00:00Z", "2023-12-02T00:00:00Z"]
+        assert data["on_time_delivery_rate"] == [0.3, 0.9]
+
+        response = self.client.get(url, {"bucket": "day", "agg": "last", "to": "2023-12-02"},
+                                   headers={"Authorization":f"Bearer {token}"})
+        assert response.json()["on_time_delivery_rate"] == [0.4]
+
+        response = self.client.get(url, {"bucket": "month"}, headers={"Authorization":f"Bearer {token}"})
+        assert response.status_code == 400
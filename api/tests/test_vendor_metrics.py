@@ -0,0 +1,517 @@
+import pytest
+import threading
+import time
+from api.models import *
+from api import metrics
+from api.metrics import aggregate_vendor_counters, COUNTER_FIELDS
+from api.transactions import atomic_with_retry
+from api.tests.test_purchaseorder_api import get_token
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management import call_command, CommandError
+from django.db import connection, OperationalError
+from django.test import override_settings
+from django.test.client import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from datetime import timedelta
+from io import StringIO
+
+@pytest.mark.django_db
+class TestVendorMetrics:
+    """
+    This class is created for testing vendor metric counters updated by purchase order changes
+    """
+
+    def create_vendor(self):
+        """
+        This method will create new vendor in database
+        """
+        vendor = Vendor(name="test",contact_details="87123656123", address="test address")
+        vendor.save()
+        return vendor
+
+    def create_purchase_order(self, vendor, **kwargs):
+        """
+        This method will create new purchase order in database
+        """
+        order = PurchaseOrder(vendor=vendor,
+                              expected_delivery_date=timezone.now() + timedelta(days=1),
+                              items={"test":"test item"},
+                              quantity=1,
+                              **kwargs)
+        order.save()
+        return order
+
+    def complete_order(self, order, quality_rating=None, delivered_late=False):
+        """
+        This method will mark purchase order as completed
+        """
+        order.status = "completed"
+        order.quality_rating = quality_rating
+        order.delivery_date = order.expected_delivery_date + timedelta(days=(1 if delivered_late else -1))
+        order.save()
+
+    def assert_counters_match_orders(self, vendor):
+        """
+        This method will check stored counters against counters calculated from purchase orders
+        """
+        counter = VendorMetricCounter.objects.get(vendor=vendor)
+        expected = aggregate_vendor_counters([vendor.pk])[vendor.pk]
+        for field in COUNTER_FIELDS:
+            assert getattr(counter, field) == pytest.approx(expected[field])
+
+    def test_counter_created_with_vendor(self):
+        """
+        This method will test metric counter is created for new vendor
+        """
+        vendor = self.create_vendor()
+        assert VendorMetricCounter.objects.filter(vendor=vendor, total_orders=0).exists()
+
+    def test_metrics_updated_on_status_change(self):
+        """
+        This method will test vendor metrics after completing purchase orders
+        """
+        vendor = self.create_vendor()
+        orders = [self.create_purchase_order(vendor) for _ in range(4)]
+        self.complete_order(orders[0], quality_rating=8)
+        self.complete_order(orders[1], quality_rating=6, delivered_late=True)
+        self.complete_order(orders[2])
+
+        vendor.refresh_from_db()
+        assert vendor.fulfillment_rate == 0.75
+        assert vendor.on_time_delivery_rate == 0.67
+        assert vendor.quality_rating_avg == 7
+        self.assert_counters_match_orders(vendor)
+
+    def test_metrics_updated_on_acknowledgment(self):
+        """
+        This method will test average response time after acknowledging purchase orders
+        """
+        vendor = self.create_vendor()
+        first = self.create_purchase_order(vendor)
+        second = self.create_purchase_order(vendor)
+        first.acknowledgment_date = first.issue_date + timedelta(hours=2)
+        first.save()
+        second.acknowledgment_date = second.issue_date + timedelta(hours=4)
+        second.save()
+
+        vendor.refresh_from_db()
+        assert vendor.average_response_time == 3
+        self.assert_counters_match_orders(vendor)
+
+    def test_metrics_updated_on_delete(self):
+        """
+        This method will test vendor metrics after deleting purchase order
+        """
+        vendor = self.create_vendor()
+        order = self.create_purchase_order(vendor)
+        self.complete_order(order, quality_rating=5)
+        self.create_purchase_order(vendor).delete()
+        order.delete()
+
+        vendor.refresh_from_db()
+        assert vendor.fulfillment_rate == 0
+        assert vendor.quality_rating_avg == 0
+        self.assert_counters_match_orders(vendor)
+
+    def test_update_query_count_does_not_depend_on_orders(self):
+        """
+        This method will test number of queries for status change is same for small and large vendors
+        """
+        query_counts = []
+        for order_count in (1, 20):
+            vendor = self.create_vendor()
+            orders = [self.create_purchase_order(vendor) for _ in range(order_count)]
+            with CaptureQueriesContext(connection) as queries:
+                self.complete_order(orders[-1], quality_rating=7)
+            query_counts.append(len(queries))
+        assert query_counts[0] == query_counts[1]
+
+    def test_save_does_not_fetch_stored_order(self):
+        """
+        This method will test purchase order is not fetched again for finding changed fields on create and update
+        """
+        vendor = self.create_vendor()
+        with CaptureQueriesContext(connection) as queries:
+            order = self.create_purchase_order(vendor)
+            order = PurchaseOrder.objects.get(pk=order.pk)
+            self.complete_order(order, quality_rating=9)
+        order_selects = [query["sql"] for query in queries
+                         if query["sql"].startswith("SELECT") and 'FROM "api_purchaseorder"' in query["sql"]]
+        assert len(order_selects) == 1
+        vendor.refresh_from_db()
+        assert vendor.quality_rating_avg == 9
+
+    def test_changed_fields_tracking(self):
+        """
+        This method will test changed metric fields of loaded purchase order
+        """
+        vendor = self.create_vendor()
+        order = PurchaseOrder.objects.get(pk=self.create_purchase_order(vendor).pk)
+        assert order.get_changed_fields() == set()
+        order.status = "canceled"
+        order.quantity = 5
+        assert order.get_changed_fields() == {"status"}
+        order.save()
+        assert order.get_changed_fields() == set()
+
+    def test_update_fields_skip_unsaved_metric_fields(self):
+        """
+        This method will test metric fields which are not in update_fields do not change counters
+        """
+        vendor = Vendor.objects.get(pk=self.create_vendor().pk)
+        order = PurchaseOrder.objects.get(pk=self.create_purchase_order(vendor).pk)
+        order.status = "completed"
+        order.quantity = 5
+        order.save(update_fields=["quantity"])
+        self.assert_counters_match_orders(vendor)
+        assert VendorMetricCounter.objects.get(vendor=vendor).completed_orders == 0
+
+        #unsaved status is still a change for next save
+        order.save()
+        self.assert_counters_match_orders(vendor)
+        assert VendorMetricCounter.objects.get(vendor=vendor).completed_orders == 1
+
+    def test_refresh_from_db_updates_loaded_values(self):
+        """
+        This method will test order refreshed after change made by other instance does not apply same change again
+        """
+        vendor = Vendor.objects.get(pk=self.create_vendor().pk)
+        order = self.create_purchase_order(vendor)
+        other = PurchaseOrder.objects.get(pk=order.pk)
+        self.complete_order(other, quality_rating=5)
+        order.refresh_from_db()
+        assert order.get_changed_fields() == set()
+        order.quantity = 5
+        order.save()
+        self.complete_order(order, quality_rating=5)
+        self.assert_counters_match_orders(vendor)
+        assert VendorMetricCounter.objects.get(vendor=vendor).completed_orders == 1
+
+        order.refresh_from_db(fields=["status"])
+        assert order.get_loaded_values()["status"] == "completed"
+
+    def test_stale_order_update(self):
+        """
+        This method will test order saved after other instance changed it applies changes from stored values
+        """
+        vendor = Vendor.objects.get(pk=self.create_vendor().pk)
+        order = self.create_purchase_order(vendor)
+        stale = PurchaseOrder.objects.get(pk=order.pk)
+        self.complete_order(PurchaseOrder.objects.get(pk=order.pk), quality_rating=6)
+        stale.status = "canceled"
+        stale.save()
+        self.assert_counters_match_orders(vendor)
+        counter = VendorMetricCounter.objects.get(vendor=vendor)
+        assert (counter.completed_orders, counter.quality_rating_count) == (0, 0)
+
+    def test_deferred_order_update(self):
+        """
+        This method will test metrics of purchase order loaded with deferred metric fields
+        """
+        vendor = self.create_vendor()
+        order = PurchaseOrder.objects.only("po_number", "quantity").get(pk=self.create_purchase_order(vendor).pk)
+        order.status = "completed"
+        order.save()
+        vendor.refresh_from_db()
+        assert vendor.fulfillment_rate == 1
+        self.assert_counters_match_orders(vendor)
+
+    @override_settings(VENDOR_METRICS_MODE="outbox")
+    def test_outbox_mode(self):
+        """
+        This method will test metric changes are stored in outbox and applied by metrics worker command
+        """
+        vendor = self.create_vendor()
+        orders = [self.create_purchase_order(vendor) for _ in range(3)]
+        self.complete_order(orders[0], quality_rating=4)
+        self.complete_order(orders[1], quality_rating=8)
+
+        vendor.refresh_from_db()
+        assert vendor.fulfillment_rate == 0
+        assert MetricEvent.objects.filter(vendor=vendor).count() == 5
+
+        history_count = HistoricalPerformance.objects.filter(vendor=vendor).count()
+        call_command("metrics_worker", "--once", stdout=StringIO())
+
+        vendor.refresh_from_db()
+        assert vendor.fulfillment_rate == 0.67
+        assert vendor.quality_rating_avg == 6
+        assert not MetricEvent.objects.exists()
+        assert HistoricalPerformance.objects.filter(vendor=vendor).count() == history_count + 1
+        self.assert_counters_match_orders(vendor)
+
+        call_command("metrics_worker", "--once", stdout=StringIO())
+        self.assert_counters_match_orders(vendor)
+
+    @override_settings(VENDOR_METRICS_MODE="outbox")
+    def test_outbox_changes_cancelling_out(self):
+        """
+        This method will test metrics worker applies events of order created and deleted before worker runs
+        """
+        vendor = Vendor.objects.get(pk=self.create_vendor().pk)
+        self.create_purchase_order(vendor).delete()
+        assert MetricEvent.objects.filter(vendor=vendor).count() == 2
+
+        call_command("metrics_worker", "--once", stdout=StringIO())
+        assert not MetricEvent.objects.exists()
+        self.assert_counters_match_orders(vendor)
+        assert metrics.apply_metric_deltas(vendor.pk, dict.fromkeys(COUNTER_FIELDS, 0))["fulfillment_rate"] == 0
+
+    def test_unchanged_metrics_skip_history(self):
+        """
+        This method will test history record is not created when saved change does not change any metric
+        """
+        vendor = self.create_vendor()
+        order = self.create_purchase_order(vendor)
+        history_count = HistoricalPerformance.objects.filter(vendor=vendor).count()
+        order.expected_delivery_date += timedelta(days=1)
+        order.quantity = 10
+        order.save()
+        assert HistoricalPerformance.objects.filter(vendor=vendor).count() == history_count
+
+    def test_compact_history(self):
+        """
+        This method will test old history records are rolled into daily and weekly records
+        """
+        vendor = self.create_vendor()
+        now = timezone.now()
+        today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        dates = [today - timedelta(days=400) + timedelta(hours=hour) for hour in (11, 10)] + \
+                [today - timedelta(days=40) + timedelta(hours=hour) for hour in (10, 11, 12)] + [now]
+        for index, date in enumerate(dates):
+            HistoricalPerformance.objects.create(vendor=vendor, date=date, on_time_delivery_rate=index, quality_rating_avg=0,
+                                                 average_response_time=0, fulfillment_rate=0, json_data={"index": index})
+
+        call_command("compact_history", "--dry-run", stdout=StringIO())
+        assert HistoricalPerformance.objects.filter(vendor=vendor).count() == 6
+
+        call_command("compact_history", stdout=StringIO())
+        records = HistoricalPerformance.objects.filter(vendor=vendor).order_by("date")
+        granularities = [record.granularity for record in records]
+        assert granularities[0] == "week"
+        assert granularities[-1] == "raw"
+        assert "day" in granularities
+        assert len(records) < 6
+        assert records[0].json_data == {"index": 0}
+
+    def test_rebuild_vendor_metrics(self):
+        """
+        This method will test rebuild command reports and fixes counters and metrics changed outside of application
+        """
+        vendors = [self.create_vendor() for _ in range(3)]
+        for index, vendor in enumerate(vendors):
+            for rating in range(index + 1):
+                self.complete_order(self.create_purchase_order(vendor), quality_rating=rating + 5)
+        VendorMetricCounter.objects.filter(vendor=vendors[0]).update(total_orders=10, quality_rating_sum=0)
+        Vendor.objects.filter(pk=vendors[2].pk).update(fulfillment_rate=0.5, performance_score=1)
+        vendor_ids = sorted(str(vendor.pk) for vendor in vendors)
+
+        out = StringIO()
+        call_command("rebuild_vendor_metrics", "--verify", "--chunk-size", "2", stdout=out)
+        assert "2 of 3 vendors differ" in out.getvalue()
+        assert f"{vendors[0].pk}: total_orders: 10 -> 1, quality_rating_sum: 0.0 -> 5" in out.getvalue()
+        assert "fulfillment_rate: 0.5 -> 1.0" in out.getvalue()
+        assert VendorMetricCounter.objects.get(vendor=vendors[0]).total_orders == 10
+
+        out = StringIO()
+        call_command("rebuild_vendor_metrics", "--vendor", vendor_ids[0], "--vendor", vendor_ids[1], stdout=out)
+        assert "Rebuilt metrics of 2 vendors" in out.getvalue()
+
+        call_command("rebuild_vendor_metrics", "--chunk-size", "2", stdout=StringIO())
+        for vendor in vendors:
+            self.assert_counters_match_orders(Vendor.objects.get(pk=vendor.pk))
+        assert Vendor.objects.get(pk=vendors[2].pk).fulfillment_rate == 1
+        out = StringIO()
+        call_command("rebuild_vendor_metrics", "--verify", stdout=out)
+        assert out.getvalue().strip() == "0 of 3 vendors differ from purchase orders"
+
+        with pytest.raises(CommandError):
+            call_command("rebuild_vendor_metrics", "--vendor", "missing", stdout=StringIO())
+
+@pytest.mark.django_db(transaction=True)
+class TestConcurrentMetricUpdates:
+    """
+    This class is created for testing vendor metric counters stay exact when many writers change orders of same vendor
+    """
+    create_vendor = TestVendorMetrics.create_vendor
+    create_purchase_order = TestVendorMetrics.create_purchase_order
+    complete_order = TestVendorMetrics.complete_order
+    assert_counters_match_orders = TestVendorMetrics.assert_counters_match_orders
+
+    def run_in_threads(self, func, arguments, workers=8):
+        """
+        This method will call function for each argument from thread pool, each thread closes its own connection
+        """
+        def call(argument):
+            try:
+                return func(argument)
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(call, arguments))
+
+    def test_concurrent_order_updates(self, settings):
+        """
+        This method will test parallel creates, status changes and acknowledgments of orders of same vendor
+        """
+        #in memory test database reports locked tables at once instead of waiting for busy timeout
+        settings.TRANSACTION_RETRIES = {"ATTEMPTS": 50, "BACKOFF": 0.005, "MAX_BACKOFF": 0.05}
+        vendor = Vendor.objects.get(pk=self.create_vendor().pk)
+        orders = [self.create_purchase_order(vendor) for _ in range(24)]
+
+        def change_order(index):
+            if index < len(orders):
+                order = orders[index]
+                if index % 2:
+                    self.complete_order(order, quality_rating=index % 5 + 1, delivered_late=index % 3 == 0)
+                else:
+                    order.acknowledgment_date = order.issue_date + timedelta(hours=index)
+                    order.save()
+            else:
+                self.create_purchase_order(vendor)
+        self.run_in_threads(change_order, range(len(orders) + 16))
+
+        counter = VendorMetricCounter.objects.get(vendor=vendor)
+        assert counter.total_orders == 40
+        assert counter.completed_orders == 12
+        assert counter.response_time_count == 12
+        self.assert_counters_match_orders(vendor)
+
+        vendor.refresh_from_db()
+        latest = HistoricalPerformance.objects.filter(vendor=vendor).latest("date")
+        assert latest.json_data["fullfilment_rate_total_orders"] == 40
+        assert vendor.fulfillment_rate == round(12/40, 2)
+
+    def test_concurrent_updates_of_same_order(self, settings):
+        """
+        This method will test parallel saves of same order loaded before any of them is saved apply each change once
+        """
+        settings.TRANSACTION_RETRIES = {"ATTEMPTS": 50, "BACKOFF": 0.005, "MAX_BACKOFF": 0.05}
+        vendor = Vendor.objects.get(pk=self.create_vendor().pk)
+        order = self.create_purchase_order(vendor)
+        #every writer changes status from pending which it loaded
+        copies = [PurchaseOrder.objects.get(pk=order.pk) for _ in range(16)]
+
+        def change_order(index):
+            copy = copies[index]
+            if index % 2:
+                self.complete_order(copy, quality_rating=index % 5 + 1)
+            else:
+                copy.status = "canceled"
+                copy.items = {f"item{index}": {"qtn": index}}
+                copy.save()
+        self.run_in_threads(change_order, range(len(copies)))
+
+        self.assert_counters_match_orders(vendor)
+        counter = VendorMetricCounter.objects.get(vendor=vendor)
+        assert counter.total_orders == 1
+        assert counter.completed_orders <= 1
+        order.refresh_from_db()
+        assert set(PurchaseOrderItem.objects.filter(purchase_order=order).values_list("sku", flat=True)) == set(order.items)
+
+    def test_lock_errors_are_retried(self, monkeypatch):
+        """
+        This method will test order save is started again after lock error and metrics are applied only once
+        """
+        vendor = Vendor.objects.get(pk=self.create_vendor().pk)
+        order = self.create_purchase_order(vendor)
+        calls = []
+        apply_metric_deltas = metrics.apply_metric_deltas
+
+        def locked_apply(vendor_id, deltas):
+            calls.append(vendor_id)
+            apply_metric_deltas(vendor_id, deltas)
+            if len(calls) == 1:
+                raise OperationalError("database is locked")
+        monkeypatch.setattr(metrics, "apply_metric_deltas", locked_apply)
+
+        self.complete_order(order, quality_rating=4)
+        assert len(calls) == 2
+        self.assert_counters_match_orders(vendor)
+        assert VendorMetricCounter.objects.get(vendor=vendor).completed_orders == 1
+
+        monkeypatch.setattr(metrics, "apply_metric_deltas", lambda vendor_id, deltas: 1/0)
+        with pytest.raises(ZeroDivisionError):
+            self.complete_order(order, quality_rating=5)
+        assert PurchaseOrder.objects.get(pk=order.pk).quality_rating == 4
+
+    @override_settings(VENDOR_METRICS_MODE="outbox")
+    def test_recompute_with_concurrent_outbox_change(self, settings, monkeypatch):
+        """
+        This method will test order saved while metrics are recalculated is counted once by recalculation or metrics worker
+        """
+        settings.TRANSACTION_RETRIES = {"ATTEMPTS": 50, "BACKOFF": 0.005, "MAX_BACKOFF": 0.05}
+        vendor = Vendor.objects.get(pk=self.create_vendor().pk)
+        self.create_purchase_order(vendor)
+        aggregating = threading.Event()
+        aggregate = metrics.aggregate_vendor_counters
+
+        def slow_aggregate(vendor_ids):
+            #order is saved by other thread between deleting outbox events and aggregating orders
+            aggregating.set()
+            time.sleep(0.3)
+            return aggregate(vendor_ids)
+        monkeypatch.setattr(metrics, "aggregate_vendor_counters", slow_aggregate)
+
+        def change(index):
+            if index:
+                aggregating.wait(5)
+                self.create_purchase_order(vendor)
+            else:
+                atomic_with_retry(lambda: metrics.recompute_vendor_metrics([vendor.pk]))
+        self.run_in_threads(change, range(2))
+
+        metrics.process_metric_events()
+        assert VendorMetricCounter.objects.get(vendor=vendor).total_orders == 2
+        self.assert_counters_match_orders(vendor)
+
+    @override_settings(VENDOR_METRICS_MODE="outbox")
+    def test_concurrent_bulk_writes_in_outbox_mode(self, settings):
+        """
+        This method will test bulk creates and updates recalculating metrics while single order saves store outbox events
+        and metrics worker applies them
+        """
+        settings.TRANSACTION_RETRIES = {"ATTEMPTS": 50, "BACKOFF": 0.005, "MAX_BACKOFF": 0.05}
+        token = get_token()
+        vendor = Vendor.objects.get(pk=self.create_vendor().pk)
+        orders = [self.create_purchase_order(vendor) for _ in range(12)]
+        url = "/api/purchase_orders/bulk"
+        headers = {"Authorization":f"Bearer {token}"}
+
+        def send(method, body):
+            #in memory test database also reports locked tables to reads of request validation which are not retried,
+            #errors are read from status because request exceptions are signalled to clients of all threads
+            client = Client(raise_request_exception=False)
+            for attempt in range(settings.TRANSACTION_RETRIES["ATTEMPTS"]):
+                response = getattr(client, method)(url, data=body, content_type="application/json", headers=headers)
+                if response.status_code != 500:
+                    return response.status_code
+                time.sleep(0.01)
+            return response.status_code
+
+        def change(index):
+            order = orders[index // 2]
+            if index % 4 == 0:
+                return send("post", [{"vendor": vendor.pk, "expected_delivery_date": "2030-12-12T16:52:41.061Z",
+                                      "items": {"item1": {"qtn": 1}}, "quantity": 1} for _ in range(2)])
+            if index % 4 == 1:
+                return send("patch", [{"po_number": order.pk, "status": "completed", "quality_rating": index % 5 + 1,
+                                       "delivery_date": order.expected_delivery_date.isoformat()}])
+            if index % 4 == 2:
+                order.acknowledgment_date = order.issue_date + timedelta(hours=index)
+                order.save()
+            else:
+                #metrics worker command processes failed batch again in next iteration
+                atomic_with_retry(metrics.process_metric_events)
+        statuses = self.run_in_threads(change, range(24))
+        assert set(statuses) == {201, 200, None}
+
+        while metrics.process_metric_events():
+            pass
+        counter = VendorMetricCounter.objects.get(vendor=vendor)
+        assert counter.total_orders == 24
+        assert counter.completed_orders == 6
+        assert counter.response_time_count == 6
+        self.assert_counters_match_orders(vendor)
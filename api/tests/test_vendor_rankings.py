@@ -0,0 +1,144 @@
+import pytest
+from datetime import timedelta
+from django.utils import timezone
+from api.models import *
+from api.metrics import calculate_performance_score
+from api.tests.test_purchaseorder_api import get_token, client
+
+@pytest.mark.django_db
+class TestVendorRankings:
+    """
+    This class is created for testing vendor rankings and vendor rank API's
+    """
+    client = client
+    rankings_url = "/api/vendors/rankings"
+
+    def create_vendors(self):
+        """
+        This method will create vendors with completed orders of different quality ratings and one vendor without orders
+        """
+        vendors = []
+        now = timezone.now()
+        for index, ratings in enumerate(([9, 9], [4], [7, 8, 9], [2, 10])):
+            vendor = Vendor.objects.create(name=f"test {index}", contact_details="87123656123", address="test address")
+            for rating in ratings:
+                PurchaseOrder(vendor=vendor, expected_delivery_date=now + timedelta(days=1), delivery_date=now, items={},
+                              quantity=1, status="completed", quality_rating=rating).save()
+            vendors.append(vendor)
+        vendors.append(Vendor.objects.create(name="empty", contact_details="87123656123", address="test address"))
+        return vendors
+
+    def get(self, url, params=None):
+        """
+        This method will call get api with token, token is created on first call
+        """
+        if not hasattr(self, "token"):
+            self.token = get_token()
+        return self.client.get(url, params or {}, headers={"Authorization":f"Bearer {self.token}"})
+
+    def test_performance_score(self, settings):
+        """
+        This method will test performance score is weighted from vendor metrics and stored with metrics
+        """
+        metrics = {"on_time_delivery_rate": 1, "quality_rating_avg": 5, "average_response_time": 24, "fulfillment_rate": 0.5}
+        settings.VENDOR_SCORE = {"WEIGHTS": {"quality_rating_avg": 1, "average_response_time": 1}, "RESPONSE_TIME_HOURS": 24}
+        assert calculate_performance_score(metrics, 1) == 50
+        assert calculate_performance_score(metrics, 0) == 25
+
+        vendors = self.create_vendors()
+        vendor = Vendor.objects.get(pk=vendors[1].pk)
+        assert vendor.performance_score == calculate_performance_score(
+            {field: getattr(vendor, field) for field in metrics}, 0)
+        assert vendor.performance_score > 0
+        assert Vendor.objects.get(pk=vendors[4].pk).performance_score == 0
+
+    def test_stale_performance_score_is_refreshed(self, settings):
+        """
+        This method will test score calculated with old weights is updated by order change which keeps same metrics
+        """
+        vendor = Vendor.objects.get(pk=self.create_vendors()[0].pk)
+        settings.VENDOR_SCORE = {"WEIGHTS": {"fulfillment_rate": 1}, "RESPONSE_TIME_HOURS": 24}
+        PurchaseOrder(vendor=vendor, expected_delivery_date=timezone.now() + timedelta(days=1), delivery_date=timezone.now(),
+                      items={}, quantity=1, status="completed", quality_rating=9).save()
+        vendor.refresh_from_db()
+        assert vendor.quality_rating_avg == 9
+        assert vendor.performance_score == 100
+
+    def test_rankings(self):
+        """
+        This method will test top and bottom vendors by metric with limit and minimum number of orders
+        """
+        vendors = self.create_vendors()
+        response = self.get(self.rankings_url, {"metric": "quality_rating_avg", "limit": 3})
+        assert response.status_code == 200
+        data = response.json()
+        assert (data["metric"], data["order"], data["total"]) == ("quality_rating_avg", "top", 5)
+        assert [row["name"] for row in data["results"]] == ["test 0", "test 2", "test 3"]
+        assert [row["rank"] for row in data["results"]] == [1, 2, 3]
+        assert data["results"][0]["value"] == 9
+        assert data["results"][0]["vendor_code"] == str(vendors[0].pk)
+
+        data = self.get(self.rankings_url, {"metric": "quality_rating_avg", "order": "bottom", "limit": 2}).json()
+        assert [(row["name"], row["rank"]) for row in data["results"]] == [("empty", 5), ("test 1", 4)]
+
+        data = self.get(self.rankings_url, {"metric": "quality_rating_avg", "order": "bottom", "min_orders": 2}).json()
+        assert data["total"] == 3
+        assert [(row["name"], row["rank"]) for row in data["results"]] == [("test 3", 3), ("test 2", 2), ("test 0", 1)]
+
+    @pytest.mark.parametrize("params", [{"metric": "name"}, {"order": "middle"}, {"limit": 0}, {"limit": 101},
+                                        {"limit": "ten"}, {"min_orders": -1}])
+    def test_rankings_invalid_params(self, params):
+        """
+        This method will test invalid query parameters of rankings api
+        """
+        response = self.get(self.rankings_url, params)
+        assert response.status_code == 400
+        assert list(response.json()) == list(params)
+
+    def test_vendor_rank(self):
+        """
+        This method will test rank and percentile of vendor match position of vendor in rankings
+        """
+        vendors = self.create_vendors()
+        for metric in ("performance_score", "quality_rating_avg", "average_response_time"):
+            ranking = self.get(self.rankings_url, {"metric": metric, "limit": 100}).json()["results"]
+            for row in ranking:
+                data = self.get(f"/api/vendors/{row['vendor_code']}/rank", {"metric": metric}).json()
+                assert (data["rank"], data["total"], data["value"]) == (row["rank"], 5, row["value"])
+
+        data = self.get(f"/api/vendors/{vendors[0].pk}/rank", {"metric": "quality_rating_avg"}).json()
+        assert (data["rank"], data["percentile"]) == (1, 100)
+        data = self.get(f"/api/vendors/{vendors[1].pk}/rank", {"metric": "quality_rating_avg", "min_orders": 1}).json()
+        assert (data["rank"], data["total"], data["percentile"]) == (4, 4, 0)
+
+    def test_response_time_rankings_skip_unacknowledged_vendors(self):
+        """
+        This method will test vendors without acknowledged orders are not ranked by response time and not counted in total
+        """
+        vendors = self.create_vendors()
+        for vendor, hours in ((vendors[0], 5), (vendors[2], 1)):
+            order = PurchaseOrder.objects.filter(vendor=vendor).first()
+            order.acknowledgment_date = order.issue_date + timedelta(hours=hours)
+            order.save()
+
+        data = self.get(self.rankings_url, {"metric": "average_response_time"}).json()
+        assert data["total"] == 2
+        assert [(row["name"], row["rank"]) for row in data["results"]] == [("test 2", 1), ("test 0", 2)]
+        data = self.get(self.rankings_url, {"metric": "average_response_time", "order": "bottom", "limit": 1}).json()
+        assert [(row["name"], row["rank"]) for row in data["results"]] == [("test 0", 2)]
+
+        data = self.get(f"/api/vendors/{vendors[0].pk}/rank", {"metric": "average_response_time"}).json()
+        assert (data["rank"], data["total"], data["percentile"]) == (2, 2, 0)
+        response = self.get(f"/api/vendors/{vendors[4].pk}/rank", {"metric": "average_response_time"})
+        assert response.status_code == 404
+        assert response.json() == {"error": "Vendor has no value of average_response_time"}
+
+    def test_vendor_rank_not_found(self):
+        """
+        This method will test rank of missing vendor and vendor with less orders than minimum
+        """
+        vendors = self.create_vendors()
+        assert self.get("/api/vendors/missing/rank").status_code == 404
+        response = self.get(f"/api/vendors/{vendors[4].pk}/rank", {"min_orders": 1})
+        assert response.status_code == 404
+        assert "error" in response.json()
@@ -0,0 +1,51 @@
+import random
+import time
+from django.conf import settings
+from django.db import transaction, DatabaseError, OperationalError
+
+# sqlstate codes of postgresql errors (serialization failure, deadlock, lock not available) which are solved by
+# running the transaction again
+RETRYABLE_SQLSTATES = {"40001", "40P01", "55P03"}
+
+class ConcurrentUpdateError(DatabaseError):
+    """This exception is raised when record was changed by other writer after it was loaded"""
+
+def is_lock_error(exc):
+    """This function returns True when database error was caused by lock of other transaction
+    :params:
+        exc: "OperationalError raised by database backend"
+    :return:
+        bool
+    """
+    cause = exc.__cause__
+    sqlstate = getattr(cause, "sqlstate", None) or getattr(cause, "pgcode", None)
+    if sqlstate is not None:
+        return sqlstate in RETRYABLE_SQLSTATES
+    #sqlite reports "database is locked" and "database table is locked"
+    return "is locked" in str(exc)
+
+def atomic_with_retry(func, using=None):
+    """This function is used for running function in transaction which is started again when it fails on lock of other
+    transaction, attempts and backoff are read from TRANSACTION_RETRIES setting
+    :params:
+        func: "function without arguments, it is called again for each attempt"
+        using: "database alias"
+    :return:
+        value returned by function
+    """
+    if transaction.get_connection(using).in_atomic_block:
+        #transaction of caller can not be started again from inside so error is passed to the caller
+        with transaction.atomic(using=using):
+            return func()
+
+    attempts = settings.TRANSACTION_RETRIES["ATTEMPTS"]
+    for attempt in range(1, attempts + 1):
+        try:
+            with transaction.atomic(using=using):
+                return func()
+        except OperationalError as exc:
+            if attempt == attempts or not is_lock_error(exc):
+                raise
+        #random backoff so writers which failed together do not collide again
+        backoff = min(settings.TRANSACTION_RETRIES["BACKOFF"] * 2 ** attempt, settings.TRANSACTION_RETRIES["MAX_BACKOFF"])
+        time.sleep(random.uniform(0, backoff))
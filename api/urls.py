@@ -1,7 +1,11 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import VendorViewSet, PurchaseOrderViewSet, VendorPerformance, PurchaseOrderAck
+from .views import VendorViewSet, PurchaseOrderViewSet, VendorPerformance, PurchaseOrderAck, PurchaseOrderBulk, \
+    PurchaseOrderExport, HistoricalPerformanceExport, VendorPerformanceHistory, RequestMetrics, VendorRankings, VendorRank, \
+    PurchaseOrderCount, PurchaseOrderItemTotals
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from .async_views import get_async_urlpatterns
 
 router = DefaultRouter()
 
@@ -12,9 +16,22 @@ router.register("purchase_orders", PurchaseOrderViewSet)
 urlpatterns = [
     path("", include(router.urls)),
     path("vendors/<str:vendor_id>/performance", VendorPerformance.as_view(), name="vendors_performance"),
+    path("vendors/<str:vendor_id>/performance/history", VendorPerformanceHistory.as_view(), name="vendors_performance_history"),
+    path("vendors/rankings", VendorRankings.as_view(), name="vendors_rankings"),
+    path("vendors/<str:vendor_id>/rank", VendorRank.as_view(), name="vendors_rank"),
+    path("purchase_orders/bulk", PurchaseOrderBulk.as_view(), name="purchase_order_bulk"),
+    path("purchase_orders/count", PurchaseOrderCount.as_view(), name="purchase_order_count"),
+    path("purchase_orders/items", PurchaseOrderItemTotals.as_view(), name="purchase_order_items"),
+    path("purchase_orders/export", PurchaseOrderExport.as_view(), name="purchase_order_export"),
+    path("historical_performance/export", HistoricalPerformanceExport.as_view(), name="historical_performance_export"),
+    path("_metrics", RequestMetrics.as_view(), name="request_metrics"),
     path("purchase_orders/<str:pk>/acknowledge", PurchaseOrderAck.as_view(), name="purchase_order_ack"),
 
     #token api
     path('token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
-]
\ No newline at end of file
+]
+
+if settings.ASYNC_READ_VIEWS:
+    #async views use same urls and names as sync views so they are added before them
+    urlpatterns = get_async_urlpatterns(router.urls + urlpatterns) + urlpatterns
@@ -1,39 +1,158 @@
+from collections import Counter
 from django.shortcuts import render
 from rest_framework.viewsets import ModelViewSet
 from .serializers import *
-from .models import Vendor, PurchaseOrder
+from .models import Vendor, PurchaseOrder, HistoricalPerformance, PurchaseOrderItem
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.mixins import UpdateModelMixin
 from rest_framework.generics import GenericAPIView
+from rest_framework.exceptions import ValidationError
 from drf_yasg.utils import swagger_auto_schema
 from django.utils.decorators import method_decorator
+from django.http import StreamingHttpResponse, HttpResponse
+from django.utils import timezone
+from django.utils.http import parse_etags
+from django.db.models import Avg, Max, Subquery, Count, Sum, F
+from django.db.models.functions import TruncHour, TruncDay, TruncWeek
 from .response_schema import VendorPerformanceSchema
+from .metrics import recompute_vendor_metrics, VENDOR_METRIC_FIELDS
+from .items import replace_line_items
+from .po_numbers import allocate_po_numbers
+from .transactions import atomic_with_retry
+from .cache import get_vendor_performance, get_vendor_rows, set_vendor_rows
+from .pagination import VendorCursorPagination, PurchaseOrderCursorPagination
+from .renderers import NDJSONRenderer, CSVRenderer, FastJSONRenderer, EncodedJSON
+from .filters import get_datetime_param, get_int_param, PurchaseOrderFilter
+from .rankings import RANKING_METRICS, RANKED_VENDOR_FILTERS, get_ranked_vendors, get_ranking_order, get_vendor_rank, get_percentile
+from .middleware import registry
+from .permissions import IsAuthenticatedOrMetricsNetwork
+from .fast_serializers import get_compiled_serializer
+from .serializers import get_url_template
 
-class VendorViewSet(ModelViewSet):
+class FieldProjectionMixin:
+    """
+    This class is used for returning only fields requested with `fields` query parameter from get api's,
+    both serializer fields and columns loaded from database are limited to requested fields
+    """
+    fields_query_param = "fields"
+
+    def get_requested_fields(self):
+        """This method returns list of requested fields or None when all fields are needed"""
+        request = getattr(self, "request", None)
+        if request is None or request.method != "GET" or not request.query_params.get(self.fields_query_param):
+            return None
+
+        fields = [field.strip() for field in request.query_params[self.fields_query_param].split(",") if field.strip()]
+        unknown_fields = set(fields) - set(self.get_serializer_class().Meta.fields)
+        if unknown_fields:
+            raise ValidationError({self.fields_query_param: [f"Unknown fields: {', '.join(sorted(unknown_fields))}"]})
+        return fields
+
+    def get_serializer(self, *args, **kwargs):
+        fields = self.get_requested_fields()
+        if fields is not None:
+            kwargs.setdefault("fields", fields)
+        return super().get_serializer(*args, **kwargs)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields = self.get_requested_fields()
+        if fields is not None:
+            serializer = self.get_serializer_class()(fields=fields, context=self.get_serializer_context())
+            model_fields = serializer.get_model_field_names()
+            #pagination reads position of last row from ordering fields
+            model_fields.update(field.lstrip("-") for field in getattr(self.pagination_class, "ordering", ()))
+            queryset = queryset.only(*model_fields)
+        return queryset
+
+class CompiledSerializerMixin:
+    """
+    This class is used for returning list api rows with compiled serializer when `compiled_serializer` is enabled,
+    rows are read with queryset.values() and converted into same data as returned by serializer
+    """
+    compiled_serializer = False
+
+    def list(self, request, *args, **kwargs):
+        compiled = get_compiled_serializer(self.get_serializer()) if self.compiled_serializer else None
+        if compiled is None:
+            return super().list(request, *args, **kwargs)
+
+        columns, to_dict = compiled
+        #pagination reads position of last row from ordering fields
+        ordering = [field.lstrip("-") for field in getattr(self.pagination_class, "ordering", ())]
+        queryset = self.filter_queryset(self.get_queryset()).values(*columns, *set(ordering) - set(columns))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response([to_dict(row) for row in page])
+        return Response([to_dict(row) for row in queryset])
+
+class VendorViewSet(FieldProjectionMixin, CompiledSerializerMixin, ModelViewSet):
     """
     This Vendor view set is used for CRUD operation on Vendor model
     """
     serializer_class = VendorSerializer
     queryset = Vendor.objects.all()
+    pagination_class = VendorCursorPagination
+    compiled_serializer = True
+    #json of each vendor is cached and spliced into list response when all fields are returned
+    cached_rows = True
+
+    def list(self, request, *args, **kwargs):
+        renderer = request.accepted_renderer
+        variant = get_url_template("vendor-detail", ["pk"], request, self.format_kwarg)
+        compiled = get_compiled_serializer(self.get_serializer()) if self.compiled_serializer else None
+        if (not self.cached_rows or compiled is None or variant is None or self.get_requested_fields() is not None
+                or not isinstance(renderer, FastJSONRenderer)):
+            return super().list(request, *args, **kwargs)
+
+        columns, to_dict = compiled
+        queryset = self.filter_queryset(self.get_queryset()).values("vendor_code")
+        page = self.paginate_queryset(queryset)
+        vendor_ids = [row["vendor_code"] for row in (page if page is not None else queryset)]
+
+        rows, entries = get_vendor_rows(vendor_ids, variant)
+        missing_ids = [vendor_id for vendor_id in vendor_ids if vendor_id not in rows]
+        if missing_ids:
+            missing_rows = {row["vendor_code"]: renderer.encode(to_dict(row))
+                            for row in Vendor.objects.filter(vendor_code__in=missing_ids).values(*columns)}
+            set_vendor_rows(entries, missing_rows, variant)
+            rows.update(missing_rows)
 
-class PurchaseOrderViewSet(ModelViewSet):
+        data = [EncodedJSON(rows[vendor_id]) for vendor_id in vendor_ids if vendor_id in rows]
+        return self.get_paginated_response(data) if page is not None else Response(data)
+
+class PurchaseOrderViewSet(FieldProjectionMixin, CompiledSerializerMixin, ModelViewSet):
     """
     This Purchase Order view set is used for CRUD operation on PurchaseOrder model
     """
     serializer_class = PurchaseOrderSerializer
     queryset = PurchaseOrder.objects.all()
+    pagination_class = PurchaseOrderCursorPagination
+    filter_backends = [PurchaseOrderFilter]
+    compiled_serializer = True
 
 @method_decorator(name="get",decorator=swagger_auto_schema(
     responses={200: VendorPerformanceSchema}
 ))
 class VendorPerformance(APIView):
     """This API view is used for Getting metric data of Vendor"""
+    compiled_serializer = True
+
+    def load_performance(self, vendor_id):
+        """This method returns serialized performance data of vendor read from database"""
+        compiled = get_compiled_serializer(VendorPerformanceSerializer()) if self.compiled_serializer else None
+        if compiled is None:
+            return dict(VendorPerformanceSerializer(Vendor.objects.get(vendor_code=vendor_id)).data)
+        columns, to_dict = compiled
+        return to_dict(Vendor.objects.values(*columns).get(vendor_code=vendor_id))
+
     def get(self, request, vendor_id, format=None):
         try:
-            obj = Vendor.objects.get(vendor_code=vendor_id)
-            ser = VendorPerformanceSerializer(obj)
-            return Response(ser.data)
+            etag, data = get_vendor_performance(vendor_id, lambda: self.load_performance(vendor_id))
+            if etag in parse_etags(request.headers.get("If-None-Match", "")):
+                return Response(status=304, headers={"ETag": etag})
+            return Response(data, headers={"ETag": etag})
 
         except Vendor.DoesNotExist as e:
             return Response({"error":f"User does not exist"}, status=404)
@@ -41,10 +160,265 @@ class VendorPerformance(APIView):
         except Exception as e:
             return Response({"error":f"Exception occured, message: {e}"}, status=500)
 
+class VendorPerformanceHistory(APIView):
+    """
+    This API view is used for getting performance history of vendor grouped in hour, day or week buckets,
+    grouping is done by database and response contains parallel arrays with one value for each bucket
+    """
+    buckets = {"hour": TruncHour, "day": TruncDay, "week": TruncWeek}
+    aggregations = ("avg", "last")
+
+    def get(self, request, vendor_id, format=None):
+        bucket = request.query_params.get("bucket", "day")
+        aggregation = request.query_params.get("agg", "avg")
+        if bucket not in self.buckets:
+            raise ValidationError({"bucket": [f"Select one of: {', '.join(self.buckets)}"]})
+        if aggregation not in self.aggregations:
+            raise ValidationError({"agg": [f"Select one of: {', '.join(self.aggregations)}"]})
+        if not Vendor.objects.filter(vendor_code=vendor_id).exists():
+            return Response({"error":f"Vendor does not exist"}, status=404)
+
+        queryset = HistoricalPerformance.objects.filter(vendor_id=vendor_id)
+        date_from, date_to = get_datetime_param(request, "from"), get_datetime_param(request, "to")
+        if date_from is not None:
+            queryset = queryset.filter(date__gte=date_from)
+        if date_to is not None:
+            queryset = queryset.filter(date__lt=date_to)
+        grouped = queryset.annotate(bucket=self.buckets[bucket]("date")).values("bucket").order_by("bucket")
+
+        if aggregation == "avg":
+            rows = grouped.annotate(**{f"{field}_value": Avg(field) for field in VENDOR_METRIC_FIELDS}).values_list(
+                "bucket", *[f"{field}_value" for field in VENDOR_METRIC_FIELDS])
+        else:
+            #last record of each bucket
+            last_dates = grouped.annotate(last_date=Max("date")).values("last_date")
+            rows = queryset.filter(date__in=Subquery(last_dates)).annotate(bucket=self.buckets[bucket]("date")).order_by(
+                "date").values_list("bucket", *VENDOR_METRIC_FIELDS)
+
+        columns = {"time": [], **{field: [] for field in VENDOR_METRIC_FIELDS}}
+        #rows are not read with server side cursor, it sends parameters of bucket expression of select, group by and
+        #order by separately so postgresql does not match them, there is only one row for each bucket
+        for row in rows:
+            if columns["time"] and columns["time"][-1] == row[0]:
+                #records with same date in one bucket, only last one is kept
+                for values in columns.values():
+                    values.pop()
+            columns["time"].append(row[0])
+            for field, value in zip(VENDOR_METRIC_FIELDS, row[1:]):
+                columns[field].append(round(value,2))
+
+        return Response({"vendor_code": vendor_id, "bucket": bucket, "agg": aggregation, **columns})
+
+class PurchaseOrderCount(APIView):
+    """
+    This API view is used for counting purchase orders matching same filters as purchase order list, count is
+    calculated by database from index without loading orders
+    """
+    filter_backend = PurchaseOrderFilter
+
+    def get(self, request, format=None):
+        queryset = self.filter_backend().filter_queryset(request, PurchaseOrder.objects.all(), self)
+        return Response({"count": queryset.count()})
+
+class PurchaseOrderItemTotals(APIView):
+    """
+    This API view is used for getting number of orders, total quantity and total value of each item, totals are
+    grouped by database from line items of orders, `vendor` and `sku` query parameters limit orders and items
+    """
+    max_limit = 1000
+
+    def get(self, request, format=None):
+        limit = get_int_param(request, "limit", 100, min_value=1, max_value=self.max_limit)
+        queryset = PurchaseOrderItem.objects.all()
+        if request.query_params.get("vendor"):
+            queryset = queryset.filter(purchase_order__vendor_id=request.query_params["vendor"])
+        if request.query_params.get("sku"):
+            queryset = queryset.filter(sku=request.query_params["sku"])
+
+        rows = queryset.values("sku").annotate(
+            orders=Count("purchase_order_id"),
+            vendors=Count("purchase_order__vendor_id", distinct=True),
+            total_quantity=Sum("quantity"),
+            total_value=Sum(F("quantity") * F("price")),
+        ).order_by("sku")[:limit]
+        return Response({"results": list(rows)})
+
+def get_ranking_metric(request):
+    """This function is used for reading ranking metric from `metric` query parameter"""
+    metric = request.query_params.get("metric", "performance_score")
+    if metric not in RANKING_METRICS:
+        raise ValidationError({"metric": [f"Select one of: {', '.join(RANKING_METRICS)}"]})
+    return metric
+
+class VendorRankings(APIView):
+    """
+    This API view is used for getting top or bottom vendors by metric, vendors are read from rank index of metric
+    in ranking order so only returned vendors are read
+    """
+    orders = ("top", "bottom")
+    max_limit = 100
+
+    def get(self, request, format=None):
+        metric = get_ranking_metric(request)
+        order = request.query_params.get("order", "top")
+        if order not in self.orders:
+            raise ValidationError({"order": [f"Select one of: {', '.join(self.orders)}"]})
+        limit = get_int_param(request, "limit", 10, min_value=1, max_value=self.max_limit)
+        min_orders = get_int_param(request, "min_orders", 0, min_value=0)
+
+        queryset = get_ranked_vendors(metric, min_orders)
+        total = queryset.count()
+        rows = queryset.order_by(*get_ranking_order(metric, best_first=order == "top")).values(
+            "vendor_code", "name", metric)[:limit]
+
+        results = [{"rank": index + 1 if order == "top" else total - index, "vendor_code": row["vendor_code"],
+                    "name": row["name"], "value": row[metric]} for index, row in enumerate(rows)]
+        return Response({"metric": metric, "order": order, "total": total, "results": results})
+
+class VendorRank(APIView):
+    """
+    This API view is used for getting rank and percentile of vendor by metric, rank is counted in rank index of metric
+    without sorting vendors
+    """
+
+    def get(self, request, vendor_id, format=None):
+        metric = get_ranking_metric(request)
+        min_orders = get_int_param(request, "min_orders", 0, min_value=0)
+        vendor = get_ranked_vendors(metric, min_orders).filter(vendor_code=vendor_id).values("vendor_code", metric).first()
+        if vendor is None:
+            if not Vendor.objects.filter(vendor_code=vendor_id).exists():
+                return Response({"error":f"Vendor does not exist"}, status=404)
+            if metric in RANKED_VENDOR_FILTERS and not get_ranked_vendors(metric).filter(vendor_code=vendor_id).exists():
+                return Response({"error":f"Vendor has no value of {metric}"}, status=404)
+            return Response({"error":f"Vendor has less than {min_orders} purchase orders"}, status=404)
+
+        rank = get_vendor_rank(metric, vendor[metric], vendor["vendor_code"], min_orders)
+        total = get_ranked_vendors(metric, min_orders).count()
+        return Response({"vendor_code": vendor["vendor_code"], "metric": metric, "value": vendor[metric], "rank": rank,
+                         "total": total, "percentile": get_percentile(rank, total)})
+
 class PurchaseOrderAck(UpdateModelMixin, GenericAPIView):
     """This api view is used for updating acknowledge date of PurchaseOrder data"""
     queryset = PurchaseOrder.objects.all()
     serializer_class = PurchaseOrderUpdateSerializer
 
     def put(self, request, *args, **kwargs):
-        return self.update(request, *args, **kwargs)
\ No newline at end of file
+        return self.update(request, *args, **kwargs)
+
+@method_decorator(name="post",decorator=swagger_auto_schema(
+    request_body=PurchaseOrderSerializer(many=True), responses={201: PurchaseOrderSerializer(many=True)}
+))
+@method_decorator(name="patch",decorator=swagger_auto_schema(
+    request_body=PurchaseOrderBulkUpdateSerializer(many=True), responses={200: PurchaseOrderSerializer(many=True)}
+))
+class PurchaseOrderBulk(APIView):
+    """
+    This API view is used for creating and updating many purchase orders at once, signals are not sent for bulk writes
+    and metrics are recalculated once for each affected vendor, in outbox mode recalculation locks vendors so it is
+    exact with concurrent order changes and transaction is retried when it deadlocks with metrics worker
+    """
+    batch_size = 500
+
+    def post(self, request, format=None):
+        ser = PurchaseOrderSerializer(data=request.data, many=True, context={"request": request})
+        ser.is_valid(raise_exception=True)
+
+        #numbers of all orders are allocated with one sequence update
+        po_numbers = allocate_po_numbers(len(ser.validated_data))
+        orders = [PurchaseOrder(po_number=po_number, **data) for po_number, data in zip(po_numbers, ser.validated_data)]
+
+        def create_orders():
+            PurchaseOrder.objects.bulk_create(orders, batch_size=self.batch_size)
+            replace_line_items([(order.po_number, order.items) for order in orders], created=True)
+            recompute_vendor_metrics([order.vendor_id for order in orders])
+        atomic_with_retry(create_orders)
+
+        return Response(PurchaseOrderSerializer(orders, many=True, context={"request": request}).data, status=201)
+
+    def patch(self, request, format=None):
+        ser = PurchaseOrderBulkUpdateSerializer(data=request.data, many=True)
+        ser.is_valid(raise_exception=True)
+
+        po_numbers = Counter(data["po_number"] for data in ser.validated_data)
+        duplicates = sorted(po_number for po_number, count in po_numbers.items() if count > 1)
+        if duplicates:
+            return Response({"error":f"Purchase orders are repeated: {', '.join(duplicates)}"}, status=400)
+
+        changes = {data.pop("po_number"): data for data in ser.validated_data}
+
+        def update_orders():
+            orders = PurchaseOrder.objects.in_bulk(list(changes))
+            missing = [po_number for po_number in changes if po_number not in orders]
+            if missing:
+                return Response({"error":f"Purchase orders does not exist: {', '.join(missing)}"}, status=404)
+
+            fields = {"modified_date"}
+            modified_date = timezone.now()
+            for po_number, data in changes.items():
+                order = orders[po_number]
+                for field, value in data.items():
+                    setattr(order, field, value)
+                order.modified_date = modified_date
+                fields.update(data)
+
+            PurchaseOrder.objects.bulk_update(orders.values(), sorted(fields), batch_size=self.batch_size)
+            recompute_vendor_metrics([order.vendor_id for order in orders.values()])
+            return Response(PurchaseOrderSerializer(orders.values(), many=True, context={"request": request}).data)
+        return atomic_with_retry(update_orders)
+
+
+class ExportAPIView(APIView):
+    """
+    This class is base api view for streaming export of table rows as ndjson or csv selected with `format`
+    query parameter, rows are read from database in chunks so memory use does not depend on result size
+    """
+    renderer_classes = [NDJSONRenderer, CSVRenderer]
+    chunk_size = 2000
+    columns = ()
+    filename = "export"
+    since_field = None
+
+    def get_queryset(self):
+        raise NotImplementedError("Export view requires .get_queryset() to be implemented")
+
+    def get(self, request, format=None):
+        queryset = self.get_queryset()
+        if request.query_params.get("vendor"):
+            queryset = queryset.filter(vendor_id=request.query_params["vendor"])
+        since = get_datetime_param(request, "since")
+        if since is not None:
+            queryset = queryset.filter(**{f"{self.since_field}__gte": since})
+
+        renderer = request.accepted_renderer
+        rows = queryset.values_list(*self.columns).iterator(chunk_size=self.chunk_size)
+        response = StreamingHttpResponse(renderer.render_rows(self.columns, rows),
+                                         content_type=f"{renderer.media_type}; charset=utf-8")
+        response["Content-Disposition"] = f'attachment; filename="{self.filename}.{renderer.format}"'
+        return response
+
+class PurchaseOrderExport(ExportAPIView):
+    """This api view is used for streaming export of purchase orders changed since given date"""
+    columns = ("po_number", "vendor_id", "order_date", "delivery_date", "expected_delivery_date", "items", "quantity",
+               "status", "quality_rating", "issue_date", "acknowledgment_date", "modified_date")
+    filename = "purchase_orders"
+    since_field = "modified_date"
+
+    def get_queryset(self):
+        return PurchaseOrder.objects.order_by()
+
+class HistoricalPerformanceExport(ExportAPIView):
+    """This api view is used for streaming export of vendor performance history created since given date"""
+    columns = ("id", "vendor_id", "date", "on_time_delivery_rate", "quality_rating_avg", "average_response_time",
+               "fulfillment_rate", "json_data")
+    filename = "historical_performance"
+    since_field = "date"
+
+    def get_queryset(self):
+        return HistoricalPerformance.objects.order_by()
+
+class RequestMetrics(APIView):
+    """This api view is used for returning request latency and query count histograms in prometheus text format"""
+    permission_classes = [IsAuthenticatedOrMetricsNetwork]
+
+    def get(self, request):
+        return HttpResponse(registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,41 @@
+"""
+Cache profiles of vendor_management_sys selected with environment variables.
+
+Cached vendor rows and performance responses are invalidated by moving vendor to new cache version, so the cache
+must be shared by every process which changes vendor metrics (web workers, metrics_worker, rebuild_vendor_metrics).
+
+CACHE_BACKEND=file (default) keeps entries in CACHE_LOCATION directory shared by processes of one host,
+CACHE_BACKEND=redis uses redis server at CACHE_LOCATION shared by all hosts (requires redis package),
+CACHE_BACKEND=locmem keeps entries in memory of each process, changes made by other processes are not seen until
+entries expire so it is only used with single process.
+"""
+from django.core.exceptions import ImproperlyConfigured
+
+def get_cache_settings(environ, base_dir):
+    """This function is used for creating default cache settings from environment variables
+    :params:
+        environ: "dict of environment variables"
+        base_dir: "project directory, default file cache directory is created in it"
+    :return:
+        dict of django cache settings
+    """
+    backend = environ.get("CACHE_BACKEND", "file")
+    if backend == "file":
+        return {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": environ.get("CACHE_LOCATION", base_dir / "cache"),
+        }
+
+    if backend == "redis":
+        return {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": environ.get("CACHE_LOCATION", "redis://localhost:6379/1"),
+        }
+
+    if backend == "locmem":
+        return {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "vendor-management-sys",
+        }
+
+    raise ImproperlyConfigured(f"Unknown CACHE_BACKEND {backend!r}, use 'file', 'redis' or 'locmem'")
@@ -0,0 +1,60 @@
+"""
+Database profiles of vendor_management_sys selected with environment variables.
+
+DB_ENGINE=sqlite (default) uses sqlite file tuned for concurrent readers with one writer, pragmas of
+SQLITE_PRAGMAS are applied to each new connection by api.signals.configure_sqlite_connection.
+
+DB_ENGINE=postgres uses PostgreSQL with persistent connections which are checked before reuse, Django 5.0
+has no connection pool so connections are kept by each worker for DB_CONN_MAX_AGE seconds, with
+DB_POOLER=pgbouncer server side cursors are disabled for transaction pooling of pgbouncer.
+"""
+from django.core.exceptions import ImproperlyConfigured
+
+def get_database_settings(environ, base_dir):
+    """This function is used for creating default database settings from environment variables
+    :params:
+        environ: "dict of environment variables"
+        base_dir: "project directory, default sqlite file is created in it"
+    :return:
+        dict of django database settings
+    """
+    engine = environ.get("DB_ENGINE", "sqlite")
+    if engine == "sqlite":
+        return {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": environ.get("DB_NAME", base_dir / "db.sqlite3"),
+            "CONN_MAX_AGE": int(environ.get("DB_CONN_MAX_AGE", 0)),
+        }
+
+    if engine == "postgres":
+        return {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": environ.get("DB_NAME", "vendor_management"),
+            "USER": environ.get("DB_USER", "postgres"),
+            "PASSWORD": environ.get("DB_PASSWORD", ""),
+            "HOST": environ.get("DB_HOST", "localhost"),
+            "PORT": environ.get("DB_PORT", "5432"),
+            "CONN_MAX_AGE": int(environ.get("DB_CONN_MAX_AGE", 60)),
+            "CONN_HEALTH_CHECKS": True,
+            "DISABLE_SERVER_SIDE_CURSORS": environ.get("DB_POOLER") == "pgbouncer",
+            "OPTIONS": {
+                "connect_timeout": int(environ.get("DB_CONNECT_TIMEOUT", 5)),
+            },
+        }
+
+    raise ImproperlyConfigured(f"Unknown DB_ENGINE {engine!r}, use 'sqlite' or 'postgres'")
+
+def get_sqlite_pragmas(environ):
+    """This function returns pragmas applied to new sqlite connections, DB_SQLITE_TUNED=0 disables them"""
+    if environ.get("DB_SQLITE_TUNED", "1") == "0":
+        return {}
+    return {
+        # readers do not wait for writer and writer does not wait for readers
+        "journal_mode": "WAL",
+        # in WAL mode commits are durable after checkpoint, database is never corrupted
+        "synchronous": "NORMAL",
+        # milliseconds for which writer waits for lock of other writer before failing with "database is locked"
+        "busy_timeout": int(environ.get("DB_SQLITE_BUSY_TIMEOUT", 5000)),
+        # bytes of database file read with memory mapping
+        "mmap_size": int(environ.get("DB_SQLITE_MMAP_SIZE", 268435456)),
+    }
@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 from datetime import timedelta
+from .database import get_database_settings, get_sqlite_pragmas
+from .caches import get_cache_settings
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -44,6 +47,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.QueryMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -77,13 +81,27 @@ WSGI_APPLICATION = 'vendor_management_sys.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
+# database is selected with DB_ENGINE environment variable (sqlite or postgres), see database.py for other variables
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': get_database_settings(os.environ, BASE_DIR),
 }
 
+# pragmas applied to each new sqlite connection
+SQLITE_PRAGMAS = get_sqlite_pragmas(os.environ)
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+
+# cache is selected with CACHE_BACKEND environment variable (file, redis or locmem), it must be shared by all processes
+# so invalidation made by one process is seen by others, see caches.py for other variables
+CACHES = {
+    'default': get_cache_settings(os.environ, BASE_DIR),
+}
+
+# seconds for which vendor performance response is kept in cache, entries are also invalidated on metric changes
+VENDOR_PERFORMANCE_CACHE_TIMEOUT = 300
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -130,16 +148,56 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 DEFAULT_QUALITY_RATING_MAX_VALUE = 10
 
+# purchase order numbers are allocated from sequence table in blocks of this size kept by each process, numbers
+# of block not used before process ends are skipped
+PO_NUMBER_BLOCK_SIZE = 100
+
+# vendor metrics are updated in the saving request with "sync" mode, with "outbox" mode changes are stored
+# in outbox table and applied by "python manage.py metrics_worker" command
+VENDOR_METRICS_MODE = "sync"
+
+# retention of vendor performance history used by "python manage.py compact_history" command, raw records older
+# than RAW_DAYS are rolled into one record per day and daily records older than DAILY_DAYS into one record per week
+HISTORY_RETENTION = {
+    "RAW_DAYS": 30,
+    "DAILY_DAYS": 365,
+}
+
+# vendor performance score (0 to 100) used by vendor rankings is weighted average of metrics scaled to 0..1,
+# response time equal to RESPONSE_TIME_HOURS scores half, after changing weights stored scores are updated with
+# "python manage.py rebuild_vendor_metrics"
+VENDOR_SCORE = {
+    "WEIGHTS": {
+        "on_time_delivery_rate": 0.3,
+        "quality_rating_avg": 0.3,
+        "average_response_time": 0.1,
+        "fulfillment_rate": 0.3,
+    },
+    "RESPONSE_TIME_HOURS": 24,
+}
+
+# get requests of vendor and purchase order list and details api's and vendor performance api are served by
+# async views when application runs with asgi server, other requests are passed to sync views
+ASYNC_READ_VIEWS = False
+
+# requests slower than this many milliseconds are logged with their sql queries by "api.slow_requests" logger,
+# None disables slow request logging
+SLOW_REQUEST_THRESHOLD_MS = None
+
+# networks from which /api/_metrics is read without token (e.g. prometheus server), requests from other addresses
+# need valid token, address is read from REMOTE_ADDR so address of proxy is seen behind reverse proxy
+REQUEST_METRICS_ALLOWED_NETWORKS = ["127.0.0.1/32", "::1/128"]
+
 # rest framework configurations
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.CachedJWTAuthentication',
     ),
     "DEFAULT_PERMISSION_CLASSES":[
         'rest_framework.permissions.IsAuthenticated'
     ],
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'api.renderers.FastJSONRenderer',
     ]
 }
 
@@ -155,6 +213,22 @@ SWAGGER_SETTINGS = {
 }
 
 
+# validated jwt tokens and their users are kept in memory of each process, MAX_SIZE is number of kept tokens and
+# MAX_AGE is number of seconds after which token is validated again so changes of users made by other processes
+# are seen after this time
+JWT_AUTH_CACHE = {
+    "MAX_SIZE": 1000,
+    "MAX_AGE": 60,
+}
+
+# transactions of purchase order saves failing on lock of other writer are started again with random backoff
+# (seconds, doubled for each attempt up to MAX_BACKOFF)
+TRANSACTION_RETRIES = {
+    "ATTEMPTS": 5,
+    "BACKOFF": 0.02,
+    "MAX_BACKOFF": 0.5,
+}
+
 #jwt configuration
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=30),